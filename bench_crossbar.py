@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Benchmark: crossbar reads from 4x4 to 1024x1024, ideal and with IR drop
+For each size, times batched ideal reads (I = G^T V) and IR-drop reads
+with 1 ohm wire segments, split into factorization (once per array
+state) and per-vector solve, and reports how far the IR drop pulls the
+column currents below the ideal ones. Small arrays also cross-check the
+iterative solver against the sparse LU.
+"""
+import time
+
+import numpy as np
+
+from crossbar import R_WIRE, Crossbar, random_state
+
+SIZES = [4, 8, 16, 32, 64, 128, 256, 512, 1024]
+IDEAL_BATCH = 256
+IR_BATCH = 8
+READ_V = 0.2
+
+
+def main():
+    rng = np.random.default_rng(0)
+    check = random_state(48, 40, seed=3)
+    v = rng.uniform(0, READ_V, (48, 4))
+    direct = Crossbar(check, r_row=R_WIRE, r_col=R_WIRE, method="direct").read(v)
+    iterative = Crossbar(check, r_row=R_WIRE, r_col=R_WIRE, method="iterative").read(v)
+    print(f"Iterative vs. sparse LU (48x40): max relative difference "
+          f"{np.abs(direct - iterative).max() / np.abs(direct).max():.1e}\n")
+
+    print(f"{'size':>9} {'ideal reads/s':>14} {'IR solver':>9} {'factor s':>9} {'IR reads/s':>11} "
+          f"{'CG iters':>8} {'IR loss':>8}")
+    for n in SIZES:
+        state = random_state(n, n, seed=n)
+        ideal = Crossbar(state)
+        v = rng.uniform(0, READ_V, (n, IDEAL_BATCH))
+        start = time.perf_counter()
+        reps = max(1, 2 ** 20 // (n * n))
+        for _ in range(reps):
+            ideal_i = ideal.read(v)
+        ideal_rate = reps * IDEAL_BATCH / (time.perf_counter() - start)
+
+        xbar = Crossbar(state, r_row=R_WIRE, r_col=R_WIRE)
+        start = time.perf_counter()
+        xbar.factorize()
+        factor_s = time.perf_counter() - start
+        solver = "direct" if "lu" in xbar._factor else "iterative"
+        start = time.perf_counter()
+        ir_i = xbar.read(v[:, :IR_BATCH])
+        ir_rate = IR_BATCH / (time.perf_counter() - start)
+        loss = 1 - ir_i.sum() / ideal_i[:, :IR_BATCH].sum()
+        print(f"{n:>4}x{n:<4} {ideal_rate:>14.3e} {solver:>9} {factor_s:>9.3f} {ir_rate:>11.3e} "
+              f"{xbar.iterations if solver == 'iterative' else '-':>8} {loss:>8.1%}")
+
+
+if __name__ == "__main__":
+    main()
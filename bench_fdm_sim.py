@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Benchmark: FDM neuron multiplexing, accuracy and throughput vs. carriers
+Checks the four-neuron 1-4 kHz setup of lissajous_hardware_design.m,
+measures crosstalk and phasor error as carriers fill a 100 kHz band
+(the slide's audio-band figure), times FFT and Goertzel demultiplexing
+against carrier count, and streams a multi-second wideband capture to
+show memory stays bounded by the block size.
+"""
+import time
+import tracemalloc
+
+import numpy as np
+
+from fdm_sim import (BANDWIDTH, WINDOW, Wire, carrier_plan, demux_fft, demux_goertzel,
+                     max_neurons, measure, neuron_phasors, scaling_curve)
+
+COUNTS = [4, 16, 64, 256, 512, 1000, 1250, 2000, 4000]
+THROUGHPUT_COUNTS = [16, 256, 1024, 4096]
+WIDE_FS = 10_000_000
+WIDE_CARRIERS = 4096
+WIDE_SECONDS = 4.0
+
+
+def rate(fn, samples, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return samples / best
+
+
+def main():
+    fs = 1_000_000
+    freqs = carrier_plan(4, 1000, fs)
+    phasors = np.array([1, np.exp(1j * np.pi / 3), 1 + np.exp(1j * np.pi), np.exp(1j * np.pi / 6)])
+    frame = Wire(freqs, phasors, fs, adc_bits=None).block(0, 10000)[None]
+    print("Octave PART 1 setup (4 neurons, 1-4 kHz, 10 ms at 1 MS/s): max phasor error "
+          f"FFT {np.abs(demux_fft(frame, freqs, fs) - phasors).max():.1e}, "
+          f"Goertzel {np.abs(demux_goertzel(frame, freqs, fs) - phasors).max():.1e}\n")
+
+    print(f"Fixed {BANDWIDTH / 1e3:g} kHz band, {WINDOW * 1e3:g} ms readout, 12-bit ADC "
+          f"(resolution limit {max_neurons(BANDWIDTH, WINDOW)} carriers):")
+    print(f"{'carriers':>9} {'spacing':>9} {'crosstalk':>10} {'EVM':>9} {'phase':>8} {'real-time':>10}")
+    for row in scaling_curve(COUNTS):
+        print(f"{row['carriers']:>9} {row['spacing']:>6} Hz {row['crosstalk_db']:>7.1f} dB "
+              f"{row['evm']:>9.1e} {row['phase_deg']:>6.3f}° {row['realtime']:>9.0f}x")
+
+    print(f"\nDemux throughput at {WIDE_FS / 1e6:g} MS/s, 1 ms frames x 16 "
+          "(Msamples/s; real-time needs 10):")
+    print(f"{'carriers':>9} {'synth':>8} {'FFT':>8} {'Goertzel':>9}")
+    frame_len = WIDE_FS // 1000
+    for count in THROUGHPUT_COUNTS:
+        freqs = carrier_plan(count, 1000, WIDE_FS)
+        wire = Wire(freqs, neuron_phasors(count), WIDE_FS)
+        n = 16 * frame_len
+        block = wire.block(0, n)
+        frames = block.reshape(16, frame_len)
+        synth = rate(lambda: wire.block(0, n), n)
+        fft = rate(lambda: demux_fft(frames, freqs, WIDE_FS), n)
+        goertzel = rate(lambda: demux_goertzel(frames[:1, :frame_len // 10], freqs, WIDE_FS),
+                        frame_len // 10, repeat=1)
+        print(f"{count:>9} {synth / 1e6:>8.1f} {fft / 1e6:>8.1f} {goertzel / 1e6:>9.2f}")
+
+    freqs = carrier_plan(WIDE_CARRIERS, 1000, WIDE_FS)
+    tracemalloc.start()
+    start = time.perf_counter()
+    row = measure(freqs, neuron_phasors(WIDE_CARRIERS), WIDE_FS, WIDE_SECONDS, window=0.001)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    capture_mb = row["samples"] * 8 / 1e6
+    print(f"\nStreamed {WIDE_SECONDS:g} s at {WIDE_FS / 1e6:g} MS/s, {WIDE_CARRIERS} carriers: "
+          f"{row['samples'] / 1e6:.0f} M samples in {elapsed:.1f} s, peak memory "
+          f"{peak / 1e6:.1f} MB (whole capture {capture_mb:.0f} MB); "
+          f"crosstalk {row['crosstalk_db']:.1f} dB, EVM {row['evm']:.1e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Benchmark: batched H(w) grids vs. time-domain simulation per operating point
+Times the script's formula and the steady-state drift model on a 10^6
+point frequency x state grid, with the drift model's error against a
+finely sampled reference as PERIOD_SAMPLES varies. Then estimates what
+the same grid costs by simulating every point with memristor_sim and
+transforming its trace, compares Goertzel extraction with a full-length
+FFT of the trace, and checks the model against the simulator as its
+time step shrinks.
+"""
+import time
+
+import numpy as np
+
+from freq_response import (HARMONICS, distortion, drift_response, script_response, simulated_response,
+                           switching_frequency)
+from memristor_sim import simulate_batch, sine_input
+
+GRID = (10000, 100)            # frequencies x states
+SAMPLES = [32, 64, 128]
+REFERENCE_SAMPLES = 4096
+CHECK_POINTS = [(10.0, 0.5), (3000.0, 0.5), (1e5, 0.5), (1e5, 0.9)]
+SIM_STEPS = [2000, 20000, 100000]
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main():
+    f = np.logspace(0, 6, GRID[0])[:, None]
+    states = np.linspace(0.05, 0.95, GRID[1])[None, :]
+    points = GRID[0] * GRID[1]
+    print(f"Grid: {GRID[0]} frequencies (1 Hz - 1 MHz) x {GRID[1]} states = {points} points; "
+          f"full switching below {float(switching_frequency()):.0f} Hz")
+    t, _ = timed(lambda: script_response(f, states))
+    print(f"  script formula (Z = R(1 + jw/w0)):        {t:6.2f} s")
+
+    reference = drift_response(f[::100], states, samples=REFERENCE_SAMPLES)
+    for samples in SAMPLES:
+        t, H = timed(lambda: drift_response(f, states, samples=samples))
+        error = np.abs(H[::100] - reference).max(axis=-1) / np.abs(reference[..., 0])
+        print(f"  drift model, {samples:>3} samples/period:        {t:6.2f} s  "
+              f"(error vs. {REFERENCE_SAMPLES}: median {np.median(error):.1e}, max {error.max():.1e})")
+
+    # One operating point at a time: simulate, then transform the whole trace
+    steps = 20000
+    freq, devices = 1e3, GRID[1]
+    dt = 1 / (freq * steps)
+    vin = sine_input(f=freq, amplitude=1.0, t_end=2 / freq, dt=dt)
+    t_sim, result = timed(lambda: simulate_batch(vin, dt, {"w0": states.ravel() * 10e-9}, record=("I",)))
+    t_fft, _ = timed(lambda: np.fft.rfft(result["I"], axis=0))
+    per_point = (t_sim + t_fft) / devices
+    print(f"  time-domain simulation + full-length FFT: {per_point * points:6.0f} s estimated "
+          f"({per_point * 1e3:.2f} ms per point, {devices} points per batch, {steps} steps/period)")
+
+    sim = simulated_response([freq], states.ravel(), steps_per_period=steps)[0]
+    last = slice(steps, 2 * steps)
+    bins = np.fft.rfft(result["I"][last], axis=0)[1:HARMONICS + 1] / np.fft.rfft(vin[last])[1]
+    print(f"  Goertzel at {HARMONICS} harmonics vs. rfft of the same period: "
+          f"max relative difference {np.max(np.abs(sim - bins.T)) / np.abs(sim[:, 0]).min():.1e}")
+
+    print(f"\n{'f (Hz)':>8} {'w/D':>5} {'model |I1/V1|':>14} {'phase':>7} {'THD':>7}   "
+          + "  ".join(f"{'sim ' + str(s) + ' steps':>16}" for s in SIM_STEPS))
+    for freq, state in CHECK_POINTS:
+        model = drift_response(freq, state, samples=REFERENCE_SAMPLES)
+        errors = []
+        for s in SIM_STEPS:
+            sim = simulated_response([freq], [state], steps_per_period=s)[0, 0]
+            errors.append(np.max(np.abs(sim - model)) / abs(model[0]))
+        print(f"{freq:>8g} {state:>5g} {abs(model[0]):>14.5e} {np.degrees(np.angle(model[0])):>7.2f} "
+              f"{distortion(model) * 100:>6.1f}%   " + "  ".join(f"{e:>16.1e}" for e in errors))
+
+
+if __name__ == "__main__":
+    main()
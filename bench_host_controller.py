@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Benchmark: host controller scan latency and cells/s vs. pipeline depth
+Runs host_controller.Controller against its pty DeviceSimulator (115200
+baud, 1 ms USB latency each way, 64-byte receive buffer) and reports,
+for depths 1 (stop-and-wait) to 32: the time to READ every cell of a
+16 x 16 array, cells/s, median and 99th-percentile command latency,
+commands re-sent, and bytes the device dropped. Then the same for
+programming a checkerboard with SET/RESET pulses (each cell is read
+first), checked against the simulator's pulse log: one pulse per cell,
+of the right polarity.
+"""
+import asyncio
+
+from host_controller import BAUD, MEASURE_HEADER, measure, measure_lines
+
+DEPTHS = [1, 2, 4, 8, 16, 32]
+ROWS = COLS = 16
+
+
+async def table(operation):
+    results = []
+    print(MEASURE_HEADER)
+    for depth in DEPTHS:
+        result = await measure(depth, ROWS, COLS, operation)
+        results.append(result)
+        print(measure_lines(result))
+    best = max(results, key=lambda r: r["cells_per_s"])
+    print(f"best: depth {best['depth']}, {best['cells_per_s'] / results[0]['cells_per_s']:.1f}x stop-and-wait\n")
+
+
+async def main():
+    print(f"=== {ROWS}x{COLS} READ SCAN at {BAUD} baud ===")
+    await table("scan")
+    print(f"=== {ROWS}x{COLS} SET/RESET PROGRAM at {BAUD} baud ===")
+    await table("program")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Benchmark: frame-sized picture preprocessing for the ODP deck
+Builds a deck showing every picture in the repo at native resolution and
+after image_prep at several DPIs, with a cold and a warm cache.
+"""
+import os
+import sys
+import glob
+import time
+import tempfile
+
+from create_presentation_final import create_odp
+from image_prep import prepare_images
+
+DPIS = [96, 150, 300]
+
+
+def quiet_build(slides, images, odp_filename):
+    stdout = sys.stdout
+    sys.stdout = open(os.devnull, 'w')
+    try:
+        create_odp(slides, images, odp_filename)
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+    return os.path.getsize(odp_filename)
+
+
+def main():
+    pictures = sorted(glob.glob('*.png') + glob.glob('pics/*.png') + glob.glob('pics/*.webp'))
+    images = {f'fig{i}': path for i, path in enumerate(pictures)}
+    slides = [{"title": f"Figure {key}", "content": [path], "image": key} for key, path in images.items()]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        odp_filename = os.path.join(tmp, "figures.odp")
+        start = time.perf_counter()
+        native = quiet_build(slides, images, odp_filename)
+        print(f"{len(images)} pictures, native resolution: {native/1024:8.1f} KB, "
+              f"build {(time.perf_counter() - start)*1000:6.0f} ms")
+        for dpi in DPIS:
+            cache_dir = os.path.join(tmp, f"cache{dpi}")
+            timings = []
+            for _ in range(2):
+                start = time.perf_counter()
+                prepared = prepare_images(images, dpi, cache_dir)
+                size = quiet_build(slides, prepared, odp_filename)
+                timings.append(time.perf_counter() - start)
+            print(f"{dpi:4d} dpi: {size/1024:8.1f} KB ({native/size:.1f}x smaller), "
+                  f"cold build {timings[0]*1000:6.0f} ms, warm build {timings[1]*1000:6.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Benchmark: batched gate-library training vs. one network at a time
+Trains the six gate networks of lissajous_logic_gates.m three ways: the
+Octave-style finite-difference loop (timed on a few epochs and scaled
+to the full run), lissajous_nn.train once per gate and restart, and
+lissajous_gates.train_gates with all gates and restarts in one stack.
+Checks the batched losses against the serial analytic trainer, then
+reports per-gate solve rates as the number of restarts grows.
+"""
+import time
+
+import numpy as np
+
+from lissajous_gates import EPOCHS, GATES, LEARNING_RATE, N_HIDDEN, init_stack, summary_lines, train_gates
+from lissajous_nn import X_XOR, loss, train, train_numeric
+
+NUMERIC_EPOCHS = 20
+RESTARTS = [1, 16, 128, 1024]
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def serial(restarts, seed=42):
+    """Same initial phases as train_gates, trained one network at a time"""
+    stack = init_stack(len(GATES) * restarts, 2, N_HIDDEN, seed=seed)
+    losses = []
+    for n in range(len(GATES) * restarts):
+        truth = np.array(GATES[n // restarts][1], dtype=float)[:, None]
+        params, _ = train(X_XOR, truth, {key: value[n] for key, value in stack.items()},
+                          epochs=EPOCHS, learning_rate=LEARNING_RATE)
+        losses.append(loss(params, X_XOR, truth))
+    return np.array(losses)
+
+
+def main():
+    stack = init_stack(len(GATES), 2, N_HIDDEN)
+    t_numeric, _ = timed(lambda: [
+        train_numeric(X_XOR, np.array(truth, dtype=float)[:, None], {key: value[g] for key, value in stack.items()},
+                      epochs=NUMERIC_EPOCHS, learning_rate=LEARNING_RATE)
+        for g, (_, truth) in enumerate(GATES)])
+    t_numeric *= EPOCHS / NUMERIC_EPOCHS
+    print(f"{len(GATES)} gates, {N_HIDDEN} hidden units, {EPOCHS} epochs")
+    print(f"  Octave-style finite differences (serial): {t_numeric:8.2f} s (scaled from {NUMERIC_EPOCHS} epochs)")
+
+    print(f"\n{'restarts':>8} {'networks':>8} {'serial s':>9} {'batched s':>10} {'speedup':>8} "
+          f"{'max |dloss|':>12}  solved per gate")
+    for restarts in RESTARTS:
+        t_batch, results = timed(lambda: train_gates(restarts=restarts))
+        if restarts <= 16:
+            t_serial, losses = timed(lambda: serial(restarts))
+            check = f"{np.max(np.abs(np.concatenate([r['losses'] for r in results]) - losses)):.1e}"
+            serial_col, speedup = f"{t_serial:9.2f}", f"{t_serial / t_batch:7.0f}x"
+        else:
+            serial_col, speedup, check = f"{'-':>9}", f"{'-':>8}", "-"
+        rates = " ".join(f"{r['name']} {r['solve_rate'] * 100:.0f}%" for r in results)
+        print(f"{restarts:>8} {len(GATES) * restarts:>8} {serial_col} {t_batch:>10.2f} {speedup} {check:>12}  {rates}")
+
+    print(f"\nBest of {RESTARTS[1]} restarts per gate:")
+    for line in summary_lines(train_gates(restarts=RESTARTS[1])):
+        print("  " + line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Benchmark: analytic batched phase gradients vs. finite differences
+Trains XOR from the same initial phases with the Octave-style
+finite-difference loop and with analytic gradients, compares the
+results, then times an epoch of each as the hidden layer grows, and
+an epoch of the analytic trainer on a large noisy-XOR batch.
+"""
+import time
+
+import numpy as np
+
+from lissajous_nn import PHASES, X_XOR, Y_XOR, init_phases, forward, train, train_numeric
+
+NUMERIC_HIDDEN = [4, 16, 64]
+ANALYTIC_HIDDEN = [4, 16, 64, 256, 1024]
+BIG_BATCH = 10000
+
+
+def epoch_time(fn, epochs):
+    start = time.perf_counter()
+    fn(epochs)
+    return (time.perf_counter() - start) / epochs
+
+
+def main():
+    phases = init_phases(2, 4)
+    start = time.perf_counter()
+    numeric, numeric_loss = train_numeric(X_XOR, Y_XOR, phases)
+    t_numeric = time.perf_counter() - start
+    start = time.perf_counter()
+    analytic, analytic_loss = train(X_XOR, Y_XOR, phases)
+    t_analytic = time.perf_counter() - start
+    print(f"Octave setup (4 hidden, input phases, 1000 epochs): final loss "
+          f"{numeric_loss[-1]:.6f} numeric vs {analytic_loss[-1]:.6f} analytic, "
+          f"max phase difference {np.abs(numeric['phases_ih'] - analytic['phases_ih']).max():.1e}")
+    print(f"  wall time {t_numeric:.3f} s numeric vs {t_analytic:.3f} s analytic "
+          f"({t_numeric / t_analytic:.1f}x)\n")
+
+    print(f"{'hidden':>7} {'numeric ms/epoch':>17} {'analytic ms/epoch':>18} {'speedup':>8}")
+    for hidden in ANALYTIC_HIDDEN:
+        phases = init_phases(2, hidden)
+        analytic_s = epoch_time(lambda n: train(X_XOR, Y_XOR, phases, epochs=n, trained=PHASES), 200)
+        if hidden in NUMERIC_HIDDEN:
+            numeric_s = epoch_time(lambda n: train_numeric(X_XOR, Y_XOR, phases, epochs=n),
+                                   max(1, 400 // hidden ** 2 * 4))
+            print(f"{hidden:>7} {numeric_s * 1e3:>17.3f} {analytic_s * 1e3:>18.3f} "
+                  f"{numeric_s / analytic_s:>7.0f}x")
+        else:
+            print(f"{hidden:>7} {'-':>17} {analytic_s * 1e3:>18.3f}")
+
+    phases, history = train(X_XOR, Y_XOR, init_phases(2, 256), epochs=2000, learning_rate=1.0,
+                            trained=PHASES)
+    correct = np.sum((forward(phases, X_XOR)[1] > 0.5) == Y_XOR)
+    print(f"\nAll phases, 256 hidden, 2000 epochs: loss {history[-1]:.2e}, XOR {correct}/4 correct")
+
+    rng = np.random.default_rng(0)
+    X = rng.integers(0, 2, (BIG_BATCH, 2)).astype(float)
+    Y = (X[:, :1] != X[:, 1:]).astype(float)
+    X += rng.normal(0, 0.1, X.shape)
+    phases = init_phases(2, 512)
+    per_epoch = epoch_time(lambda n: train(X, Y, phases, epochs=n, trained=PHASES), 20)
+    print(f"Noisy XOR, {BIG_BATCH} samples, 512 hidden: {per_epoch * 1e3:.1f} ms/epoch")
+
+
+if __name__ == "__main__":
+    main()
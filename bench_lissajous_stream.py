@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark: streaming Lissajous estimates, throughput and memory
+Streams a noisy 30-degree ellipse through LissajousStream in blocks of
+256 to 65536 samples and reports sustained samples/s, against
+re-estimating the whole window from scratch after every block. Then
+tracks peak memory (tracemalloc) as the stream grows from 10^6 to 10^8
+samples, and compares the streamed phase with the least-squares fit of
+memristor_vs_lissajous.m over the same window, for synthetic ellipses
+and memristor I-V loops.
+"""
+import math
+import time
+import tracemalloc
+
+import numpy as np
+
+from lissajous_stream import WINDOW, LissajousStream, lissajous_blocks
+from memristor_sim import simulate_batch, sine_input
+
+FS = 1_000_000
+BLOCKS = [256, 1024, 4096, 16384, 65536]
+STREAM = 10_000_000
+LENGTHS = [1_000_000, 10_000_000, 100_000_000]
+
+
+def source(fs=FS, f=50.0, phase_deg=30.0, noise=0.01):
+    """One second of samples (whole cycles), replayed to make long streams"""
+    x, y = (np.concatenate(c) for c in zip(*lissajous_blocks(f, f, phase_deg, fs=fs, duration=1.0,
+                                                             block=1 << 20, noise=noise)))
+    return x, y
+
+
+def stream(x, y, total, block, window=WINDOW):
+    """Feed `total` samples of the replayed source; returns the stream and elapsed s"""
+    est = LissajousStream(FS, window)
+    n = len(x)
+    start = time.perf_counter()
+    done = 0
+    while done < total:
+        offset = done % n
+        size = min(block, total - done, n - offset)
+        est.update(x[offset:offset + size], y[offset:offset + size])
+        done += size
+    return est, time.perf_counter() - start
+
+
+def fitted_phase(x, y, f, fs, first):
+    """memristor_vs_lissajous.m: least-squares sin/cos fit of y against the drive"""
+    t = (first + np.arange(len(x))) / fs
+    s, c = np.sin(2 * math.pi * f * t), np.cos(2 * math.pi * f * t)
+    return math.degrees(math.atan2(np.dot(y, c) / np.dot(c, c), np.dot(y, s) / np.dot(s, s)))
+
+
+def main():
+    x, y = source()
+    window = int(WINDOW * FS)
+    print(f"Sample rate {FS / 1e6:g} MS/s, window {WINDOW * 1e3:g} ms ({window} samples), "
+          f"{STREAM / 1e6:g} M samples per run")
+    print(f"\n{'block':>7} {'streaming MS/s':>15} {'re-estimate window MS/s':>24} {'phase deg':>10}")
+    for block in BLOCKS:
+        est, elapsed = stream(x, y, STREAM, block)
+        # Baseline: a fresh estimator over the whole window after each block
+        blocks = 20
+        start = time.perf_counter()
+        for k in range(blocks):
+            end = window + k * block
+            fresh = LissajousStream(FS)
+            fresh.update(x[end - window:end], y[end - window:end])
+            fresh.estimate()
+        baseline = blocks * block / (time.perf_counter() - start)
+        print(f"{block:>7} {STREAM / elapsed / 1e6:>15.2f} {baseline / 1e6:>24.2f} "
+              f"{est.estimate()['phase_deg']:>10.3f}")
+
+    print(f"\n{'samples':>12} {'peak MB':>8} {'s':>7} {'phase deg':>10} {'openness':>9}")
+    for total in LENGTHS:
+        tracemalloc.start()
+        est, elapsed = stream(x, y, total, BLOCKS[-1])
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        e = est.estimate()
+        print(f"{total:>12} {peak / 2 ** 20:>8.1f} {elapsed:>7.2f} {e['phase_deg']:>10.4f} {e['openness']:>9.4f}")
+
+    print(f"\n{'signal':<28} {'streamed phase':>15} {'least-squares fit':>18} {'shape':>8}")
+    for phase in (0.0, 30.0, 90.0, 150.0):
+        x, y = source(phase_deg=phase, noise=0.05)
+        est, _ = stream(x, y, 400_000, 4096)
+        last = slice(400_000 - window, 400_000)
+        print(f"{'ellipse %g deg, noise 0.05' % phase:<28} {est.estimate()['phase_deg']:>15.3f} "
+              f"{fitted_phase(x[last], y[last], 50.0, FS, last.start):>18.3f} {est.estimate()['shape']:>8}")
+    dt = 1 / FS
+    for f in (50.0, 2000.0):
+        vin = sine_input(f=f, amplitude=1.0, t_end=0.2, dt=dt)
+        current = simulate_batch(vin, dt, {"R_ON": 100, "R_OFF": 16000, "D": 10e-9, "MU_V": 1e-10},
+                                 record=("I",))["I"][:, 0]
+        est = LissajousStream(FS)
+        for start in range(0, len(vin), 4096):
+            est.update(vin[start:start + 4096], current[start:start + 4096])
+        last = slice(len(vin) - window, len(vin))
+        print(f"{'memristor I-V, %g Hz' % f:<28} {est.estimate()['phase_deg']:>15.3f} "
+              f"{fitted_phase(vin[last], current[last], f, FS, last.start):>18.3f} {est.estimate()['shape']:>8}")
+
+
+if __name__ == "__main__":
+    main()
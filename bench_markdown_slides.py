@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Markdown import + deck build for the project's README files
+Times the streaming import and the full create_odp() build separately.
+"""
+import os
+import sys
+import time
+import tempfile
+
+from create_presentation_final import create_odp
+from markdown_slides import import_markdown
+
+SOURCES = ['README.md', 'README_reorganized.md']
+REPEATS = 5
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        odp_filename = os.path.join(tmp, "readme.odp")
+        for source in SOURCES:
+            best_import = best_build = float('inf')
+            for _ in range(REPEATS):
+                start = time.perf_counter()
+                slides, images = import_markdown(source)
+                imported = time.perf_counter()
+                stdout = sys.stdout
+                sys.stdout = open(os.devnull, 'w')
+                try:
+                    create_odp(slides, images, odp_filename)
+                finally:
+                    sys.stdout.close()
+                    sys.stdout = stdout
+                best_import = min(best_import, imported - start)
+                best_build = min(best_build, time.perf_counter() - imported)
+            print(f"{source:<22} {os.path.getsize(source)/1024:6.0f} KB -> {len(slides)} slides, "
+                  f"{len(images)} images | import {best_import*1000:6.1f} ms, "
+                  f"build {best_build*1000:6.1f} ms, total {(best_import + best_build)*1000:6.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Benchmark: batched NumPy memristor engine vs. a per-device loop
+Checks simulate_batch() against the line-for-line port of
+SIMULATE_MEMRISTOR.m on randomised devices, then reports device-steps
+per second for the scalar loop and for batches of 100 to 10,000 devices.
+"""
+import time
+
+import numpy as np
+
+from memristor_sim import sine_input, simulate_batch, simulate_memristor
+
+DT = 1e-6
+BATCH_SIZES = [100, 1000, 10000]
+TOLERANCE = 1e-9
+
+
+def random_params(rng, n):
+    D = rng.uniform(5e-9, 20e-9, n)
+    return {
+        "R_ON": rng.uniform(50, 200, n),
+        "R_OFF": rng.uniform(2000, 20000, n),
+        "D": D,
+        "MU_V": 10 ** rng.uniform(-15, -10, n),
+        "w0": rng.uniform(0.1, 0.9, n) * D,
+    }
+
+
+def main():
+    rng = np.random.default_rng(1)
+    vin = sine_input(f=50, amplitude=1.0, t_end=0.02, dt=DT)
+    steps = len(vin)
+
+    # Agreement with the Octave port, device by device
+    params = random_params(rng, 8)
+    batch = simulate_batch(vin, DT, params)
+    worst = 0.0
+    start = time.perf_counter()
+    for d in range(8):
+        ref = simulate_memristor(vin, DT, {k: v[d] for k, v in params.items()})
+        for name in ("I", "R", "w"):
+            scale = max(np.abs(ref[name]).max(), np.finfo(float).tiny)
+            worst = max(worst, np.abs(ref[name] - batch[name][:, d]).max() / scale)
+    loop_rate = 8 * steps / (time.perf_counter() - start)
+    print(f"Max relative deviation from scalar port: {worst:.2e} "
+          f"({'OK' if worst < TOLERANCE else 'FAIL'}, tolerance {TOLERANCE:.0e})")
+    print(f"Per-device loop:          {loop_rate:12.3e} device-steps/s")
+
+    for n in BATCH_SIZES:
+        params = random_params(rng, n)
+        for record, label in (((), "final state"), (("I", "R", "w"), "full traces")):
+            if record and n > 1000:
+                continue
+            start = time.perf_counter()
+            simulate_batch(vin, DT, params, record=record)
+            rate = n * steps / (time.perf_counter() - start)
+            print(f"Batch of {n:>5} ({label}): {rate:12.3e} device-steps/s  ({rate/loop_rate:6.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Benchmark: parameter sweep runner, cold vs. cached vs. extended grid
+Runs a 4 x 4 x 5 grid over R_OFF, MU_V and p into an empty cache, reruns
+it, then extends one axis, reporting wall time and simulated points.
+"""
+import os
+import tempfile
+import time
+
+from memristor_sim import sine_input
+from memristor_sweep import grid_design, run_sweep
+
+DT = 1e-6
+AXES = {"R_OFF": [4000, 8000, 16000, 32000], "MU_V": [5e-14, 1e-13, 2e-13, 4e-13],
+        "p": [1, 2, 5, 10, 20]}
+
+
+def timed(label, points, vin, cache, engine="adaptive"):
+    start = time.perf_counter()
+    records = run_sweep(points, vin, DT, cache, engine=engine)
+    elapsed = time.perf_counter() - start
+    simulated = sum(not record["cached"] for record in records)
+    print(f"{label:<28} {len(records):>4} points, {simulated:>4} simulated  {elapsed:8.3f} s")
+    return records
+
+
+def main():
+    vin = sine_input(f=50, amplitude=1.0, t_end=0.04, dt=DT)
+    print(f"Workers: {os.cpu_count()} CPU(s)")
+    with tempfile.TemporaryDirectory() as cache:
+        timed("cold, fixed-step engine", grid_design(AXES), vin, cache, engine="fixed")
+        timed("cold, adaptive engine", grid_design(AXES), vin, cache)
+        timed("rerun (all cached)", grid_design(AXES), vin, cache)
+        extended = dict(AXES, R_OFF=AXES["R_OFF"] + [64000])
+        timed("R_OFF axis extended", grid_design(extended), vin, cache)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Benchmark: picture embedding policy for the ODP archive
+Compares the old slurp-and-DEFLATE image loop with the per-media-type
+policy in odp_archive (PNG stored, copied in chunks) on the repo's
+largest PNGs.
+"""
+import os
+import time
+import tempfile
+import zipfile
+
+from odp_archive import add_file
+
+PICTURES = ['memristor_transfer_function.png', 'lissajous_logic_gates.png']
+REPEATS = 20
+
+
+def embed_deflated(odp_filename, level):
+    """Old behaviour: read each picture whole, DEFLATE it like everything else"""
+    with zipfile.ZipFile(odp_filename, 'w', zipfile.ZIP_DEFLATED, compresslevel=level) as odp:
+        for filename in PICTURES:
+            with open(filename, 'rb') as img:
+                odp.writestr(f'Pictures/{filename}', img.read())
+
+
+def embed_policy(odp_filename, level):
+    with zipfile.ZipFile(odp_filename, 'w', zipfile.ZIP_DEFLATED, compresslevel=level) as odp:
+        for filename in PICTURES:
+            add_file(odp, f'Pictures/{filename}', filename)
+
+
+def main():
+    source_size = sum(os.path.getsize(f) for f in PICTURES)
+    print(f"Pictures: {', '.join(PICTURES)} ({source_size/1024:.1f} KB)")
+    print(f"{'mode':<24} | {'time/build':>10} | {'archive':>10}")
+    print("-" * 52)
+    cases = [
+        ("slurp + DEFLATE level 1", embed_deflated, 1),
+        ("slurp + DEFLATE level 6", embed_deflated, 6),
+        ("slurp + DEFLATE level 9", embed_deflated, 9),
+        ("chunked, PNG stored", embed_policy, 6),
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        odp_filename = os.path.join(tmp, "bench.odp")
+        for name, fn, level in cases:
+            start = time.perf_counter()
+            for _ in range(REPEATS):
+                fn(odp_filename, level)
+            elapsed = (time.perf_counter() - start) / REPEATS
+            size = os.path.getsize(odp_filename)
+            print(f"{name:<24} | {elapsed*1000:7.2f} ms | {size/1024:7.1f} KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Benchmark: full vs. incremental ODP rebuilds
+Builds a large image-heavy deck, then rebuilds it incrementally with no
+change and after a one-word edit to a single slide. Runs once with the
+default policy (PNG stored) and once with every picture deflated, where
+skipping recompression matters most.
+"""
+import os
+import sys
+import glob
+import time
+import tempfile
+
+import create_presentation_final as deck
+import odp_archive
+
+SLIDE_COUNT = 2000
+
+
+def make_deck(n):
+    """Every slide shows one of the repo's pictures"""
+    pictures = sorted(glob.glob('*.png') + glob.glob('pics/*.png') + glob.glob('pics/*.webp'))
+    images = {f'fig{i}': path for i, path in enumerate(pictures)}
+    keys = list(images)
+    slides = [
+        {
+            "title": f"Figure review {i}",
+            "content": [f"• Observation {i}: pinched hysteresis at origin", "", "• Loop area within tolerance"],
+            "image": keys[i % len(keys)],
+        }
+        for i in range(n)
+    ]
+    return slides, images
+
+
+def timed_build(slides, images, odp_filename, incremental):
+    stdout = sys.stdout
+    sys.stdout = open(os.devnull, 'w')
+    try:
+        start = time.perf_counter()
+        deck.create_odp(slides, images, odp_filename, incremental=incremental)
+        return time.perf_counter() - start
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+
+
+def run(label):
+    slides, images = make_deck(SLIDE_COUNT)
+    print(f"\n{label}: {SLIDE_COUNT} slides, {len(images)} pictures")
+    with tempfile.TemporaryDirectory() as tmp:
+        odp_filename = os.path.join(tmp, "bench.odp")
+        full = timed_build(slides, images, odp_filename, incremental=False)
+        unchanged = timed_build(slides, images, odp_filename, incremental=True)
+        slides[SLIDE_COUNT // 2]["content"][0] = "• Observation: clean pinched hysteresis at origin"
+        edited = timed_build(slides, images, odp_filename, incremental=True)
+        size = os.path.getsize(odp_filename)
+    print(f"Full rebuild:                {full*1000:8.1f} ms")
+    print(f"Incremental, no change:      {unchanged*1000:8.1f} ms")
+    print(f"Incremental, one-word edit:  {edited*1000:8.1f} ms")
+    print(f"Archive size:                {size/1024:8.1f} KB")
+
+
+def main():
+    run("Default policy (PNG/WebP stored)")
+    stored = odp_archive.STORED_MEDIA_TYPES
+    odp_archive.STORED_MEDIA_TYPES = set()
+    try:
+        run("Every picture deflated")
+    finally:
+        odp_archive.STORED_MEDIA_TYPES = stored
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Benchmark: parallel DEFLATE of ODP members on 1, 2, 4 and 8 threads
+Builds a large deck with every picture deflated, serially and on each
+worker count, checks the archives are byte-identical, and reports
+throughput.
+"""
+import os
+import sys
+import glob
+import time
+import hashlib
+import tempfile
+import zipfile
+from datetime import datetime
+
+import create_presentation_final as deck
+import odp_archive
+
+SLIDE_COUNT = 20000
+WORKER_COUNTS = [None, 1, 2, 4, 8]
+BUILD_TIME = datetime(2025, 1, 1, 12, 0, 0)
+
+
+def make_deck(n):
+    pictures = sorted(glob.glob('*.png') + glob.glob('pics/*.png'))
+    images = {f'fig{i}': path for i, path in enumerate(pictures)}
+    keys = list(images)
+    slides = [
+        {
+            "title": f"Sweep point {i}",
+            "content": [f"• R_OFF = {1000 + 7*i} Ω", f"• MU_V = {1e-10 * (1 + i % 13):.3e}", "", "• Pinched loop"],
+            "image": keys[i % len(keys)] if i % 10 == 0 else None,
+        }
+        for i in range(n)
+    ]
+    return slides, images
+
+
+def build(slides, images, odp_filename, workers):
+    stdout = sys.stdout
+    sys.stdout = open(os.devnull, 'w')
+    try:
+        start = time.perf_counter()
+        deck.create_odp(slides, images, odp_filename, workers=workers, build_time=BUILD_TIME)
+        return time.perf_counter() - start
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+
+
+def main():
+    slides, images = make_deck(SLIDE_COUNT)
+    stored = odp_archive.STORED_MEDIA_TYPES
+    odp_archive.STORED_MEDIA_TYPES = set()
+    digests = set()
+    print(f"CPUs available: {os.cpu_count()}")
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            odp_filename = os.path.join(tmp, "bench.odp")
+            for workers in WORKER_COUNTS:
+                elapsed = build(slides, images, odp_filename, workers)
+                with zipfile.ZipFile(odp_filename) as odp:
+                    raw = sum(info.file_size for info in odp.infolist())
+                    assert odp.testzip() is None
+                with open(odp_filename, 'rb') as f:
+                    digests.add(hashlib.sha256(f.read()).hexdigest())
+                label = f"{workers} thread(s)" if workers else "serial     "
+                print(f"{label}: {elapsed:6.2f} s  {raw/2**20/elapsed:7.1f} MiB/s uncompressed "
+                      f"-> {os.path.getsize(odp_filename)/2**20:.2f} MiB")
+    finally:
+        odp_archive.STORED_MEDIA_TYPES = stored
+    print("Byte-identical serially and across worker counts:", len(digests) == 1)
+
+
+if __name__ == "__main__":
+    main()
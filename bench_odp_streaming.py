@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark: streamed content.xml vs. one in-memory string
+Builds synthetic decks (up to 10k slides) and reports build time and
+peak Python memory for both ways of producing content.xml.
+"""
+import os
+import sys
+import time
+import tempfile
+import tracemalloc
+import zipfile
+
+import create_presentation_final as deck
+from odp_archive import picture_members
+
+SLIDE_COUNTS = [1000, 2500, 10000]
+
+
+def make_slides(n):
+    """Synthetic sweep-result deck: every 5th slide carries an image"""
+    return [
+        {
+            "title": f"Sweep point {i}: R_OFF={1000 + 10*i} Ω & p={1 + i % 10}",
+            "content": [
+                f"• Loop area: {0.001*i:.4f} V·A",
+                f"• R_max/R_min: {1 + i % 97}",
+                "",
+                "Pinch quality <ok> at origin",
+            ],
+            "image": 'logic_gates' if i % 5 == 0 else None,
+        }
+        for i in range(n)
+    ]
+
+
+def build_in_memory(slides, odp_filename):
+    """Old approach: concatenate every page into one string, then writestr()"""
+    available_images = {k: f for k, f in deck.IMAGES.items() if os.path.exists(f)}
+    pictures, _ = picture_members(available_images)
+    content = ""
+    for page in deck.iter_slide_pages(slides, pictures):
+        content += page.decode('utf-8')
+    with zipfile.ZipFile(odp_filename, 'w', zipfile.ZIP_DEFLATED) as odp:
+        odp.writestr('content.xml', content)
+
+
+def build_streamed(slides, odp_filename):
+    deck.create_odp(slides, deck.IMAGES, odp_filename)
+
+
+def measure(fn, slides, odp_filename):
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn(slides, odp_filename)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    print(f"{'slides':>8} | {'in-memory':>20} | {'streamed':>20}")
+    print("-" * 56)
+    with tempfile.TemporaryDirectory() as tmp:
+        odp_filename = os.path.join(tmp, "bench.odp")
+        for n in SLIDE_COUNTS:
+            slides = make_slides(n)
+            stdout = sys.stdout
+            sys.stdout = open(os.devnull, 'w')
+            try:
+                mem_t, mem_peak = measure(build_in_memory, slides, odp_filename)
+                str_t, str_peak = measure(build_streamed, slides, odp_filename)
+            finally:
+                sys.stdout.close()
+                sys.stdout = stdout
+            print(f"{n:>8} | {mem_t:6.2f} s {mem_peak/2**20:8.2f} MiB | "
+                  f"{str_t:6.2f} s {str_peak/2**20:8.2f} MiB")
+
+
+if __name__ == "__main__":
+    main()
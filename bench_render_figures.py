@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Benchmark: headless figure rendering with decimation and a render cache
+Renders every deck figure from its simulation into an empty cache, then
+times a warm rebuild (nothing re-rendered), a rebuild after one
+simulation parameter changes (one figure re-rendered), and a full deck
+build with rendered figures. Also compares rendering each figure from
+full-length traces against the LTTB-decimated ones.
+"""
+import os
+import shutil
+import tempfile
+import time
+
+from create_presentation_final import IMAGES, create_odp, slides
+from render_figures import FIGURES, decimate_figure, render_figure, render_figures
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main():
+    work = tempfile.mkdtemp()
+    cache = os.path.join(work, "cache")
+    try:
+        t_cold, rendered = timed(lambda: render_figures(cache_dir=cache))
+        t_warm, again = timed(lambda: render_figures(cache_dir=cache))
+        assert again == rendered
+        changed = {"hysteresis": {"MU_V": 20e-14}}
+        t_change, updated = timed(lambda: render_figures(params=changed, cache_dir=cache))
+        fresh = [name for name in FIGURES if updated[name] != rendered[name]]
+        print(f"{len(FIGURES)} figures: cold render {t_cold:.2f} s, warm rebuild {t_warm:.2f} s, "
+              f"after a MU_V change {t_change:.2f} s (re-rendered: {', '.join(fresh)})")
+
+        print(f"\n{'figure':<16} {'samples':>8} {'decimated':>10} {'full s':>7} {'decimated s':>12} "
+              f"{'full KB':>8} {'dec. KB':>8}")
+        for name, (recipe, _) in FIGURES.items():
+            spec = recipe()
+            full = dict(spec, dpi=decimate_figure(spec)["dpi"])
+            small = decimate_figure(spec)
+
+            def count(s):
+                return sum(len(series["x"]) for panel in s["panels"] for series in panel["series"])
+            full_path, small_path = os.path.join(work, "full.png"), os.path.join(work, "small.png")
+            t_full, _ = timed(lambda: render_figure(full, full_path))
+            t_small, _ = timed(lambda: render_figure(small, small_path))
+            print(f"{name:<16} {count(full):>8} {count(small):>10} {t_full:>7.2f} {t_small:>12.2f} "
+                  f"{os.path.getsize(full_path) / 1024:>8.1f} {os.path.getsize(small_path) / 1024:>8.1f}")
+
+        deck = os.path.join(work, "deck.odp")
+        images = {key: os.path.join(os.path.dirname(os.path.abspath(__file__)), path)
+                  for key, path in IMAGES.items()}
+        t_deck, _ = timed(lambda: create_odp(slides, images, deck, render=False))
+        os.makedirs(os.path.join(work, "run"))
+        cwd = os.getcwd()
+        os.chdir(os.path.join(work, "run"))
+        try:
+            t_render_cold, _ = timed(lambda: create_odp(slides, images, deck, render=True))
+            t_render_warm, _ = timed(lambda: create_odp(slides, images, deck, render=True))
+        finally:
+            os.chdir(cwd)
+        print(f"\nFull deck build: Octave PNGs {t_deck:.2f} s, rendered figures cold "
+              f"{t_render_cold:.2f} s, warm {t_render_warm:.2f} s")
+    finally:
+        shutil.rmtree(work)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: per-slide f-string rendering vs. precompiled templates
+Renders a 10k-slide synthetic deck to UTF-8 page XML with the original
+dict + f-string code, with slide_templates straight from the dicts (the
+one-off build: compile a SlideDeck, then render it), and from an
+already compiled SlideDeck, and compares render time, compile time and
+the memory held by the slide model. Unlike the f-string code,
+slide_templates also checks the text for characters XML 1.0 forbids.
+"""
+import time
+import tracemalloc
+
+from slide_templates import compile_slides, iter_pages
+
+SLIDE_COUNT = 10000
+REPEATS = 5
+
+
+def legacy_pages(slides, pictures):
+    """The draw:page renderer as it was before slide_templates"""
+    for i, slide in enumerate(slides):
+        title = slide["title"].replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+        has_image = slide.get("image") and slide["image"] in pictures
+        content_height = "10cm" if has_image else "14cm"
+        content_y = "5.5cm" if has_image else "5.5cm"
+        page = [f'''
+   <draw:page draw:name="slide{i+1}" draw:master-page-name="Default" draw:style-name="dp1">
+    <draw:frame presentation:style-name="pr1" draw:layer="layout" svg:width="24cm" svg:height="3cm" svg:x="2cm" svg:y="1.5cm" presentation:class="title">
+     <draw:text-box>
+      <text:p text:style-name="Title">{title}</text:p>
+     </draw:text-box>
+    </draw:frame>
+    <draw:frame presentation:style-name="pr2" draw:layer="layout" svg:width="{"11cm" if has_image else "24cm"}" svg:height="{content_height}" svg:x="2cm" svg:y="{content_y}" presentation:class="outline">
+     <draw:text-box>''']
+        for line in slide["content"]:
+            line_escaped = line.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+            if line_escaped.strip():
+                page.append(f'''
+      <text:p text:style-name="Content">{line_escaped}</text:p>''')
+            else:
+                page.append('''
+      <text:p text:style-name="Content"/>''')
+        page.append('''
+     </draw:text-box>
+    </draw:frame>''')
+        if has_image:
+            page.append(f'''
+    <draw:frame draw:layer="layout" svg:width="12cm" svg:height="10cm" svg:x="14cm" svg:y="5.5cm">
+     <draw:image xlink:href="{pictures[slide["image"]]}" xlink:type="simple" xlink:show="embed" xlink:actuate="onLoad"/>
+    </draw:frame>''')
+        page.append('''
+   </draw:page>''')
+        yield ''.join(page).encode('utf-8')
+
+
+def make_slides(n):
+    return [
+        {
+            "title": f"Sweep point {i}: R_OFF = {1000 + 7*i} Ω",
+            "content": [f"• Loop area: {0.001*i:.4f}", f"• Ratio: {1 + i % 97}", "", "• Pinched <ok>"],
+            "image": 'fig' if i % 4 == 0 else None,
+        }
+        for i in range(n)
+    ]
+
+
+def best_time(render, slides, pictures):
+    best = float('inf')
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        for _ in render(slides, pictures):
+            pass
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def model_size(build):
+    tracemalloc.start()
+    model = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return model, size
+
+
+def main():
+    pictures = {'fig': 'Pictures/0123456789abcdef0123456789abcdef.png'}
+    dicts, dict_bytes = model_size(lambda: make_slides(SLIDE_COUNT))
+    compiled, compiled_bytes = model_size(lambda: compile_slides(make_slides(SLIDE_COUNT)))
+
+    assert list(legacy_pages(dicts, pictures)) == list(iter_pages(compiled, pictures))
+    assert list(legacy_pages(dicts, pictures)) == list(iter_pages(dicts, pictures))
+
+    legacy = best_time(legacy_pages, dicts, pictures)
+    direct = best_time(iter_pages, dicts, pictures)
+    precompiled = best_time(iter_pages, compiled, pictures)
+    compile_time = float('inf')
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        compile_slides(dicts)
+        compile_time = min(compile_time, time.perf_counter() - start)
+
+    print(f"{SLIDE_COUNT} slides (output identical)")
+    print(f"f-string render:    {legacy/SLIDE_COUNT*1e6:7.2f} µs/slide")
+    print(f"one-off (dicts):    {direct/SLIDE_COUNT*1e6:7.2f} µs/slide  ({legacy/direct:.1f}x)")
+    print(f"precompiled render: {precompiled/SLIDE_COUNT*1e6:7.2f} µs/slide  ({legacy/precompiled:.1f}x)")
+    print(f"one-off compile:    {compile_time/SLIDE_COUNT*1e6:7.2f} µs/slide")
+    print(f"slide model memory: dicts {dict_bytes/2**20:.2f} MiB, compiled {compiled_bytes/2**20:.2f} MiB "
+          f"({dict_bytes/compiled_bytes:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Benchmark: memory-mapped trace store vs. in-memory results and .npz
+Simulates a long run straight to disk in chunks and compares peak Python
+memory with simulating it in memory, times reading a 10,000-sample
+window through the memmap against loading the whole run from .npz, and
+times parameter lookups in an index of 2,000 runs.
+"""
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from memristor_sim import sine_input, simulate_batch
+from trace_store import TRACE_COLUMNS, TraceStore, open_trace, record_run
+
+DT = 1e-6
+LONG_RUN = 1.0           # seconds of 50 Hz drive -> 1,000,001 samples
+INDEXED_RUNS = 2000
+
+
+def peak_mb(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] / 1e6
+    tracemalloc.stop()
+    return peak, elapsed
+
+
+def main():
+    vin = sine_input(f=50, amplitude=1.0, t_end=LONG_RUN, dt=DT)
+    params = {"R_ON": 100, "R_OFF": 16000, "MU_V": 1e-12}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "long.trace")
+        in_mem, t_mem = peak_mb(lambda: simulate_batch(vin, DT, params))
+        on_disk, t_disk = peak_mb(lambda: record_run(path, vin, DT, params))
+        print(f"{len(vin):,} samples: in memory {in_mem:7.1f} MB peak ({t_mem:.2f} s), "
+              f"chunked to disk {on_disk:7.1f} MB peak ({t_disk:.2f} s), "
+              f"file {os.path.getsize(path) / 1e6:.1f} MB")
+
+        trace = open_trace(path)
+        npz = os.path.join(tmp, "long.npz")
+        np.savez(npz, **{name: np.asarray(trace[name]) for name in TRACE_COLUMNS})
+        start = time.perf_counter()
+        for k in range(100):
+            window = trace.window(0.2 + k * 0.005, 0.21 + k * 0.005)
+            np.asarray(window["R"]).max()
+        t_window = (time.perf_counter() - start) / 100
+        start = time.perf_counter()
+        with np.load(npz) as data:
+            np.asarray(data["R"])[200000:210000].max()
+        t_npz = time.perf_counter() - start
+        print(f"10,000-sample window: memmap {t_window * 1e3:.3f} ms, whole-run .npz load {t_npz * 1e3:.1f} ms "
+              f"({t_npz / t_window:.0f}x)")
+
+        store = TraceStore(os.path.join(tmp, "store"))
+        short = sine_input(f=50, amplitude=1.0, t_end=0.0002, dt=DT)
+        rng = np.random.default_rng(0)
+        start = time.perf_counter()
+        for n in range(INDEXED_RUNS):
+            result = simulate_batch(short, DT, {"R_OFF": float(rng.choice([8000, 16000, 32000])),
+                                                "MU_V": float(10 ** rng.uniform(-14, -10))})
+            result = {name: np.ravel(result[name]) for name in TRACE_COLUMNS} | {
+                "params": {k: np.ravel(v)[0] if np.ndim(v) else v for k, v in result["params"].items()}}
+            store.add(f"run{n:05d}", result)
+        t_add = time.perf_counter() - start
+        start = time.perf_counter()
+        found = TraceStore(store.directory).find(R_OFF=16000.0, MU_V=(1e-12, 1e-11))
+        t_find = time.perf_counter() - start
+        print(f"Index of {INDEXED_RUNS} runs: added in {t_add:.2f} s, cold lookup {t_find * 1e3:.1f} ms "
+              f"({len(found)} matches)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Benchmark: vector plots with LTTB decimation vs. embedded PNG figures
+Times LTTB on long hysteresis traces and measures how far the decimated
+polyline strays from the full trace, in device pixels of the frame at
+PLOT_DPI. Then builds the same deck of hysteresis slides three ways:
+the Octave PNG embedded as is, figures re-plotted to PNG with
+matplotlib at 150 dpi (the plotting round trip), and native vector
+plots. Reports deck size and build time for each.
+"""
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from create_presentation_final import create_odp
+from memristor_sim import simulate_batch, sine_input
+from slide_templates import PICTURE_SIZE_CM
+from vector_plots import MARGIN_CM, PLOT_DPI, frame_points, lttb, trace_plot
+
+OCTAVE_FIGURE = "memristor_hysteresis.png"
+TRACE_LENGTHS = [40000, 1000000]
+SLIDES = 8
+CHECKED_SAMPLES = 40000
+
+
+def hysteresis(mobilities, cycles=2):
+    dt = 1e-6
+    vin = sine_input(f=50, amplitude=1.0, t_end=0.02 * cycles, dt=dt)
+    return simulate_batch(vin, dt, {"R_ON": 100, "R_OFF": 16000, "D": 10e-9,
+                                    "MU_V": np.asarray(mobilities), "w0": 1e-9})
+
+
+def deviation_px(u, v, keep, px_per_unit, checked=None):
+    """Largest distance from a trace point to the decimated polyline, in pixels
+
+    Only the first `checked` trace points are measured, against the
+    whole polyline.
+    """
+    segments = np.stack((u[keep], v[keep]), axis=1)
+    a, b = segments[:-1], segments[1:]
+    d = b - a
+    length2 = np.maximum(np.sum(d * d, axis=1), 1e-30)
+    worst = 0.0
+    for start in range(0, checked or len(u), 2000):
+        stop = min(start + 2000, checked or len(u))
+        p = np.stack((u[start:stop], v[start:stop]), axis=1)[:, None, :]
+        t = np.clip(np.sum((p - a) * d, axis=2) / length2, 0, 1)
+        dist = np.sqrt(np.sum((a + t[..., None] * d - p) ** 2, axis=2)).min(axis=1)
+        worst = max(worst, float(dist.max()))
+    return worst * px_per_unit
+
+
+def matplotlib_figure(result, device, path):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    width, height = PICTURE_SIZE_CM
+    fig, ax = plt.subplots(figsize=(width / 2.54, height / 2.54))
+    ax.plot(result["V"], result["I"][:, device], lw=0.8)
+    ax.set_xlabel("Voltage (V)")
+    ax.set_ylabel("Current (A)")
+    ax.grid(True, alpha=0.3)
+    fig.tight_layout()
+    fig.savefig(path, dpi=150)
+    plt.close(fig)
+
+
+def build(slides, images, path):
+    start = time.perf_counter()
+    create_odp(slides, images, path, build_time=None)
+    return time.perf_counter() - start, os.path.getsize(path)
+
+
+def main():
+    plot_width = PICTURE_SIZE_CM[0] - MARGIN_CM[0] - MARGIN_CM[1]
+    plot_height = PICTURE_SIZE_CM[1] - MARGIN_CM[2] - MARGIN_CM[3]
+    px_per_unit = PLOT_DPI / 2.54
+    print(f"LTTB at {PLOT_DPI} dpi, {plot_width:g} cm plot width:")
+    for length in TRACE_LENGTHS:
+        result = hysteresis([1e-10], cycles=length // 20000)
+        v, i = result["V"], result["I"][:, 0]
+        # Plot coordinates in cm, as render_plot scales them
+        u = (v - v.min()) / np.ptp(v) * plot_width
+        w = (i.max() - i) / np.ptp(i) * plot_height
+        n_out = frame_points(plot_width, plot_height, PLOT_DPI,
+                             float(np.sum(np.hypot(np.diff(u), np.diff(w)))))
+        start = time.perf_counter()
+        keep = lttb(u, w, n_out)
+        elapsed = time.perf_counter() - start
+        stride = np.unique(np.r_[np.linspace(0, len(u) - 1, n_out).astype(int)])
+        # Deviation of the first two cycles (later cycles retrace them)
+        print(f"  {len(u):>8} samples -> {n_out} points: {elapsed * 1e3:6.1f} ms, worst deviation "
+              f"{deviation_px(u, w, keep, px_per_unit, CHECKED_SAMPLES):.2f} px (every n-th sample: "
+              f"{deviation_px(u, w, stride, px_per_unit, CHECKED_SAMPLES):.2f} px)")
+
+    mobilities = np.geomspace(2e-11, 2e-10, SLIDES)
+    result = hysteresis(mobilities)
+    print(f"\nDeck of {SLIDES} hysteresis slides ({len(result['time'])} samples each):")
+    work = tempfile.mkdtemp()
+    try:
+        def slide(k, **extra):
+            return dict({"title": f"Hysteresis, MU_V = {mobilities[k]:.1e}",
+                         "content": ["Pinched I-V loop", "Linear-drift model, 50 Hz, 1 V"],
+                         "image": None}, **extra)
+
+        octave = [slide(k, image="hysteresis") for k in range(SLIDES)]
+        t, size = build(octave, {"hysteresis": OCTAVE_FIGURE}, os.path.join(work, "octave.odp"))
+        rows = [("Octave PNG (one shared figure)", t, size)]
+
+        start = time.perf_counter()
+        images = {}
+        for k in range(SLIDES):
+            images[f"fig{k}"] = os.path.join(work, f"fig{k}.png")
+            matplotlib_figure(result, k, images[f"fig{k}"])
+        plot_s = time.perf_counter() - start
+        t, size = build([slide(k, image=f"fig{k}") for k in range(SLIDES)], images,
+                        os.path.join(work, "png.odp"))
+        rows.append(("matplotlib PNG per slide", plot_s + t, size))
+
+        start = time.perf_counter()
+        vector = [slide(k, plot=trace_plot(result, device=k, label=f"MU_V = {mobilities[k]:.1e}"))
+                  for k in range(SLIDES)]
+        t, size = build(vector, {}, os.path.join(work, "vector.odp"))
+        rows.append(("vector plots", time.perf_counter() - start, size))
+    finally:
+        shutil.rmtree(work)
+    print(f"\n{'figures':<32} {'build s':>8} {'deck KB':>8}")
+    for name, t, size in rows:
+        print(f"{name:<32} {t:>8.3f} {size / 1024:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
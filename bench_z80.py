@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Z80 emulator speed in emulated MHz, and crossbar timings
+Runs four workloads on z80.Z80 and reports T-states per wall-clock
+second (emulated MHz) against the RC2014's 7.3728 MHz: a 16-bit
+shift-and-add multiply loop, a 16 KB LDIR block copy, SCAN_ARRAY over a
+16 x 16 crossbar (an IN and OUT per cell), and WRITE_CELL on every cell
+(each write integrates a pulse with memristor_sim). Then tabulates the
+emulated scan and program times of the crossbar as the array grows.
+"""
+import time
+
+from z80 import Z80
+from z80_crossbar import CLOCK_MHZ, INTERFACE, SCAN, call, machine, timings
+from z80asm import assemble
+
+MULTIPLY = """
+        ORG 0x0100
+        LD IY, {count}
+OUTER:  LD BC, 0x1234
+        LD DE, 0x5678
+        LD HL, 0
+        LD A, 16
+BIT:    ADD HL, HL
+        EX DE, HL
+        ADD HL, HL
+        EX DE, HL
+        JR NC, SKIP
+        ADD HL, BC
+SKIP:   DEC A
+        JR NZ, BIT
+        DEC IY
+        LD A, IYH
+        OR IYL
+        JR NZ, OUTER
+        HALT
+"""
+
+COPY = """
+        ORG 0x0100
+        LD A, {count}
+AGAIN:  LD HL, 0x4000
+        LD DE, 0x8000
+        LD BC, 0x4000
+        LDIR
+        DEC A
+        JR NZ, AGAIN
+        HALT
+"""
+SIZES = [4, 8, 16]
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def program_run(source):
+    cpu = Z80()
+    cpu.load(assemble(source))
+    cpu.pc = 0x0100
+    return cpu.run()
+
+
+def report(label, t_states, elapsed):
+    mhz = t_states / elapsed / 1e6
+    print(f"{label:<34} {t_states:>11} {elapsed:>8.2f} {mhz:>9.2f} {mhz / CLOCK_MHZ:>9.2f}x")
+
+
+def main():
+    print(f"{'workload':<34} {'T-states':>11} {'wall s':>8} {'emu MHz':>9} {'vs RC2014':>10}")
+    report("16-bit multiply loop (2000x)", *reversed(timed(lambda: program_run(MULTIPLY.format(count=2000)))))
+    report("LDIR 16 KB copy (8x)", *reversed(timed(lambda: program_run(COPY.format(count=8)))))
+
+    cpu, io, programs = machine(16, 16)
+    scans = 50
+    elapsed, t = timed(lambda: sum(call(cpu, programs[SCAN], "SCAN_ARRAY") for _ in range(scans)))
+    report(f"SCAN_ARRAY 16x16 ({scans}x)", t, elapsed)
+    elapsed, t = timed(lambda: sum(call(cpu, programs[INTERFACE], "WRITE_CELL", b=r, c=col, d=0, e=1)
+                                   for r in range(16) for col in range(16)))
+    report("WRITE_CELL, 256 cells (pulse model)", t, elapsed)
+
+    print(f"\nEmulated times at {CLOCK_MHZ} MHz:")
+    print(f"{'array':>7} {'scan us':>9} {'reads/s':>9} {'program us':>11} {'writes/s':>9}")
+    for n in SIZES:
+        result = timings(n, n)
+        scan_us = result["scan"] / CLOCK_MHZ
+        program_us = result["program"] / CLOCK_MHZ
+        print(f"{n:>3}x{n:<3} {scan_us:>9.1f} {n * n / scan_us * 1e6:>9.0f} "
+              f"{program_us:>11.1f} {n * n / program_us * 1e6:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
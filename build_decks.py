@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Builds many presentation variants from one manifest, in parallel
+Each deck in the manifest picks a slide list (from one of the
+create_presentation*.py scripts), a subset of its slides, an image set
+and an output path. Decks are built on a process pool and share an
+on-disk cache of compressed pictures, so a figure used by every variant
+is compressed once per release rather than once per deck.
+
+Manifest (JSON):
+{
+  "defaults": {"source": "create_presentation_final"},
+  "decks": [
+    {"output": "decks/overview.odp", "slides": [1, 2, 3, 15]},
+    {"output": "decks/hardware.odp",
+     "slides": ["Memristor Crossbar Architecture", "Z80 Microprocessor Integration"],
+     "images": {"hardware_design": "lissajous_hardware_design.png"}}
+  ]
+}
+
+"slides" entries are 1-based slide numbers or slide titles; omit it to
+take every slide. "images" replaces the source script's IMAGES.
+"""
+import argparse
+import contextlib
+import importlib
+import io
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from create_presentation_final import create_odp
+from odp_archive import DEFLATE_LEVEL
+
+DEFAULT_SOURCE = "create_presentation_final"
+DEFAULT_CACHE = ".odp_cache"
+
+
+def select_slides(all_slides, selection):
+    """Pick slides by 1-based number or by title, in the order given"""
+    if selection is None:
+        return list(all_slides)
+    by_title = {slide["title"]: slide for slide in all_slides}
+    chosen = []
+    for item in selection:
+        if isinstance(item, int):
+            if not 1 <= item <= len(all_slides):
+                raise ValueError(f"Slide number {item} out of range 1-{len(all_slides)}")
+            chosen.append(all_slides[item - 1])
+        elif item in by_title:
+            chosen.append(by_title[item])
+        else:
+            raise ValueError(f"No slide titled {item!r}")
+    return chosen
+
+
+def load_manifest(path):
+    """Read a manifest and merge each deck over the defaults"""
+    with open(path, encoding='utf-8') as f:
+        manifest = json.load(f)
+    defaults = manifest.get("defaults", {})
+    decks = []
+    for deck in manifest["decks"]:
+        variant = dict(defaults, **deck)
+        if "output" not in variant:
+            raise ValueError(f"Deck without an output path: {deck}")
+        decks.append(variant)
+    return decks
+
+
+def build_variant(variant, asset_cache, compresslevel=DEFLATE_LEVEL, incremental=False):
+    """Build one deck; runs in a worker process"""
+    source = importlib.import_module(variant.get("source", DEFAULT_SOURCE))
+    slides = select_slides(source.slides, variant.get("slides"))
+    images = variant.get("images", getattr(source, "IMAGES", {}))
+    # Only embed pictures that the selected slides actually show
+    used = {slide.get("image") for slide in slides}
+    images = {key: filename for key, filename in images.items() if key in used}
+    output = variant["output"]
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+
+    log = io.StringIO()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(log):
+        create_odp(slides, images, output, compresslevel=compresslevel,
+                   incremental=incremental, asset_cache=asset_cache)
+    elapsed = time.perf_counter() - start
+    missing = [line for line in log.getvalue().splitlines() if line.startswith("✗")]
+    return output, len(slides), os.path.getsize(output), elapsed, missing
+
+
+def build_all(decks, jobs=None, asset_cache=DEFAULT_CACHE, compresslevel=DEFLATE_LEVEL,
+              incremental=False):
+    """Build every variant on a process pool; returns the number of failures"""
+    failures = 0
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {
+            pool.submit(build_variant, variant, asset_cache, compresslevel, incremental): variant["output"]
+            for variant in decks
+        }
+        for future in as_completed(futures):
+            try:
+                output, count, size, elapsed, missing = future.result()
+            except Exception as exc:
+                failures += 1
+                print(f"✗ {futures[future]}: {exc}")
+                continue
+            print(f"✓ {output}: {count} slides, {size/1024:.1f} KB in {elapsed*1000:.0f} ms")
+            for line in missing:
+                print(f"  {line}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("manifest", help="JSON manifest of deck variants")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="worker processes (default: one per CPU)")
+    parser.add_argument("--cache", default=DEFAULT_CACHE,
+                        help=f"shared compressed-asset cache directory (default: {DEFAULT_CACHE})")
+    parser.add_argument("--level", type=int, default=DEFLATE_LEVEL, help="DEFLATE level for XML members")
+    parser.add_argument("--incremental", action="store_true",
+                        help="reuse unchanged members from existing output decks")
+    args = parser.parse_args()
+
+    decks = load_manifest(args.manifest)
+    start = time.perf_counter()
+    failures = build_all(decks, args.jobs, args.cache, args.level, args.incremental)
+    print(f"\n✓ Built {len(decks) - failures}/{len(decks)} decks in {time.perf_counter() - start:.2f} s")
+    raise SystemExit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,11 +3,18 @@
 Creates an ODP (OpenDocument Presentation) file for the memR project
 Final version with embedded images
 """
+import argparse
 import zipfile
 import os
 import shutil
 from datetime import datetime
 
+from odp_archive import (DEFLATE_LEVEL, add_cached_file, compress_type_for, media_type,
+                         open_previous, picture_members, read_chunks, write_parallel)
+from slide_templates import iter_pages
+from image_prep import prepare_images
+from vector_plots import PLOT_STYLES
+
 # Available images in the project
 IMAGES = {
     'logic_gates': 'lissajous_logic_gates.png',
@@ -272,18 +279,72 @@ slides = [
     }
 ]
 
-def create_odp():
-    """Create proper ODP file structure with images"""
+def iter_slide_pages(slides, pictures, invalid_chars='replace'):
+    """Yield the draw:page XML (UTF-8) for each slide, one page at a time
+
+    `pictures` maps image keys to their archive paths under Pictures/.
+    Slides may be plain dicts or precompiled slide_templates.Slide tuples.
+    """
+    return iter_pages(slides, pictures, invalid_chars)
+
+def create_odp(slides=slides, images=IMAGES, odp_filename="memR_presentation.odp",
+               compresslevel=DEFLATE_LEVEL, incremental=False, workers=None,
+               build_time=None, asset_cache=None, invalid_chars='replace', image_dpi=None,
+               render=False):
+    """Create proper ODP file structure with images
+
+    content.xml is streamed into the archive one draw:page at a time, so
+    peak memory stays flat no matter how many slides the deck has. XML
+    members are deflated at `compresslevel`; pictures are stored or
+    deflated according to their media type.
+
+    With `incremental`, members unchanged since the existing `odp_filename`
+    was built are copied from it without recompression.
+
+    With `workers`, members are deflated on a thread pool of that size; the
+    result is byte-identical to the serial build for any worker count.
+    `build_time` pins the document date and member timestamps for
+    reproducible builds.
+
+    With `asset_cache` (a directory), compressed pictures are taken from
+    and added to that shared cache instead of being compressed per deck.
+
+    Characters that XML 1.0 cannot carry in slide text are replaced with
+    U+FFFD, dropped, or rejected with ValueError for `invalid_chars` of
+    'replace', 'ignore' or 'strict'.
+
+    With `image_dpi`, pictures are first resampled to the picture frame's
+    size at that resolution and recompressed (cached in .image_cache/).
+
+    Slides with a "plot" spec (see vector_plots) get the figure drawn as
+    vector shapes from the arrays themselves, with no picture file.
+
+    With `render`, images that render_figures has a recipe for are
+    produced from the Python simulations (cached in .figure_cache/)
+    instead of being read from Octave's PNGs.
+    """
+    build_time = build_time or datetime.now()
+    date_time = build_time.timetuple()[:6]
+
+    if render:
+        from render_figures import FIGURES, render_figures
+        images = dict(images, **render_figures([key for key in images if key in FIGURES]))
 
     # Check which images exist
     available_images = {}
-    for key, filename in IMAGES.items():
+    for key, filename in images.items():
         if os.path.exists(filename):
             available_images[key] = filename
             print(f"✓ Found image: {filename}")
         else:
             print(f"✗ Missing image: {filename}")
 
+    if image_dpi:
+        available_images = prepare_images(available_images, image_dpi)
+
+    # Identical files share one content-addressed member
+    pictures, picture_sources = picture_members(available_images)
+
     # Create manifest with images
     manifest_files = '''<?xml version="1.0" encoding="UTF-8"?>
 <manifest:manifest xmlns:manifest="urn:oasis:names:tc:opendocument:xmlns:manifest:1.0" manifest:version="1.2">
@@ -294,8 +355,8 @@ def create_odp():
  <manifest:file-entry manifest:full-path="settings.xml" manifest:media-type="text/xml"/>'''
 
     # Add image entries to manifest
-    for key, filename in available_images.items():
-        manifest_files += f'\n <manifest:file-entry manifest:full-path="Pictures/{filename}" manifest:media-type="image/png"/>'
+    for arcname in picture_sources:
+        manifest_files += f'\n <manifest:file-entry manifest:full-path="{arcname}" manifest:media-type="{media_type(arcname)}"/>'
 
     manifest_files += '\n</manifest:manifest>'
 
@@ -308,7 +369,7 @@ def create_odp():
   <meta:generator>Python ODP Generator</meta:generator>
   <dc:title>tec-memR: Memristor Research Project</dc:title>
   <dc:creator>Steve</dc:creator>
-  <dc:date>{datetime.now().isoformat()}</dc:date>
+  <dc:date>{build_time.isoformat()}</dc:date>
  </office:meta>
 </office:document-meta>'''
 
@@ -358,85 +419,76 @@ def create_odp():
   <style:style style:name="dp1" style:family="drawing-page"/>
   <style:style style:name="gr1" style:family="graphic">
    <style:graphic-properties draw:stroke="none" draw:fill="none"/>
-  </style:style>
+  </style:style>''' + PLOT_STYLES + '''
  </office:automatic-styles>
  <office:body>
   <office:presentation>'''
 
-    slides_xml = ""
-    for i, slide in enumerate(slides):
-        title = slide["title"].replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
-        has_image = slide.get("image") and slide["image"] in available_images
-
-        # Adjust content frame size if image is present
-        content_height = "10cm" if has_image else "14cm"
-        content_y = "5.5cm" if has_image else "5.5cm"
-
-        slides_xml += f'''
-   <draw:page draw:name="slide{i+1}" draw:master-page-name="Default" draw:style-name="dp1">
-    <draw:frame presentation:style-name="pr1" draw:layer="layout" svg:width="24cm" svg:height="3cm" svg:x="2cm" svg:y="1.5cm" presentation:class="title">
-     <draw:text-box>
-      <text:p text:style-name="Title">{title}</text:p>
-     </draw:text-box>
-    </draw:frame>
-    <draw:frame presentation:style-name="pr2" draw:layer="layout" svg:width="{"11cm" if has_image else "24cm"}" svg:height="{content_height}" svg:x="2cm" svg:y="{content_y}" presentation:class="outline">
-     <draw:text-box>'''
-
-        for line in slide["content"]:
-            line_escaped = line.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
-            if line_escaped.strip():
-                slides_xml += f'''
-      <text:p text:style-name="Content">{line_escaped}</text:p>'''
-            else:
-                slides_xml += '''
-      <text:p text:style-name="Content"/>'''
-
-        slides_xml += '''
-     </draw:text-box>
-    </draw:frame>'''
-
-        # Add image if available
-        if has_image:
-            img_filename = available_images[slide["image"]]
-            slides_xml += f'''
-    <draw:frame draw:layer="layout" svg:width="12cm" svg:height="10cm" svg:x="14cm" svg:y="5.5cm">
-     <draw:image xlink:href="Pictures/{img_filename}" xlink:type="simple" xlink:show="embed" xlink:actuate="onLoad"/>
-    </draw:frame>'''
-
-        slides_xml += '''
-   </draw:page>'''
-
     content_footer = '''
   </office:presentation>
  </office:body>
 </office:document-content>'''
 
-    content = content_header + slides_xml + content_footer
+    def content_chunks():
+        yield content_header.encode('utf-8')
+        yield from iter_slide_pages(slides, pictures, invalid_chars)
+        yield content_footer.encode('utf-8')
 
-    # Create ODP file
-    odp_filename = "memR_presentation.odp"
+    # Create ODP file (built alongside, then swapped in over the old one)
+    previous = open_previous(odp_filename) if incremental else None
+    build_filename = odp_filename + ".tmp"
+    reused = 0
+    try:
+        with zipfile.ZipFile(build_filename, 'w', zipfile.ZIP_DEFLATED, compresslevel=compresslevel) as odp:
+            # Add mimetype (must be first, uncompressed)
+            odp.writestr(zipfile.ZipInfo('mimetype', date_time), 'application/vnd.oasis.opendocument.presentation',
+                         compress_type=zipfile.ZIP_STORED)
+            xml_members = [('META-INF/manifest.xml', manifest_files), ('meta.xml', meta),
+                           ('styles.xml', styles), ('settings.xml', settings)]
 
-    with zipfile.ZipFile(odp_filename, 'w', zipfile.ZIP_DEFLATED) as odp:
-        # Add mimetype (must be first, uncompressed)
-        odp.writestr('mimetype', 'application/vnd.oasis.opendocument.presentation', compress_type=zipfile.ZIP_STORED)
-        # Add other files
-        odp.writestr('META-INF/manifest.xml', manifest_files)
-        odp.writestr('meta.xml', meta)
-        odp.writestr('styles.xml', styles)
-        odp.writestr('settings.xml', settings)
-        odp.writestr('content.xml', content)
+            # Same block writer with or without a pool, so both give the same bytes;
+            # content.xml is streamed page by page and images copied in chunks
+            members = [(arcname, zipfile.ZIP_DEFLATED, lambda data=data: [data.encode('utf-8')], None)
+                       for arcname, data in xml_members]
+            members.append(('content.xml', zipfile.ZIP_DEFLATED, content_chunks, None))
+            if asset_cache is None:
+                for arcname, (filename, digest) in picture_sources.items():
+                    members.append((arcname, compress_type_for(media_type(filename)),
+                                    lambda filename=filename: read_chunks(filename), digest))
+            reused += write_parallel(odp, members, workers, date_time, previous)
 
-        # Add images
-        for key, filename in available_images.items():
-            with open(filename, 'rb') as img:
-                odp.writestr(f'Pictures/{filename}', img.read())
+            if asset_cache is not None:
+                for arcname, (filename, digest) in picture_sources.items():
+                    reused += add_cached_file(odp, arcname, filename, digest, asset_cache,
+                                              date_time, previous)
+    except BaseException:
+        # Leave the old deck in place and no half-written build beside it
+        if os.path.exists(build_filename):
+            os.remove(build_filename)
+        raise
+    finally:
+        if previous is not None:
+            previous.close()
+    os.replace(build_filename, odp_filename)
 
     print(f"\n✓ Created: {odp_filename}")
     print(f"✓ Total slides: {len(slides)}")
-    print(f"✓ Images embedded: {len(available_images)}")
+    print(f"✓ Images embedded: {len(picture_sources)} unique of {len(available_images)}")
+    if incremental:
+        print(f"✓ Members reused from previous build: {reused}")
     file_size = os.path.getsize(odp_filename)
     print(f"✓ File size: {file_size/1024:.1f} KB")
     return odp_filename
 
 if __name__ == "__main__":
-    create_odp()
+    parser = argparse.ArgumentParser(description="Create the memR ODP presentation")
+    parser.add_argument("--incremental", action="store_true",
+                        help="reuse unchanged members of the existing deck")
+    parser.add_argument("--workers", type=int, help="compress members on this many threads")
+    parser.add_argument("--image-dpi", type=int,
+                        help="downscale pictures to their frame size at this DPI")
+    parser.add_argument("--render", action="store_true",
+                        help="render figures from the Python simulations instead of Octave PNGs")
+    args = parser.parse_args()
+    create_odp(incremental=args.incremental, workers=args.workers, image_dpi=args.image_dpi,
+               render=args.render)
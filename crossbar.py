@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Memristor crossbar array: batched reads with optional IR drop
+An N x M array as on the "Memristor Crossbar Architecture" slide and in
+memristor_interface.asm: input voltages drive the rows from the left,
+each column is summed into a virtual-ground sense amplifier at the
+bottom, and every junction is a memristor whose resistance follows the
+linear-drift model, R = R_ON * x + R_OFF * (1 - x), with x = w/D.
+
+With ideal wires a read is one matrix product, I = G^T V, for any number
+of input vectors at once. With wire resistance (r_row, r_col ohms per
+segment between junctions) the row and column node voltages solve a
+sparse nodal system A v = b. A depends only on the array state, so its
+factorization is computed once and reused across input vectors until
+the state changes:
+
+    direct     sparse LU of A (small and medium arrays)
+    iterative  the row nodes are eliminated through the tridiagonal
+               factors of the row wires, and conjugate gradients solve
+               the remaining column-node system, preconditioned by the
+               column wires' factors; both are reused by every vector
+               and iteration (scales to 1024 x 1024)
+
+If only one wire direction has resistance, the system decouples into
+independent chains and is solved exactly from their factors.
+"""
+import numpy as np
+import scipy.sparse as sp
+import scipy.sparse.linalg as sla
+
+from memristor_sim import DEFAULTS
+
+R_WIRE = 1.0                 # Ohms per wire segment between junctions
+DIRECT_MAX_NODES = 1 << 18   # larger coupled systems use the iterative solver
+CG_TOLERANCE = 1e-10
+CG_MAX_ITER = 2000
+METHODS = ("auto", "direct", "iterative")
+
+
+class ChainFactor:
+    """Thomas factors of independent symmetric tridiagonal chains
+
+    `diag` is (L, K): K chains of length L along axis 0; `off` is the
+    (L-1, K) off-diagonal. solve() takes right-hand sides shaped (L, K, B).
+    """
+
+    def __init__(self, diag, off):
+        self.off = off
+        self.denom = np.empty_like(diag)
+        self.mult = np.empty_like(off)
+        self.denom[0] = diag[0]
+        for k in range(1, diag.shape[0]):
+            self.mult[k - 1] = off[k - 1] / self.denom[k - 1]
+            self.denom[k] = diag[k] - self.mult[k - 1] * off[k - 1]
+
+    def solve(self, rhs, out=None):
+        mult, denom, off = self.mult[..., None], self.denom[..., None], self.off[..., None]
+        if out is None:
+            x = np.array(rhs, dtype=float, order='C')
+        else:
+            x = out
+            np.copyto(x, rhs)
+        for k in range(1, len(x)):
+            x[k] -= mult[k - 1] * x[k - 1]
+        x[-1] /= denom[-1]
+        for k in range(len(x) - 2, -1, -1):
+            x[k] -= off[k] * x[k + 1]
+            x[k] /= denom[k]
+        return x
+
+
+class Crossbar:
+    """N x M memristor array read by driving rows and sensing columns
+
+    `state` is the (N, M) array of normalised states x = w/D in [0, 1].
+    R_ON / R_OFF default to those of SIMULATE_MEMRISTOR.m.
+    """
+
+    def __init__(self, state, R_ON=DEFAULTS["R_ON"], R_OFF=DEFAULTS["R_OFF"], r_row=0.0, r_col=0.0,
+                 method="auto"):
+        if R_ON <= 0 or R_OFF <= 0:
+            raise ValueError("R_ON and R_OFF must be > 0.")
+        if r_row < 0 or r_col < 0:
+            raise ValueError("Wire resistances must be >= 0.")
+        if method not in METHODS:
+            raise ValueError(f"method must be one of {METHODS}")
+        self.R_ON, self.R_OFF = float(R_ON), float(R_OFF)
+        self.r_row, self.r_col = float(r_row), float(r_col)
+        self.method = method
+        self.iterations = 0
+        self.set_state(state)
+
+    @property
+    def shape(self):
+        return self.state.shape
+
+    @property
+    def ideal(self):
+        return self.r_row == 0 and self.r_col == 0
+
+    def set_state(self, state):
+        """Replace the array state; the next IR-drop read refactorizes"""
+        state = np.asarray(state, dtype=float)
+        if state.ndim != 2:
+            raise ValueError("state must be an (N, M) array")
+        if np.any(state < 0) or np.any(state > 1):
+            raise ValueError("state (w/D) must lie in [0, 1]")
+        self.state = state
+        self.G = 1.0 / (self.R_ON * state + self.R_OFF * (1 - state))
+        self._factor = None
+
+    def program(self, rows, cols, state):
+        """Set individual cells (as after SET/RESET pulses)"""
+        updated = self.state.copy()
+        updated[rows, cols] = state
+        self.set_state(updated)
+
+    # -- nodal system ---------------------------------------------------
+
+    def _chain_diagonals(self):
+        n, m = self.shape
+        g_row = 1 / self.r_row if self.r_row else 0.0
+        g_col = 1 / self.r_col if self.r_col else 0.0
+        # Row node (i, j): driver or left neighbour, right neighbour unless last, the cell
+        row_diag = self.G + g_row
+        row_diag[:, :-1] += g_row
+        # Column node (i, j): upper neighbour unless first, lower neighbour or the sense amp
+        col_diag = self.G + g_col
+        col_diag[1:, :] += g_col
+        return g_row, g_col, row_diag, col_diag
+
+    def system(self):
+        """Sparse nodal matrix A
+
+        Unknowns are the row nodes, numbered j*N + i so that each row wire
+        is contiguous, then the column nodes, numbered N*M + i*M + j.
+        """
+        n, m = self.shape
+        cells = n * m
+        g_row, g_col, row_diag, col_diag = self._chain_diagonals()
+        row_node = np.arange(cells).reshape(m, n).T
+        col_node = cells + np.arange(cells).reshape(n, m)
+        left, right = row_node[:, :-1].ravel(), row_node[:, 1:].ravel()
+        up, down = col_node[:-1, :].ravel(), col_node[1:, :].ravel()
+        g = self.G.ravel()
+        rows = np.concatenate((row_node.ravel(), col_node.ravel(), row_node.ravel(), col_node.ravel(),
+                               left, right, up, down))
+        cols = np.concatenate((row_node.ravel(), col_node.ravel(), col_node.ravel(), row_node.ravel(),
+                               right, left, down, up))
+        vals = np.concatenate((row_diag.ravel(), col_diag.ravel(), -g, -g,
+                               np.full(2 * len(left), -g_row), np.full(2 * len(up), -g_col)))
+        return sp.csr_matrix((vals, (rows, cols)), shape=(2 * cells, 2 * cells))
+
+    def _solver(self):
+        if self.method != "auto":
+            return self.method
+        return "direct" if 2 * self.state.size <= DIRECT_MAX_NODES else "iterative"
+
+    def factorize(self):
+        """Factorize the nodal system for the current state (done lazily by read())"""
+        g_row, g_col, row_diag, col_diag = self._chain_diagonals()
+        n, m = self.shape
+        factor = {"g_row": g_row, "g_col": g_col}
+        if self.r_col == 0:
+            # Columns held at virtual ground: independent row chains
+            factor["rows"] = ChainFactor(row_diag.T.copy(), np.full((m - 1, n), -g_row))
+        elif self.r_row == 0:
+            # Rows held at the drive voltage: independent column chains
+            factor["cols"] = ChainFactor(col_diag, np.full((n - 1, m), -g_col))
+        elif self._solver() == "direct":
+            factor["lu"] = sla.splu(self.system().tocsc(), permc_spec="MMD_AT_PLUS_A")
+        else:
+            factor["rows"] = ChainFactor(row_diag.T.copy(), np.full((m - 1, n), -g_row))
+            factor["cols"] = ChainFactor(col_diag, np.full((n - 1, m), -g_col))
+            factor["col_diag"] = col_diag[..., None]
+        self._factor = factor
+        return factor
+
+    def _row_solve(self, rhs):
+        """Row-wire block of A solved for (N, M, B) right-hand sides"""
+        return self._factor["rows"].solve(rhs.transpose(1, 0, 2)).transpose(1, 0, 2)
+
+    def _schur(self, p, out):
+        """out = S p, S = A_cc - G A_rr^-1 G: A with the row nodes eliminated"""
+        f = self._factor
+        g = self.G[..., None]
+        np.multiply(f["col_diag"], p, out=out)
+        out[1:] -= f["g_col"] * p[:-1]
+        out[:-1] -= f["g_col"] * p[1:]
+        out -= g * self._row_solve(g * p)
+        return out
+
+    def _cg(self, b, tol=CG_TOLERANCE, maxiter=CG_MAX_ITER):
+        """Conjugate gradients on S vc = b, preconditioned by the column chains
+
+        Vectorised over the last axis of the (N, M, B) right-hand side.
+        """
+        def dot(a, c):
+            return np.einsum('ijb,ijb->b', a, c)
+
+        cols = self._factor["cols"]
+        x = np.zeros_like(b)
+        r = b.copy()
+        z = cols.solve(r)
+        p = z.copy()
+        sp_ = np.empty_like(b)
+        rz = dot(r, z)
+        limit = tol * tol * dot(b, b)
+        for k in range(1, maxiter + 1):
+            self._schur(p, sp_)
+            alpha = rz / dot(p, sp_)
+            x += alpha * p
+            r -= alpha * sp_
+            if np.all(dot(r, r) <= limit):
+                self.iterations = k
+                return x
+            cols.solve(r, out=z)
+            rz_next = dot(r, z)
+            p *= rz_next / rz
+            p += z
+            rz = rz_next
+        raise RuntimeError(f"IR-drop solve did not converge in {maxiter} iterations")
+
+    def node_voltages(self, voltages):
+        """Row and column node voltages, each (N, M, B), for (N, B) inputs"""
+        n, m = self.shape
+        cells = n * m
+        v = np.asarray(voltages, dtype=float).reshape(n, -1)
+        batch = v.shape[1]
+        if self.ideal:
+            return np.broadcast_to(v[:, None, :], (n, m, batch)), np.zeros((n, m, batch))
+        f = self._factor or self.factorize()
+        if "lu" in f:
+            b = np.zeros((2 * cells, batch))
+            b[:n] = f["g_row"] * v             # row nodes j = 0, next to the drivers
+            x = f["lu"].solve(b)
+            return x[:cells].reshape(m, n, batch).transpose(1, 0, 2), x[cells:].reshape(n, m, batch)
+        drive = np.zeros((n, m, batch))
+        drive[:, 0] = f["g_row"] * v
+        if "cols" not in f:
+            return self._row_solve(drive), np.zeros((n, m, batch))
+        if "rows" not in f:
+            vr = np.broadcast_to(v[:, None, :], (n, m, batch))
+            return vr, f["cols"].solve(self.G[..., None] * vr)
+        # Coupled: solve the Schur system for the column nodes, then back-substitute
+        g = self.G[..., None]
+        vc = self._cg(g * self._row_solve(drive))
+        return self._row_solve(drive + g * vc), vc
+
+    def read(self, voltages):
+        """Column currents for row voltages (N,) or a batch (N, B)"""
+        v = np.asarray(voltages, dtype=float)
+        if v.shape[0] != self.shape[0]:
+            raise ValueError(f"Expected {self.shape[0]} row voltages, got {v.shape[0]}")
+        if self.ideal:
+            return self.G.T @ v
+        vr, vc = self.node_voltages(v)
+        if self.r_col == 0:
+            currents = np.einsum('ij,ijb->jb', self.G, vr)
+        else:
+            currents = self._factor["g_col"] * vc[-1]
+        return currents if v.ndim == 2 else currents[:, 0]
+
+
+def random_state(n, m, seed=0):
+    """Uniformly random normalised states for an n x m array"""
+    return np.random.default_rng(seed).uniform(0.0, 1.0, (n, m))
+
+
+if __name__ == "__main__":
+    # 4x4 array as in memristor_interface.asm, read at 0.2 V per row
+    xbar = Crossbar(random_state(4, 4), r_row=R_WIRE, r_col=R_WIRE)
+    v = np.full(4, 0.2)
+    ideal = Crossbar(xbar.state).read(v)
+    actual = xbar.read(v)
+    print("Column currents (ideal):   ", " ".join(f"{i * 1e3:8.4f}" for i in ideal), "mA")
+    print("Column currents (IR drop): ", " ".join(f"{i * 1e3:8.4f}" for i in actual), "mA")
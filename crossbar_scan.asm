@@ -0,0 +1,42 @@
+; Z80 full-array scan for the memristor crossbar module
+; Same ports as memristor_interface.asm; reads every cell's ADC value
+; into SCAN_BUFFER, row by row (buffer index = row * cols + col)
+MUX_PORT    EQU 0x10    ; Mux select: bits 0-3 row, 4-7 col
+ADC_PORT    EQU 0x12    ; ADC read: 0-255 (low=high R, high=low R)
+
+ORG 0x9000
+
+; Scan: array size in SCAN_ROWS / SCAN_COLS (1-16 each)
+SCAN_ARRAY:
+    LD A, (SCAN_ROWS)
+    LD D, A             ; D = rows
+    LD A, (SCAN_COLS)
+    LD E, A             ; E = cols
+    LD HL, SCAN_BUFFER
+    LD B, 0             ; Row
+SCAN_ROW:
+    LD C, 0             ; Col
+SCAN_COL:
+    LD A, C             ; Col to high nibble
+    RLCA
+    RLCA
+    RLCA
+    RLCA
+    OR B                ; Combine row|col
+    OUT (MUX_PORT), A   ; Select cell
+    IN A, (ADC_PORT)    ; Read ADC
+    LD (HL), A          ; Store reading
+    INC HL
+    INC C
+    LD A, C
+    CP E
+    JR NZ, SCAN_COL
+    INC B
+    LD A, B
+    CP D
+    JR NZ, SCAN_ROW
+    RET
+
+SCAN_ROWS:   DB 4
+SCAN_COLS:   DB 4
+SCAN_BUFFER: DS 256     ; Up to 16x16 readings
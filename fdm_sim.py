@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Frequency-division multiplexing of phase-coded neurons on one wire
+The scheme of lissajous_hardware_design.m PART 1, scaled up: neuron k
+sums its two phase-shifted inputs on its own carrier,
+
+    s_k(t) = A_k sin(2 pi f_k t + phi_A) + B_k sin(2 pi f_k t + phi_B)
+           = Im(c_k exp(2 pi i f_k t)),  c_k = A_k e^(i phi_A) + B_k e^(i phi_B)
+
+all carriers share one wire, and the receiver recovers every c_k from
+fixed-length readout windows, either with one batched FFT per window
+or with batched Goertzel filters at the exact carrier frequencies.
+
+Carriers sit on an integer-Hz grid, so the noiseless wire signal is
+periodic; one period is synthesised with an inverse FFT and streamed in
+blocks, with noise, amplifier nonlinearity and ADC quantization applied
+per block. Every few carriers are left dark so their recovered power
+measures crosstalk. Memory is bounded by the block size, however long
+the capture.
+
+scaling_curve() fixes the bandwidth and readout window and raises the
+carrier count, which is how the "Scaling Analysis: Frequency
+Multiplexing" slide's neurons-per-bandwidth figures can be checked;
+scaling_slide() renders the measured curve as a slide.
+"""
+import math
+import os
+import time
+
+import numpy as np
+
+try:
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+except ImportError:
+    plt = None
+
+SAMPLE_RATE = 250_000          # Hz: comfortably above 2 x the 100 kHz audio band
+BANDWIDTH = 100_000            # Hz ("Analog (audio) | 100 kHz" on the scaling slide)
+WINDOW = 0.01                  # s readout window per neuron output
+ADC_BITS = 12
+CLIP_SIGMAS = 4.0              # ADC full scale as a multiple of the signal rms
+DARK_EVERY = 8                 # every 8th carrier carries no data (crosstalk probe)
+BLOCK_WINDOWS = 16             # readout windows per streamed block
+MAX_PERIOD = 1 << 24
+METHODS = ("fft", "goertzel")
+
+
+def carrier_plan(count, spacing, fs=SAMPLE_RATE, f0=None):
+    """Carrier frequencies f0 + k * spacing (integer Hz), checked against Nyquist"""
+    f0 = spacing if f0 is None else f0
+    freqs = f0 + spacing * np.arange(count, dtype=np.int64)
+    if spacing < 1 or f0 < 1:
+        raise ValueError("Carrier spacing and f0 must be at least 1 Hz")
+    if freqs[-1] >= fs / 2:
+        raise ValueError(f"{count} carriers at {spacing} Hz spacing reach {freqs[-1]} Hz, "
+                         f"above the Nyquist limit of {fs / 2:g} Hz")
+    return freqs
+
+
+def neuron_phasors(count, seed=0, dark_every=DARK_EVERY):
+    """Random two-input neurons: binary inputs, random learned phases
+
+    Carriers with index % dark_every == 0 are forced to zero; they carry
+    no data and are used to measure crosstalk.
+    """
+    rng = np.random.default_rng(seed)
+    a, b = rng.integers(0, 2, (2, count))
+    phase_a, phase_b = rng.uniform(-math.pi, math.pi, (2, count))
+    c = a * np.exp(1j * phase_a) + b * np.exp(1j * phase_b)
+    # Make sure every data carrier is actually lit
+    c = np.where(np.abs(c) < 0.25, np.exp(1j * phase_a), c)
+    if dark_every:
+        c[::dark_every] = 0
+    return c
+
+
+class Wire:
+    """Streamed samples of the multiplexed wire signal
+
+    Impairments: additive white noise (noise_rms, V), a cubic amplifier
+    term y = x + k3 * x^3 / full_scale^2, and an adc_bits quantizer whose
+    full scale is CLIP_SIGMAS times the signal rms (clipping beyond it).
+    """
+
+    def __init__(self, freqs, phasors, fs=SAMPLE_RATE, noise_rms=0.0, k3=0.0, adc_bits=ADC_BITS,
+                 seed=0):
+        freqs = np.asarray(freqs, dtype=np.int64)
+        fs = int(fs)
+        period = fs // math.gcd(fs, *map(int, np.unique(freqs)))
+        if period > MAX_PERIOD:
+            raise ValueError(f"Carrier grid needs a {period}-sample period; use integer-Hz "
+                             f"carriers with a coarser common divisor")
+        self.fs, self.freqs, self.period = fs, freqs, period
+        spectrum = np.zeros(period // 2 + 1, dtype=complex)
+        # x[n] = Im(c e^(i w n)) = Re(-i c e^(i w n)) <-> bin value -i c N / 2
+        np.add.at(spectrum, freqs * period // fs, -1j * np.asarray(phasors) * period / 2)
+        self.wave = np.fft.irfft(spectrum, period)
+        self.rms = float(np.sqrt(np.mean(self.wave ** 2))) or 1.0
+        self.full_scale = CLIP_SIGMAS * self.rms
+        self.noise_rms, self.k3, self.adc_bits, self.seed = noise_rms, k3, adc_bits, seed
+
+    def block(self, start, length, index=0):
+        """`length` samples starting at sample `start`"""
+        offsets = (start + np.arange(length)) % self.period
+        x = self.wave[offsets]
+        if self.k3:
+            x = x + self.k3 * x ** 3 / self.full_scale ** 2
+        if self.noise_rms:
+            x = x + np.random.default_rng((self.seed, index)).normal(0, self.noise_rms, length)
+        if self.adc_bits:
+            step = 2 * self.full_scale / 2 ** self.adc_bits
+            x = np.clip(np.round(x / step), -2 ** (self.adc_bits - 1), 2 ** (self.adc_bits - 1) - 1) * step
+        return x
+
+    def blocks(self, n_samples, block):
+        """Yield (start, samples) blocks covering n_samples"""
+        for index, start in enumerate(range(0, n_samples, block)):
+            yield start, self.block(start, min(block, n_samples - start), index)
+
+
+def demux_fft(frames, freqs, fs):
+    """Phasors (frames, K) from one batched real FFT per readout frame
+
+    Each carrier is read from its nearest bin; carriers off the bin grid
+    leak into their neighbours, which shows up as crosstalk.
+    """
+    n = frames.shape[-1]
+    spectrum = np.fft.rfft(frames, axis=-1)
+    bins = np.rint(np.asarray(freqs) * n / fs).astype(np.int64)
+    return 2j * spectrum[..., bins] / n
+
+
+def demux_goertzel(frames, freqs, fs):
+    """Phasors (frames, K) from Goertzel filters at the exact carrier frequencies
+
+    The recurrence runs once over the frame length, vectorised over all
+    frames and carriers together.
+    """
+    frames = np.asarray(frames, dtype=float)
+    n = frames.shape[-1]
+    w = 2 * math.pi * np.asarray(freqs, dtype=float) / fs
+    coeff = 2 * np.cos(w)
+    s1 = np.zeros((frames.shape[0], len(w)))
+    s2 = np.zeros_like(s1)
+    for x in frames.T:
+        s0 = x[:, None] + coeff * s1 - s2
+        s2 = s1
+        s1 = s0
+    # y = s1 - e^(-iw) s2 equals e^(iw(n-1)) X(w)
+    dft = np.exp(-1j * w * (n - 1)) * (s1 - np.exp(-1j * w) * s2)
+    return 2j * dft / n
+
+
+def measure(freqs, phasors, fs=SAMPLE_RATE, duration=1.0, window=WINDOW, method="fft",
+            block_windows=BLOCK_WINDOWS, **impairments):
+    """Stream a capture through the demultiplexer and score every window
+
+    Returns crosstalk (mean recovered power of dark carriers relative to
+    lit ones, dB), the rms phasor error of lit carriers relative to their
+    amplitude (EVM), rms phase error in degrees, and throughput.
+    """
+    if method not in METHODS:
+        raise ValueError(f"method must be one of {METHODS}")
+    demux = demux_fft if method == "fft" else demux_goertzel
+    phasors = np.asarray(phasors)
+    wire = Wire(freqs, phasors, fs, **impairments)
+    frame = int(round(window * fs))
+    n_frames = max(1, int(duration * fs) // frame)
+    dark = phasors == 0
+    lit = ~dark
+    w = 2 * math.pi * np.asarray(freqs, dtype=float) / fs
+    err2 = dark_power = phase2 = 0.0
+    lit_power = float(np.sum(np.abs(phasors[lit]) ** 2))
+    synth_s = demux_s = 0.0
+    for first in range(0, n_frames, block_windows):
+        count = min(block_windows, n_frames - first)
+        start = time.perf_counter()
+        samples = wire.block(first * frame, count * frame, first)
+        synth_s += time.perf_counter() - start
+        start = time.perf_counter()
+        got = demux(samples.reshape(count, frame), freqs, fs)
+        demux_s += time.perf_counter() - start
+        # Undo each frame's carrier phase advance since t = 0
+        got *= np.exp(-1j * np.outer(np.arange(first, first + count) * frame, w))
+        err2 += float(np.sum(np.abs(got[:, lit] - phasors[lit]) ** 2))
+        dark_power += float(np.sum(np.abs(got[:, dark]) ** 2))
+        phase2 += float(np.sum(np.angle(got[:, lit] / phasors[lit]) ** 2))
+    n_lit, n_dark = int(lit.sum()), int(dark.sum())
+    samples = n_frames * frame
+    mean_lit = lit_power / max(n_lit, 1)
+    return {
+        "carriers": len(phasors),
+        "crosstalk_db": 10 * math.log10(max(dark_power / (n_frames * max(n_dark, 1)), 1e-30) / mean_lit)
+        if n_dark else float('nan'),
+        "evm": math.sqrt(err2 / (n_frames * lit_power)) if n_lit else float('nan'),
+        "phase_deg": math.degrees(math.sqrt(phase2 / (n_frames * max(n_lit, 1)))),
+        "samples": samples,
+        "synth_rate": samples / synth_s if synth_s else float('inf'),
+        "demux_rate": samples / demux_s if demux_s else float('inf'),
+        "realtime": samples / demux_s / fs if demux_s else float('inf'),
+    }
+
+
+def scaling_curve(counts, bandwidth=BANDWIDTH, fs=SAMPLE_RATE, window=WINDOW, duration=0.2,
+                  method="fft", seed=0, **impairments):
+    """measure() for each carrier count, spread evenly over a fixed bandwidth
+
+    The spacing is rounded down to a multiple of the readout resolution
+    1/window while the band allows it, so carriers sit on FFT bins; past
+    max_neurons() they cannot, and crosstalk rises.
+    """
+    resolution = max(1, int(round(1 / window)))
+    rows = []
+    for count in counts:
+        spacing = max(1, bandwidth // count)
+        if spacing >= resolution:
+            spacing -= spacing % resolution
+        freqs = carrier_plan(count, spacing, fs)
+        row = measure(freqs, neuron_phasors(count, seed), fs, duration, window, method, **impairments)
+        row["spacing"] = spacing
+        rows.append(row)
+    return rows
+
+
+def max_neurons(bandwidth, window):
+    """Carriers resolvable in `bandwidth` by a `window`-long readout (spacing >= 1/window)"""
+    return int(bandwidth * window)
+
+
+def plot_scaling(rows, path, title="FDM scaling (measured)"):
+    """Crosstalk and EVM against carrier count as a PNG; None without matplotlib"""
+    if plt is None:
+        print("✗ matplotlib not installed: scaling slide will have no figure")
+        return None
+    counts = [row["carriers"] for row in rows]
+    fig, ax = plt.subplots(figsize=(8, 5))
+    ax.semilogx(counts, [row["crosstalk_db"] for row in rows], "o-", color="tab:red", label="Crosstalk")
+    ax.set_xlabel("Carriers (neurons) on one wire")
+    ax.set_ylabel("Crosstalk (dB)", color="tab:red")
+    ax.grid(True, which="both", alpha=0.3)
+    evm_ax = ax.twinx()
+    evm_ax.loglog(counts, [max(row["evm"], 1e-6) for row in rows], "s--", color="tab:blue", label="EVM")
+    evm_ax.set_ylabel("EVM (rms error / amplitude)", color="tab:blue")
+    ax.set_title(title)
+    fig.tight_layout()
+    fig.savefig(path, dpi=150)
+    plt.close(fig)
+    return path
+
+
+def scaling_slide(rows, bandwidth=BANDWIDTH, fs=SAMPLE_RATE, window=WINDOW, image=None,
+                  title="Scaling Analysis: Measured FDM Crosstalk"):
+    """Slide dict tabulating a scaling_curve(), ready for create_odp()"""
+    content = [
+        f"Bandwidth {bandwidth / 1e3:g} kHz, fs {fs / 1e3:g} kS/s, readout {window * 1e3:g} ms "
+        f"(resolves up to {max_neurons(bandwidth, window):,} carriers)",
+        "Carriers | Spacing | Crosstalk | EVM     | Real-time",
+    ]
+    for row in rows:
+        content.append(f"{row['carriers']:>8,} | {row['spacing']:>5} Hz | {row['crosstalk_db']:>6.1f} dB | "
+                       f"{row['evm']:>7.1e} | {row['realtime']:>6.1f}x")
+    return {"title": title, "content": content, "image": image}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--counts", default="4,16,64,256,1000,2000,4000",
+                        help="comma-separated carrier counts (default: 4..4000)")
+    parser.add_argument("--bandwidth", type=int, default=BANDWIDTH)
+    parser.add_argument("--fs", type=int, default=SAMPLE_RATE)
+    parser.add_argument("--window", type=float, default=WINDOW, help="readout window in s")
+    parser.add_argument("--duration", type=float, default=0.2, help="capture length in s")
+    parser.add_argument("--method", choices=METHODS, default="fft")
+    parser.add_argument("--adc-bits", type=int, default=ADC_BITS)
+    parser.add_argument("--noise", type=float, default=0.0, help="noise rms in V")
+    parser.add_argument("--deck", help="write the measured curve as an ODP slide")
+    args = parser.parse_args()
+
+    rows = scaling_curve([int(c) for c in args.counts.split(",")], args.bandwidth, args.fs, args.window,
+                         args.duration, args.method, adc_bits=args.adc_bits, noise_rms=args.noise)
+    slide = scaling_slide(rows, args.bandwidth, args.fs, args.window)
+    print(slide["title"])
+    for line in slide["content"]:
+        print("  " + line)
+    if args.deck:
+        from create_presentation_final import create_odp
+        figure = plot_scaling(rows, os.path.splitext(args.deck)[0] + "_fdm.png")
+        slide["image"] = "fdm_scaling" if figure else None
+        create_odp([slide], {"fdm_scaling": figure} if figure else {}, args.deck)
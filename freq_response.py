@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Batched frequency response of the memristor, H(w) = I(w)/V(w)
+memristor_lissajous_transfer_function.m derives the characteristic
+frequency and a complex impedance Z = R(w) + jX(w) for one operating
+point. Here H is evaluated over whole frequency x state x parameter
+grids at once: every argument broadcasts, so f[:, None] against
+state[None, :] gives a (frequencies, states) response.
+
+Two models are provided. script_response() is the Octave formula,
+X = R * w/w0 with w0 = 1/(MU_V R_ON D). drift_response() is the periodic
+steady state of the linear-drift device that memristor_sim simulates.
+Under V0 sin(wt) its memristance obeys M^2 = R(w0)^2 - 2k * flux, with
+k = (R_OFF - R_ON) MU_V R_ON / D^2, until w reaches 0 or D. Stepping M^2
+in flux, clipped to [R_ON^2, R_OFF^2], is exact between samples, so one
+period at PERIOD_SAMPLES points per grid point plus a short rfft gives
+the fundamental admittance and the harmonics for every point together.
+
+simulated_response() cross-checks drift_response() against time-domain
+runs of memristor_sim.simulate_batch, reading the fundamental and
+harmonics of one period with Goertzel filters. bode()/nyquist() give
+plot data, and bode_plots()/nyquist_plot() give plot specs the deck
+builder draws as vector plots.
+"""
+import math
+import time
+
+import numpy as np
+
+from fdm_sim import demux_goertzel
+from memristor_sim import DEFAULTS, simulate_batch, sine_input
+
+# Operating point of memristor_lissajous_transfer_function.m
+STATE = 0.5                    # w/D
+AMPLITUDE = 1.0                # V0 (V)
+HARMONICS = 5                  # fundamental + 4 harmonics
+PERIOD_SAMPLES = 64            # samples per period in drift_response()
+SETTLE_PERIODS = 1             # periods run before the recorded one (the first clamp settles the loop)
+BLOCK = 1 << 16                # grid points per block (bounds memory at large grids)
+STEPS_PER_PERIOD = 20000       # time steps per period in simulated_response() (Euler error ~ 1/steps)
+
+
+def _parameters(params):
+    p = dict(DEFAULTS, **(params or {}))
+    return tuple(np.asarray(p[k], dtype=float) for k in ("R_ON", "R_OFF", "D", "MU_V"))
+
+
+def resistance(state, params=None):
+    """R(w) = R_ON w/D + R_OFF (1 - w/D) at state = w/D"""
+    R_ON, R_OFF, _, _ = _parameters(params)
+    return R_ON * state + R_OFF * (1 - np.asarray(state, dtype=float))
+
+
+def characteristic_frequency(params=None):
+    """The script's f0 = w0/(2 pi), w0 = 1/(MU_V R_ON D), in Hz"""
+    R_ON, _, D, MU_V = _parameters(params)
+    return 1 / (MU_V * R_ON * D) / (2 * math.pi)
+
+
+def switching_frequency(amplitude=AMPLITUDE, params=None):
+    """Frequency (Hz) below which the drift model switches fully every cycle
+
+    A half cycle carries flux 2 V0/w, which moves M^2 by 4 k V0/w. Below
+    this frequency that exceeds R_OFF^2 - R_ON^2: the steady-state loop
+    dwells at both R_ON and R_OFF, whatever the initial state, and the
+    fundamental lags the voltage. Above it the loop stays pinched and
+    the fundamental is in phase.
+    """
+    R_ON, R_OFF, D, MU_V = _parameters(params)
+    k = (R_OFF - R_ON) * MU_V * R_ON / D ** 2
+    return 4 * k * np.asarray(amplitude, dtype=float) / (R_OFF ** 2 - R_ON ** 2) / (2 * math.pi)
+
+
+def script_response(f, state=STATE, params=None):
+    """H = 1/Z with Z = R(w) (1 + j w/w0), as in the Octave script (Siemens)"""
+    f0 = characteristic_frequency(params)
+    return 1 / (resistance(state, params) * (1 + 1j * np.asarray(f, dtype=float) / f0))
+
+
+def drift_response(f, state=STATE, amplitude=AMPLITUDE, params=None, harmonics=HARMONICS,
+                   samples=PERIOD_SAMPLES, settle=SETTLE_PERIODS, block=BLOCK):
+    """Steady-state I_k/V_1 of the linear-drift memristor (Siemens)
+
+    f, state, amplitude and the params entries broadcast to the grid
+    shape G; the result is complex (*G, harmonics), index 0 being the
+    fundamental admittance. Phasors follow the sine convention:
+    A sin(wt + phi) is A e^(j phi).
+    """
+    if samples < 2 * harmonics + 1:
+        raise ValueError("samples must exceed twice the number of harmonics")
+    R_ON, R_OFF, D, MU_V = _parameters(params)
+    f, state, amplitude, R_ON, R_OFF, D, MU_V = np.broadcast_arrays(
+        *(np.asarray(a, dtype=float) for a in (f, state, amplitude, R_ON, R_OFF, D, MU_V)))
+    if np.any(f <= 0):
+        raise ValueError("Frequencies must be > 0.")
+    shape = f.shape
+    f, state, amplitude, R_ON, R_OFF, D, MU_V = (a.ravel() for a in (f, state, amplitude, R_ON, R_OFF, D, MU_V))
+
+    theta = 2 * math.pi * np.arange(samples + 1) / samples
+    dcos = np.diff(-np.cos(theta))                   # flux per step, in units of V0/w
+    k = np.arange(1, harmonics + 1)[:, None]
+    out = np.empty((f.size, harmonics), dtype=complex)
+    charge = np.empty((samples, min(block, f.size)))
+    for start in range(0, f.size, block):
+        part = slice(start, min(start + block, f.size))
+        lo, hi = R_ON[part] ** 2, R_OFF[part] ** 2
+        m2 = (R_ON[part] * state[part] + R_OFF[part] * (1 - state[part])) ** 2
+        # dM^2 = -2k dflux, with flux in V0/w units folded into the gain
+        gain = 2 * (R_OFF[part] - R_ON[part]) * MU_V[part] * R_ON[part] / D[part] ** 2 \
+            * amplitude[part] / (2 * math.pi * f[part])
+        for n in range(settle * samples):
+            m2 -= gain * dcos[n % samples]
+            np.clip(m2, lo, hi, out=m2)
+        # Record the charge, per volt of V0, in the last period. Over the
+        # flux that moves the state it is -2 dM/gain; over flux clipped at
+        # a bound the current is V/M at that bound.
+        q = charge[:, :m2.size]
+        total = np.zeros(m2.size)
+        m_old = np.sqrt(m2)
+        for n in range(samples):
+            q[n] = total
+            unclipped = m2 - gain * dcos[n]
+            np.clip(unclipped, lo, hi, out=m2)
+            m_new = np.sqrt(m2)
+            clipped = (m2 - unclipped) / gain
+            total += 2 * (dcos[n] - clipped) / (m_old + m_new) + clipped / m_new
+            m_old = m_new
+        # Charge is smoother than current (fewer aliased harmonics); remove
+        # the net charge per period, then I_k = jk Q_k
+        q -= total * (theta[:-1, None] / (2 * math.pi))
+        spectrum = np.fft.rfft(q, axis=0)[1:harmonics + 1]
+        # 2j X_k / S is the sine phasor of a sampled sinusoid
+        out[part] = (2j * (1j * k) * spectrum / samples).T
+    return out.reshape(shape + (harmonics,))
+
+
+def simulated_response(frequencies, state=STATE, amplitude=AMPLITUDE, params=None, harmonics=HARMONICS,
+                       steps_per_period=STEPS_PER_PERIOD, cycles=SETTLE_PERIODS + 1):
+    """I_k/V_1 from memristor_sim runs, by Goertzel filters over the last period
+
+    One batched simulation per frequency; state, amplitude and params
+    broadcast across the devices of that batch. Returns complex
+    (frequencies, devices, harmonics).
+    """
+    R_ON, R_OFF, D, MU_V = _parameters(params)
+    state, amplitude, R_ON, R_OFF, D, MU_V = np.broadcast_arrays(
+        *(np.atleast_1d(np.asarray(a, dtype=float)) for a in (state, amplitude, R_ON, R_OFF, D, MU_V)))
+    frequencies = np.atleast_1d(np.asarray(frequencies, dtype=float))
+    out = np.empty((len(frequencies), state.size, harmonics), dtype=complex)
+    for index, f in enumerate(frequencies):
+        dt = 1 / (f * steps_per_period)
+        vin = sine_input(f=f, amplitude=1.0, t_end=cycles / f, dt=dt)[:, None] * amplitude.ravel()
+        result = simulate_batch(vin, dt, {"R_ON": R_ON.ravel(), "R_OFF": R_OFF.ravel(), "D": D.ravel(),
+                                          "MU_V": MU_V.ravel(), "w0": (state * D).ravel()}, record=("I",))
+        last = slice((cycles - 1) * steps_per_period, cycles * steps_per_period)
+        fs = 1 / dt
+        currents = demux_goertzel(result["I"][last].T, f * np.arange(1, harmonics + 1), fs)
+        voltages = demux_goertzel(vin[last].T, [f], fs)
+        out[index] = currents / voltages
+    return out
+
+
+def bode(f, H):
+    """Bode data for one response: magnitude (S and dB re 1 S) and phase (degrees)"""
+    H = np.asarray(H)
+    magnitude = np.abs(H)
+    return {"f": np.asarray(f, dtype=float), "magnitude": magnitude,
+            "magnitude_db": 20 * np.log10(magnitude), "phase_deg": np.degrees(np.angle(H))}
+
+
+def nyquist(H):
+    """Nyquist data: real and imaginary parts of the response (S)"""
+    H = np.asarray(H)
+    return {"real": H.real, "imag": H.imag}
+
+
+def distortion(H):
+    """Total harmonic distortion of the current, from a (..., harmonics) response"""
+    H = np.asarray(H)
+    return np.sqrt(np.sum(np.abs(H[..., 1:]) ** 2, axis=-1)) / np.abs(H[..., 0])
+
+
+def bode_plots(f, responses, labels=None, title="Memristor H(w) = I(w)/V(w)"):
+    """Magnitude and phase plot specs for vector_plots, one series per response"""
+    x = np.log10(np.asarray(f, dtype=float))
+    labels = labels or [None] * len(responses)
+    data = [bode(f, H) for H in responses]
+    magnitude = {"series": [{"x": x, "y": d["magnitude_db"], "label": label} for d, label in zip(data, labels)],
+                 "xlabel": "log10 Frequency (Hz)", "ylabel": "|H| (dB re 1 S)", "title": title}
+    phase = {"series": [{"x": x, "y": d["phase_deg"], "label": label} for d, label in zip(data, labels)],
+             "xlabel": "log10 Frequency (Hz)", "ylabel": "Phase (degrees)", "title": title}
+    return magnitude, phase
+
+
+def nyquist_plot(responses, labels=None, title="Nyquist: H(w) over frequency"):
+    """Nyquist plot spec (real vs. imaginary part, in mS) for vector_plots"""
+    labels = labels or [None] * len(responses)
+    return {"series": [{"x": np.real(H) * 1e3, "y": np.imag(H) * 1e3, "label": label}
+                       for H, label in zip(responses, labels)],
+            "xlabel": "Re H (mS)", "ylabel": "Im H (mS)", "title": title}
+
+
+def response_slides(f=None, states=(0.1, 0.5, 0.9), amplitude=AMPLITUDE, params=None):
+    """Bode, distortion and Nyquist slides of the drift model, ready for create_odp()"""
+    if f is None:
+        f = np.logspace(0, 6, 600)
+    H = drift_response(np.asarray(f)[:, None], np.asarray(states)[None, :], amplitude, params)
+    labels = [f"w/D = {s:g}" for s in states]
+    magnitude, _ = bode_plots(f, H[..., 0].T, labels, title="Fundamental |I1/V1| of the linear-drift model")
+    fs = float(np.max(switching_frequency(amplitude, params)))
+    thd = {"series": [{"x": np.log10(f), "y": 100 * distortion(H[:, k]), "label": label}
+                      for k, label in enumerate(labels)],
+           "xlabel": "log10 Frequency (Hz)", "ylabel": "Current THD (%)",
+           "title": "Harmonic distortion falls as 1/f above switching"}
+    return [
+        {"title": "Memristor Frequency Response |H(w)|",
+         "content": [f"Linear drift, V0 = {amplitude:g} V, {len(f)} frequencies x {len(states)} states",
+                     f"Below f_s = {fs:.3g} Hz the state switches fully between R_ON and R_OFF",
+                     "Above f_s the loop stays pinched and |H| depends on the state"],
+         "image": None, "plot": magnitude},
+        {"title": "Memristor Harmonic Distortion",
+         "content": ["Pinched loop = harmonics of I at multiples of f",
+                     "THD falls with frequency as the state stops following V"],
+         "image": None, "plot": thd},
+        {"title": "Memristor Nyquist Plot",
+         "content": ["Fundamental admittance I1/V1 over 1 Hz - 1 MHz",
+                     "Phase appears only while the state clamps"],
+         "image": None, "plot": nyquist_plot(H[..., 0].T, labels)},
+    ]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--points", type=int, default=1_000_000, help="grid size of the timing run")
+    parser.add_argument("--deck", help="write the response slides to this ODP file")
+    args = parser.parse_args()
+
+    print("=== MEMRISTOR FREQUENCY RESPONSE ===\n")
+    print(f"Script model: R_avg = {float(resistance(STATE)):.1f} Ohms, "
+          f"f0 = {float(characteristic_frequency()):.3e} Hz")
+    print(f"Drift model: full switching below {float(switching_frequency()):.1f} Hz\n")
+
+    states = np.linspace(0.05, 0.95, 100)
+    f = np.logspace(0, 6, args.points // len(states))
+    start = time.perf_counter()
+    H = drift_response(f[:, None], states[None, :])
+    elapsed = time.perf_counter() - start
+    print(f"{H.shape[0] * H.shape[1]} grid points x {HARMONICS} harmonics: {elapsed:.2f} s\n")
+
+    check_f = np.array([10.0, 1e3, 1e5])
+    check_states = np.array([0.1, 0.5, 0.9])
+    sim = simulated_response(check_f, check_states)
+    model = drift_response(check_f[:, None], check_states[None, :])
+    print(f"{'f (Hz)':>8} {'w/D':>5} {'|I1/V1| sim':>12} {'model':>12} {'phase sim':>10} {'model':>8} "
+          f"{'THD sim':>8} {'model':>8}")
+    for i, fi in enumerate(check_f):
+        for j, s in enumerate(check_states):
+            print(f"{fi:>8g} {s:>5g} {abs(sim[i, j, 0]):>12.5e} {abs(model[i, j, 0]):>12.5e} "
+                  f"{np.degrees(np.angle(sim[i, j, 0])):>10.2f} {np.degrees(np.angle(model[i, j, 0])):>8.2f} "
+                  f"{distortion(sim[i, j]) * 100:>7.2f}% {distortion(model[i, j]) * 100:>7.2f}%")
+
+    if args.deck:
+        from create_presentation_final import create_odp
+        print()
+        create_odp(response_slides(), {}, args.deck)
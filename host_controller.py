@@ -0,0 +1,443 @@
+#!/usr/bin/env python3
+"""
+Asyncio host controller: pipelined SET/RESET/READ over a serial link
+The Arduino bridge of Experimenter_Deck.md / lab1-code and the MINT words
+of test_1.md (:S SET, :R RESET, :D READ) are driven one command at a
+time, waiting for each reply, so a 16 x 16 scan pays 256 link round
+trips. Controller keeps up to `depth` tagged commands in flight, writes
+each batch back to back in one write, and matches replies by tag: they
+may arrive in any order, and results come back keyed by cell. The bytes
+of unanswered commands are also kept within the device's receive
+buffer, so a deep window cannot overrun it.
+
+Protocol, one ASCII line per command (Serial.parseInt style), each
+ending in `*` and a checksum (low 16 bits of CRC-32, 4 hex digits):
+
+    host    <tag> S <row> <col> <width>    SET pulse, width 1-8 units
+            <tag> R <row> <col> <width>    RESET pulse
+            <tag> D <row> <col>            READ
+    device  <tag> <row> <col> <adc> <n>    the cell's ADC code afterwards and
+                                           its pulse count (mod 256)
+            <tag> ERR                      command not understood
+
+The device ignores a line whose checksum fails: bytes dropped from it
+could otherwise leave a valid command for another cell. A READ without
+a reply after `timeout` s is sent again under a new tag, up to `retries`
+times. Pulses are not idempotent, so a SET/RESET that times out is not
+simply sent again: the cell is read back and its pulse count compared
+with the count before the pulse (read first if not yet known), and the
+pulse is only repeated if it was never applied. The ADC code alone
+cannot tell: a short pulse on a high-resistance cell may not move it.
+
+DeviceSimulator serves the protocol on a pseudo-terminal for testing:
+USB latency each way, bytes limited to the baud rate, a 64-byte receive
+buffer that drops bytes when full (as an Arduino's does), firmware time
+per command, and ADC conversions that settle longer on high-resistance
+cells, so replies overtake each other. The cells are a crossbar.py
+array read and pulsed through z80_crossbar.CrossbarIO; the firmware
+counts the pulses each cell has had in a byte per cell.
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import time
+import tty
+import zlib
+
+import numpy as np
+
+from crossbar import Crossbar, random_state
+from z80_crossbar import PULSE_UNIT, CrossbarIO
+
+BAUD = 115200
+LATENCY = 1e-3                 # s each way (USB-serial latency timer)
+RX_BUFFER = 64                 # device receive buffer, bytes
+COMMAND_TIME = 100e-6          # s of firmware work per command
+WRITE_SETTLE = 2e-3            # s after a SET/RESET pulse before the next command
+ADC_TIME = 100e-6              # s per conversion, plus settling
+SETTLE_RC = 50e-9              # s per kOhm of cell resistance (line capacitance)
+DEPTH = 8
+TIMEOUT = 0.25
+RETRIES = 5
+TICK = 0.5e-3                  # s between UART updates in the simulator
+
+
+def frame(text):
+    """One protocol line as bytes: text, '*', checksum, newline"""
+    return f"{text}*{zlib.crc32(text.encode()) & 0xFFFF:04X}\n".encode()
+
+
+def unframe(raw):
+    """The fields of a received line, or None if its checksum is missing or wrong"""
+    text, star, check = raw.decode("ascii", "replace").strip().rpartition("*")
+    if not star or check != f"{zlib.crc32(text.encode()) & 0xFFFF:04X}":
+        return None
+    return text.split()
+
+
+class DeviceSimulator:
+    """The memristor module's serial firmware, served on a pseudo-terminal
+
+    start() opens the pty and returns the path a controller should open;
+    stats counts commands, replies, dropped bytes, lines rejected by the
+    checksum and lines that did not parse.
+    """
+
+    def __init__(self, rows=16, cols=16, state=None, baud=BAUD, latency=LATENCY, rx_buffer=RX_BUFFER,
+                 command_time=COMMAND_TIME, write_settle=WRITE_SETTLE, adc_time=ADC_TIME, seed=0):
+        xbar = Crossbar(random_state(rows, cols, seed) if state is None else state)
+        self.io = CrossbarIO(xbar)
+        self.writes = np.zeros(xbar.shape, dtype=np.uint8)
+        self.byte_time = 10.0 / baud            # start + 8 data + stop bits
+        self.latency = latency
+        self.rx_size = rx_buffer
+        self.command_time, self.write_settle, self.adc_time = command_time, write_settle, adc_time
+        self.stats = {"commands": 0, "replies": 0, "dropped": 0, "rejected": 0, "errors": 0}
+        self.master = self.path = None
+        self.tasks = []
+
+    @property
+    def shape(self):
+        return self.io.xbar.shape
+
+    async def start(self):
+        self.master, slave = os.openpty()
+        tty.setraw(slave)
+        self.path = os.ttyname(slave)
+        self._slave = slave                      # held open so the pty stays up between clients
+        os.set_blocking(self.master, False)
+        self.wire_in, self.wire_out = bytearray(), bytearray()
+        self.rx = bytearray()
+        self.line_ready = asyncio.Event()
+        self.busy_until = 0.0
+        loop = asyncio.get_running_loop()
+        loop.add_reader(self.master, self._from_host)
+        self.tasks = [asyncio.create_task(self._uart()), asyncio.create_task(self._firmware())]
+        return self.path
+
+    async def stop(self):
+        asyncio.get_running_loop().remove_reader(self.master)
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        os.close(self.master)
+        os.close(self._slave)
+
+    def _from_host(self):
+        try:
+            chunk = os.read(self.master, 4096)
+        except BlockingIOError:
+            return
+        # The USB adapter forwards what it has once per latency period
+        asyncio.get_running_loop().call_later(self.latency, self.wire_in.extend, chunk)
+
+    async def _uart(self):
+        """Move bytes at the baud rate: host -> receive buffer, replies -> host"""
+        loop = asyncio.get_running_loop()
+        last = loop.time()
+        credit_in = credit_out = 0.0
+        while True:
+            await asyncio.sleep(TICK)
+            now = loop.time()
+            budget = (now - last) / self.byte_time
+            last = now
+            credit_in = min(credit_in + budget, len(self.wire_in))
+            n = int(credit_in)
+            if n:
+                credit_in -= n
+                incoming = self.wire_in[:n]
+                del self.wire_in[:n]
+                room = max(self.rx_size - len(self.rx), 0)
+                self.rx.extend(incoming[:room])
+                self.stats["dropped"] += max(n - room, 0)
+                if b"\n" in incoming[:room]:
+                    self.line_ready.set()
+            credit_out = min(credit_out + budget, len(self.wire_out))
+            n = int(credit_out)
+            if n:
+                credit_out -= n
+                outgoing = bytes(self.wire_out[:n])
+                del self.wire_out[:n]
+                loop.call_later(self.latency, self._to_host, outgoing)
+
+    def _to_host(self, data):
+        try:
+            os.write(self.master, data)
+        except OSError:
+            pass
+
+    def _reply(self, text):
+        self.stats["replies"] += 1
+        self.wire_out.extend(frame(text))
+
+    async def _firmware(self):
+        """Parse and execute one line at a time, in virtual time so sub-ms steps add up exactly"""
+        loop = asyncio.get_running_loop()
+        while True:
+            end = self.rx.find(b"\n")
+            if end < 0:
+                self.line_ready.clear()
+                await self.line_ready.wait()
+                continue
+            line = unframe(bytes(self.rx[:end]))
+            del self.rx[:end + 1]
+            start = max(loop.time(), self.busy_until)
+            self.busy_until = start + self.command_time
+            if line is None:
+                self.stats["rejected"] += 1
+                continue
+            self.stats["commands"] += 1
+            reply_at, text = self._execute(line)
+            if text is not None:
+                loop.call_at(self.busy_until + reply_at, self._reply, text)
+            # Timers fire late by up to a millisecond; only sleep off a lead
+            # bigger than that, so the firmware is not slowed by rounding
+            delay = self.busy_until - loop.time()
+            if delay > TICK:
+                await asyncio.sleep(delay)
+            else:
+                await asyncio.sleep(0)
+
+    def _execute(self, line):
+        """(delay after the command, reply text) for one parsed line"""
+        tag = line[0] if line and line[0].isdigit() else None
+        try:
+            op, row, col = line[1], int(line[2]), int(line[3])
+            rows, cols = self.shape
+            if op not in ("S", "R", "D") or not (0 <= row < rows and 0 <= col < cols):
+                raise ValueError
+            if op != "D":
+                width = int(line[4])
+                if not 1 <= width <= 8 or len(line) != 5:
+                    raise ValueError
+            elif len(line) != 4:
+                raise ValueError
+        except (IndexError, ValueError):
+            self.stats["errors"] += 1
+            return 0.0, (f"{tag} ERR" if tag else None)
+        self.io.row, self.io.col = row, col
+        if op == "D":
+            # The sense node charges through the cell before the ADC samples it
+            resistance = 1.0 / self.io.xbar.G[row, col]
+            settle = SETTLE_RC * resistance / 1e3 * np.log(256)
+            return self.adc_time + settle, f"{tag} {row} {col} {self.io.adc_codes()[row, col]} {self.writes[row, col]}"
+        self.io.pulse(0 if op == "S" else 1, width - 1)
+        self.writes[row, col] += 1
+        self.busy_until += width * PULSE_UNIT + self.write_settle
+        return 0.0, f"{tag} {row} {col} {self.io.adc_codes()[row, col]} {self.writes[row, col]}"
+
+
+async def open_serial(path):
+    """(reader, writer) asyncio streams on a serial device or pty, in raw mode"""
+    fd = os.open(path, os.O_RDWR | os.O_NOCTTY | os.O_NONBLOCK)
+    tty.setraw(fd)
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader()
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), os.fdopen(fd, "rb", buffering=0))
+    transport, protocol = await loop.connect_write_pipe(asyncio.streams.FlowControlMixin,
+                                                        os.fdopen(os.dup(fd), "wb", buffering=0))
+    return reader, asyncio.StreamWriter(transport, protocol, reader, loop)
+
+
+class Controller:
+    """Pipelined command issue with a bounded in-flight window
+
+    At most `depth` commands and `rx_buffer` bytes are unanswered at a
+    time; depth=1 is the stop-and-wait behaviour of the existing host
+    code. known holds the last pulse count seen for each cell.
+    """
+
+    def __init__(self, reader, writer, depth=DEPTH, rx_buffer=RX_BUFFER, timeout=TIMEOUT, retries=RETRIES):
+        if depth < 1:
+            raise ValueError("depth must be >= 1")
+        self.reader, self.writer = reader, writer
+        self.depth, self.rx_buffer, self.timeout, self.retries = depth, rx_buffer, timeout, retries
+        self.window = asyncio.Semaphore(depth)
+        self.space = asyncio.Condition()
+        self.in_flight = 0
+        self.tags = itertools.count()
+        self.pending = {}
+        self.outbox = []
+        self.known = {}
+        self.stats = {"sent": 0, "resent": 0, "timeouts": 0, "verified": 0, "errors": 0, "stale": 0}
+        self.latencies = []
+        self.listener = asyncio.create_task(self._listen())
+
+    @classmethod
+    async def open(cls, path, **kwargs):
+        reader, writer = await open_serial(path)
+        return cls(reader, writer, **kwargs)
+
+    async def close(self):
+        self.listener.cancel()
+        await asyncio.gather(self.listener, return_exceptions=True)
+        self.writer.close()
+
+    async def _listen(self):
+        while True:
+            line = unframe(await self.reader.readline())
+            if line is None or len(line) not in (2, 5) or not line[0].isdigit():
+                continue
+            future = self.pending.pop(int(line[0]), None)
+            if future is None or future.done():
+                self.stats["stale"] += 1          # reply to a command already timed out and re-sent
+                continue
+            future.set_result(None if line[1] == "ERR" else tuple(int(x) for x in line[1:]))
+
+    def _queue(self, data):
+        # Lines queued in the same event-loop turn go out in one write
+        if not self.outbox:
+            asyncio.get_running_loop().call_soon(self._flush)
+        self.outbox.append(data)
+
+    def _flush(self):
+        self.writer.write(b"".join(self.outbox))
+        self.outbox.clear()
+
+    async def _send(self, args):
+        """Send one line through the window; (row, col, code, count), None for ERR, or False on a timeout"""
+        loop = asyncio.get_running_loop()
+        async with self.window:
+            tag = next(self.tags) % 100000
+            data = frame(f"{tag} {args}")
+            async with self.space:
+                await self.space.wait_for(lambda: self.in_flight == 0 or
+                                          self.in_flight + len(data) <= self.rx_buffer)
+                self.in_flight += len(data)
+            future = loop.create_future()
+            self.pending[tag] = future
+            sent = loop.time()
+            self._queue(data)
+            self.stats["sent"] += 1
+            try:
+                reply = await asyncio.wait_for(future, self.timeout)
+            except asyncio.TimeoutError:
+                self.pending.pop(tag, None)
+                self.stats["timeouts"] += 1
+                return False
+            finally:
+                async with self.space:
+                    self.in_flight -= len(data)
+                    self.space.notify_all()
+            self.latencies.append(loop.time() - sent)
+            return reply
+
+    async def command(self, op, row, col, width=None):
+        """Send one command through the window; returns the cell's ADC code"""
+        args = f"{op} {row} {col}" + (f" {width}" if width is not None else "")
+        if op != "D" and (row, col) not in self.known:
+            await self.command("D", row, col)
+        for attempt in range(self.retries + 1):
+            self.stats["resent"] += attempt > 0
+            before = self.known.get((row, col))
+            reply = await self._send(args)
+            if reply is False and op != "D":
+                # The pulse may have been applied and only its reply lost
+                code = await self.command("D", row, col)
+                if self.known[row, col] != before:
+                    self.stats["verified"] += 1
+                    return code
+                continue
+            if not reply or reply[:2] != (row, col):
+                self.stats["errors"] += reply is not False
+                continue
+            self.known[row, col] = reply[3]
+            return reply[2]
+        raise TimeoutError(f"No reply to '{args}' after {self.retries + 1} attempts")
+
+    async def run(self, commands):
+        """Execute (op, row, col[, width]) commands concurrently; returns {(row, col): code}
+
+        When a cell appears more than once, its last command's reply is kept.
+        """
+        codes = await asyncio.gather(*(self.command(*c) for c in commands))
+        return {(c[1], c[2]): code for c, code in zip(commands, codes)}
+
+    async def scan(self, rows, cols):
+        """READ every cell; (rows, cols) array of ADC codes"""
+        result = await self.run([("D", r, c) for r in range(rows) for c in range(cols)])
+        out = np.zeros((rows, cols), dtype=np.uint8)
+        for (r, c), code in result.items():
+            out[r, c] = code
+        return out
+
+    async def program(self, targets, width=1):
+        """SET (True) or RESET (False) each cell of a boolean (rows, cols) array
+
+        Cells not read before are read first, to check a pulse whose reply
+        times out.
+        """
+        targets = np.asarray(targets, dtype=bool)
+        rows, cols = targets.shape
+        return await self.run([("S" if targets[r, c] else "R", r, c, width)
+                               for r in range(rows) for c in range(cols)])
+
+
+async def measure(depth, rows=16, cols=16, operation="scan", **device):
+    """Scan (or program) a simulated rows x cols array at one pipeline depth
+
+    Returns wall time, cells/s, command latency percentiles and the
+    controller's and simulator's counters.
+    """
+    sim = DeviceSimulator(rows, cols, **device)
+    path = await sim.start()
+    controller = await Controller.open(path, depth=depth)
+    try:
+        start = time.perf_counter()
+        if operation == "scan":
+            codes = await controller.scan(rows, cols)
+            correct = bool(np.array_equal(codes, sim.io.adc_codes()))
+        else:
+            pattern = (np.indices((rows, cols)).sum(axis=0) % 2).astype(bool)
+            await controller.program(pattern)
+            # Exactly one pulse per cell, SET (polarity 0) where the pattern is True
+            pulses = {}
+            for row, col, polarity, *_ in sim.io.pulses:
+                pulses.setdefault((row, col), []).append(polarity)
+            correct = pulses == {(r, c): [int(not pattern[r, c])] for r in range(rows) for c in range(cols)}
+        elapsed = time.perf_counter() - start
+    finally:
+        await controller.close()
+        await sim.stop()
+    latency = np.array(controller.latencies)
+    return {"depth": depth, "seconds": elapsed, "cells_per_s": rows * cols / elapsed,
+            "latency_ms": np.percentile(latency, [50, 99]) * 1e3, "correct": correct,
+            "controller": dict(controller.stats), "device": dict(sim.stats)}
+
+
+def measure_lines(result):
+    p50, p99 = result["latency_ms"]
+    c, d = result["controller"], result["device"]
+    return (f"{result['depth']:>5} {result['seconds'] * 1e3:>9.1f} {result['cells_per_s']:>8.0f} "
+            f"{p50:>8.2f} {p99:>8.2f} {c['resent']:>7} {d['dropped']:>8}  {'ok' if result['correct'] else 'MISMATCH'}")
+
+
+MEASURE_HEADER = f"{'depth':>5} {'total ms':>9} {'cells/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'resent':>7} {'dropped':>8}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--port", help="serial device speaking the protocol (default: a simulator on a pty)")
+    parser.add_argument("--rows", type=int, default=16, help="array rows")
+    parser.add_argument("--cols", type=int, default=16, help="array columns")
+    parser.add_argument("--depth", type=int, nargs="+", default=[1, 8], help="pipeline depths to try")
+    args = parser.parse_args()
+
+    async def main():
+        if args.port:
+            for depth in args.depth:
+                controller = await Controller.open(args.port, depth=depth)
+                start = time.perf_counter()
+                codes = await controller.scan(args.rows, args.cols)
+                elapsed = time.perf_counter() - start
+                await controller.close()
+                print(f"depth {depth}: {elapsed * 1e3:.1f} ms, {codes.size / elapsed:.0f} cells/s")
+            print(codes)
+            return
+        print(f"=== {args.rows}x{args.cols} SCAN OVER A SIMULATED {BAUD}-BAUD LINK ===\n")
+        print(MEASURE_HEADER)
+        for depth in args.depth:
+            print(measure_lines(await measure(depth, args.rows, args.cols)))
+
+    asyncio.run(main())
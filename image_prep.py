@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Picture preprocessing for the ODP generator
+Resamples each picture to the pixel size of the slide's picture frame at
+a chosen DPI and recompresses it, keeping whichever encoding is smallest
+(optimised full-colour PNG, or a 256-colour palette PNG which suits
+Octave plots). Results are cached on disk under a hash of the source
+bytes and target geometry, and misses are processed on a process pool,
+so repeat builds only stat the sources.
+
+Requires Pillow; without it pictures are embedded at native resolution.
+"""
+import hashlib
+import io
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+from odp_archive import file_digest
+from slide_templates import PICTURE_SIZE_CM
+
+DEFAULT_DPI = 150
+DEFAULT_CACHE = ".image_cache"
+PALETTE_COLORS = 256
+# Bump when the processing below changes, to invalidate old cache entries
+PREP_VERSION = 2
+
+
+def frame_pixels(dpi, size_cm=PICTURE_SIZE_CM):
+    """Pixel size of the picture frame at `dpi`"""
+    return tuple(max(1, round(cm / 2.54 * dpi)) for cm in size_cm)
+
+
+def encode_smallest(img, colors=PALETTE_COLORS):
+    """PNG bytes for the smaller of full-colour and palette encodings"""
+    candidates = []
+    full = io.BytesIO()
+    img.save(full, 'PNG', optimize=True)
+    candidates.append(full.getvalue())
+    if colors and img.mode in ('RGB', 'RGBA', 'L', 'P'):
+        method = Image.Quantize.FASTOCTREE if img.mode == 'RGBA' else Image.Quantize.MEDIANCUT
+        palette = io.BytesIO()
+        img.quantize(colors, method=method, dither=Image.Dither.NONE).save(palette, 'PNG', optimize=True)
+        candidates.append(palette.getvalue())
+    return min(candidates, key=len)
+
+
+def process_image(path, stem, size, colors):
+    """Resample `path` to fit `size` and write the result to `stem` + extension
+
+    Never upscales; if the source is already smaller than anything we can
+    produce, it is kept as-is under its own extension, otherwise the PNG
+    is written as `stem`.png. Returns the entry's path. Runs in a worker
+    process.
+    """
+    with Image.open(path) as img:
+        img.load()
+        target = (min(size[0], img.width), min(size[1], img.height))
+        if img.mode not in ('RGB', 'RGBA', 'L', 'P'):
+            img = img.convert('RGBA' if 'A' in img.getbands() else 'RGB')
+        elif img.mode == 'P':
+            img = img.convert('RGBA' if 'transparency' in img.info else 'RGB')
+        if target != img.size:
+            img = img.resize(target, Image.Resampling.LANCZOS)
+        data = encode_smallest(img, colors)
+    entry = stem + '.png'
+    if len(data) >= os.path.getsize(path):
+        with open(path, 'rb') as src:
+            data = src.read()
+        entry = stem + os.path.splitext(path)[1].lower()
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(entry), suffix='.tmp')
+    with os.fdopen(fd, 'wb') as out:
+        out.write(data)
+    os.replace(tmp, entry)
+    return entry
+
+
+def _write_ref(ref, entry):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(ref), suffix='.tmp')
+    with os.fdopen(fd, 'w') as out:
+        out.write(os.path.basename(entry))
+    os.replace(tmp, ref)
+
+
+def prepare_images(images, dpi=DEFAULT_DPI, cache_dir=DEFAULT_CACHE, colors=PALETTE_COLORS,
+                   workers=None):
+    """Map image keys to frame-sized, recompressed copies of the pictures
+
+    Results live in `cache_dir`, keyed by the source's SHA-256 and the
+    target geometry; a stat-keyed reference file skips even the hashing
+    when a source has not changed since it was last processed. An entry
+    is a .png, or carries the source's extension when the source was
+    kept as-is.
+    """
+    if Image is None:
+        print("✗ Pillow not installed: embedding images at native resolution")
+        return dict(images)
+    os.makedirs(cache_dir, exist_ok=True)
+    size = frame_pixels(dpi)
+    geometry = f"{size[0]}x{size[1]}:{colors}:v{PREP_VERSION}"
+
+    prepared, misses, waiting = {}, {}, {}
+    for key, path in images.items():
+        if os.path.splitext(path)[1].lower() == '.svg':
+            prepared[key] = path
+            continue
+        stat = os.stat(path)
+        stat_key = f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}:{geometry}"
+        ref = os.path.join(cache_dir, hashlib.sha256(stat_key.encode('utf-8')).hexdigest() + '.ref')
+        if os.path.exists(ref):
+            with open(ref) as f:
+                entry = os.path.join(cache_dir, f.read().strip())
+            if os.path.exists(entry):
+                prepared[key] = entry
+                continue
+        entry_key = f"{file_digest(path)}:{geometry}"
+        stem = os.path.join(cache_dir, hashlib.sha256(entry_key.encode('utf-8')).hexdigest())
+        for entry in (stem + '.png', stem + os.path.splitext(path)[1].lower()):
+            if os.path.exists(entry):
+                prepared[key] = entry
+                _write_ref(ref, entry)
+                break
+        else:
+            misses.setdefault(stem, path)
+            waiting.setdefault(stem, []).append((key, ref))
+
+    if misses:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            entries = pool.map(process_image, misses.values(), misses.keys(),
+                               [size] * len(misses), [colors] * len(misses))
+            for stem, entry in zip(misses, entries):
+                for key, ref in waiting[stem]:
+                    prepared[key] = entry
+                    _write_ref(ref, entry)
+    return {key: prepared[key] for key in images}
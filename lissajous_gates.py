@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Batched trainer for the Lissajous logic-gate library
+lissajous_logic_gates.m trains one 8-hidden-unit phase network per
+2-input Boolean function (AND, OR, NAND, NOR, XOR, XNOR), one after
+another, sample by sample, with finite differences. Here every gate and
+any number of random restarts per gate are stacked along a leading
+"network" axis and trained together: each epoch is a few batched
+einsums over all networks, using the analytic phase gradients of
+lissajous_nn, with the same update and [-pi, pi) phase wrapping as the
+Octave loop.
+
+train_gates() returns per-gate convergence statistics over the
+restarts (solve rate, epochs to solve, final losses) and the best
+network of each gate, which the logic_gates figure and gates_slide()
+are built from.
+"""
+import math
+
+import numpy as np
+
+from lissajous_nn import OMEGA, PHASES, T_EVAL, X_XOR
+
+# Truth tables over inputs [0,0], [0,1], [1,0], [1,1] (PART 1 of the Octave script)
+GATES = (("AND", (0, 0, 0, 1)), ("OR", (0, 1, 1, 1)), ("NAND", (1, 1, 1, 0)),
+         ("NOR", (1, 0, 0, 0)), ("XOR", (0, 1, 1, 0)), ("XNOR", (1, 0, 0, 1)))
+N_HIDDEN = 8
+LEARNING_RATE = 0.2
+EPOCHS = 500
+RESTARTS = 16
+
+
+def init_stack(n_networks, n_inputs=2, n_hidden=N_HIDDEN, n_output=1, seed=42):
+    """Phases for n_networks networks, uniform in [-pi, pi), stacked on axis 0"""
+    rng = np.random.default_rng(seed)
+
+    def draw(*shape):
+        return (rng.random((n_networks,) + shape) - 0.5) * 2 * math.pi
+    return {"phases_ih": draw(n_inputs, n_hidden), "phases_ho": draw(n_hidden, n_output),
+            "bias_h": draw(n_hidden), "bias_o": draw(n_output)}
+
+
+def forward_stack(params, X, theta=OMEGA * T_EVAL):
+    """Hidden (M, B, H) and outputs (M, B, O) of M stacked networks on inputs X (B, I)"""
+    hidden = np.tanh(X @ np.sin(theta + params["phases_ih"]) + np.sin(theta + params["bias_h"])[:, None, :])
+    out = (np.einsum('mbh,mho->mbo', hidden, np.sin(theta + params["phases_ho"]))
+           + np.sin(theta + params["bias_o"])[:, None, :])
+    return hidden, 1 / (1 + np.exp(-out))
+
+
+def gradients_stack(params, X, Y, theta=OMEGA * T_EVAL, trained=PHASES):
+    """Per-network losses (M,), outputs (M, B, O) and gradients of the `trained` phases
+
+    Y is (M, B, O). Gradients of phases that are not trained are skipped.
+    """
+    hidden, y = forward_stack(params, X, theta)
+    err = y - Y
+    d_out = 2 * err * y * (1 - y) / len(X)                                       # (M, B, O)
+    grads = {}
+    if "phases_ih" in trained or "bias_h" in trained:
+        sin_ho = np.sin(theta + params["phases_ho"])
+        d_pre = np.einsum('mbo,mho->mbh', d_out, sin_ho) * (1 - hidden ** 2)     # (M, B, H)
+        if "phases_ih" in trained:
+            grads["phases_ih"] = (X.T @ d_pre) * np.cos(theta + params["phases_ih"])
+        if "bias_h" in trained:
+            grads["bias_h"] = d_pre.sum(axis=1) * np.cos(theta + params["bias_h"])
+    if "phases_ho" in trained:
+        grads["phases_ho"] = np.einsum('mbh,mbo->mho', hidden, d_out) * np.cos(theta + params["phases_ho"])
+    if "bias_o" in trained:
+        grads["bias_o"] = d_out.sum(axis=1) * np.cos(theta + params["bias_o"])
+    return np.sum(err ** 2, axis=(1, 2)) / len(X), y, grads
+
+
+def train_stack(X, Y, params, epochs=EPOCHS, learning_rate=LEARNING_RATE, trained=("phases_ih",),
+                theta=OMEGA * T_EVAL):
+    """Full-batch gradient descent on every stacked network at once
+
+    Returns the trained phases, the loss history (epochs, M) and, per
+    network, the first epoch at which every rounded output matched its
+    target (-1 if never).
+    """
+    params = {name: np.array(value, dtype=float) for name, value in params.items()}
+    history = np.empty((epochs, len(Y)))
+    solved_at = np.full(len(Y), -1)
+    for epoch in range(epochs):
+        history[epoch], y, grads = gradients_stack(params, X, Y, theta, trained)
+        newly = (solved_at < 0) & np.all(np.round(y) == Y, axis=(1, 2))
+        solved_at[newly] = epoch
+        for name in trained:
+            params[name] = np.mod(params[name] - learning_rate * grads[name] + math.pi, 2 * math.pi) - math.pi
+    return params, history, solved_at
+
+
+def train_gates(gates=GATES, restarts=RESTARTS, n_hidden=N_HIDDEN, epochs=EPOCHS,
+                learning_rate=LEARNING_RATE, trained=("phases_ih",), seed=42, theta=OMEGA * T_EVAL):
+    """Train `restarts` networks per gate in one stack; statistics per gate
+
+    Each result has the gate's name and truth table, its solve rate over
+    the restarts, the median epochs to solve, the final loss of every
+    restart with its statistics, and the best restart's phases,
+    predictions and loss history.
+    """
+    n = len(gates) * restarts
+    targets = np.repeat(np.array([truth for _, truth in gates], dtype=float), restarts, axis=0)[..., None]
+    params, history, solved_at = train_stack(X_XOR, targets, init_stack(n, 2, n_hidden, seed=seed),
+                                             epochs, learning_rate, trained, theta)
+    final_loss, predictions = gradients_stack(params, X_XOR, targets, theta, ())[:2]
+    results = []
+    for g, (name, truth) in enumerate(gates):
+        block = slice(g * restarts, (g + 1) * restarts)
+        losses, solved = final_loss[block], solved_at[block]
+        correct = np.all(np.round(predictions[block, :, 0]) == np.array(truth), axis=1)
+        best = g * restarts + int(np.argmin(np.where(correct, losses, losses + 1e9)))
+        results.append({
+            "name": name,
+            "truth": truth,
+            "restarts": restarts,
+            "solve_rate": float(np.mean(correct)),
+            "epochs_to_solve": float(np.median(solved[solved >= 0])) if np.any(solved >= 0) else None,
+            "loss_min": float(losses.min()),
+            "loss_median": float(np.median(losses)),
+            "loss_max": float(losses.max()),
+            "losses": losses,
+            "best": {key: params[key][best] for key in PHASES},
+            "predictions": predictions[best, :, 0],
+            "accuracy": float(np.mean(np.round(predictions[best, :, 0]) == np.array(truth)) * 100),
+            "history": history[:, best],
+        })
+    return results
+
+
+def summary_lines(results):
+    """The Octave script's results table, plus restart statistics"""
+    lines = ["Gate  | 00 | 01 | 10 | 11 | Acc  | Solved | Epochs"]
+    for r in results:
+        cells = []
+        for pred, truth in zip(r["predictions"], r["truth"]):
+            mark = f"{round(pred):.0f}" + ("" if round(pred) == truth else "!")
+            cells.append(f"{mark:<2}")
+        epochs = f"{r['epochs_to_solve']:.0f}" if r["epochs_to_solve"] is not None else "-"
+        lines.append(f"{r['name']:<5} | {' | '.join(cells)} | {r['accuracy']:3.0f}% | "
+                     f"{r['solve_rate'] * 100:5.0f}% | {epochs}")
+    return lines
+
+
+def gates_slide(results, title="Lissajous Logic Gates (Phase Networks)", image='logic_gates'):
+    """Slide dict with the per-gate results, ready for create_odp()"""
+    restarts = results[0]["restarts"] if results else 0
+    return {"title": title,
+            "content": [f"{len(results)} gates x {restarts} restarts trained as one batch", ""]
+            + summary_lines(results),
+            "image": image}
+
+
+if __name__ == "__main__":
+    print("=== LISSAJOUS LOGIC GATE LIBRARY (batched) ===\n")
+    results = train_gates()
+    for line in summary_lines(results):
+        print("  " + line)
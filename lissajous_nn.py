@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Lissajous phase neural network with analytic, batched gradients
+The network of lissajous_neural_network.m: every weight is a phase
+shift on a carrier sampled at theta = omega * t_eval,
+
+    hidden = tanh(X @ sin(theta + phases_ih) + sin(theta + bias_h))
+    output = sigmoid(hidden @ sin(theta + phases_ho) + sin(theta + bias_o))
+
+trained on the mean squared error. gradients() differentiates this in
+closed form for the whole batch at once (d sin(theta + phi) / d phi =
+cos(theta + phi)), so an epoch costs two small matrix products per
+layer instead of one forward pass per phase per sample.
+train_numeric() is a line-for-line port of the Octave finite-difference
+loop, kept as the reference.
+
+Run directly to train XOR as PART 3 of the Octave script does.
+"""
+import math
+
+import numpy as np
+
+OMEGA = 2 * math.pi * 50       # carrier frequency (50 Hz)
+T_EVAL = 0.01                  # evaluation time (10 ms)
+LEARNING_RATE = 0.1
+EPOCHS = 1000
+DELTA = 0.001                  # finite-difference step of the Octave trainer
+PHASES = ("phases_ih", "phases_ho", "bias_h", "bias_o")
+
+X_XOR = np.array([[0, 0], [0, 1], [1, 0], [1, 1]], dtype=float)
+Y_XOR = np.array([[0], [1], [1], [0]], dtype=float)
+
+
+def init_phases(n_inputs, n_hidden, n_output=1, seed=42):
+    """Phases drawn uniformly from [-pi, pi), as (rand - 0.5) * 2 * pi"""
+    rng = np.random.default_rng(seed)
+
+    def draw(*shape):
+        return (rng.random(shape) - 0.5) * 2 * math.pi
+    return {"phases_ih": draw(n_inputs, n_hidden), "phases_ho": draw(n_hidden, n_output),
+            "bias_h": draw(n_hidden), "bias_o": draw(n_output)}
+
+
+def forward(params, X, theta=OMEGA * T_EVAL):
+    """Hidden activations (B, H) and sigmoid outputs (B, O) for inputs X (B, I)"""
+    hidden = np.tanh(X @ np.sin(theta + params["phases_ih"]) + np.sin(theta + params["bias_h"]))
+    out = hidden @ np.sin(theta + params["phases_ho"]) + np.sin(theta + params["bias_o"])
+    return hidden, 1 / (1 + np.exp(-out))
+
+
+def loss(params, X, Y, theta=OMEGA * T_EVAL):
+    """Mean over samples of the squared error, summed over outputs"""
+    return float(np.sum((forward(params, X, theta)[1] - Y) ** 2) / len(X))
+
+
+def gradients(params, X, Y, theta=OMEGA * T_EVAL):
+    """Loss and exact gradients of every phase array, for the batch at once"""
+    hidden, y = forward(params, X, theta)
+    err = y - Y
+    d_out = 2 * err * y * (1 - y) / len(X)             # (B, O)
+    d_pre = (d_out @ np.sin(theta + params["phases_ho"]).T) * (1 - hidden ** 2)   # (B, H)
+    grads = {
+        "phases_ih": (X.T @ d_pre) * np.cos(theta + params["phases_ih"]),
+        "phases_ho": (hidden.T @ d_out) * np.cos(theta + params["phases_ho"]),
+        "bias_h": d_pre.sum(axis=0) * np.cos(theta + params["bias_h"]),
+        "bias_o": d_out.sum(axis=0) * np.cos(theta + params["bias_o"]),
+    }
+    return float(np.sum(err ** 2) / len(X)), grads
+
+
+def train(X, Y, params, epochs=EPOCHS, learning_rate=LEARNING_RATE, trained=("phases_ih",),
+          theta=OMEGA * T_EVAL, report=0):
+    """Full-batch gradient descent on the phases named in `trained`
+
+    The default trains only the input-to-hidden phases, as the Octave
+    script does; pass trained=PHASES to learn every phase. Returns the
+    updated phases and the per-epoch loss history.
+    """
+    params = {name: np.array(value, dtype=float) for name, value in params.items()}
+    history = np.empty(epochs)
+    for epoch in range(epochs):
+        history[epoch], grads = gradients(params, X, Y, theta)
+        for name in trained:
+            params[name] -= learning_rate * grads[name]
+        if report and (epoch + 1) % report == 0:
+            print(f"  Epoch {epoch + 1:4d}: Loss = {history[epoch]:.6f}")
+    return params, history
+
+
+def train_numeric(X, Y, params, epochs=EPOCHS, learning_rate=LEARNING_RATE, delta=DELTA,
+                  theta=OMEGA * T_EVAL, report=0):
+    """Reference port of the Octave finite-difference trainer (scalar loops)
+
+    Forward differences on the input-to-hidden phases only, one full
+    forward pass per phase per sample. Single output, like the script.
+    """
+    ih = [list(map(float, row)) for row in params["phases_ih"]]
+    ho = [float(v) for v in np.ravel(params["phases_ho"])]
+    bh = [float(v) for v in params["bias_h"]]
+    bo = float(np.ravel(params["bias_o"])[0])
+    n_inputs, n_hidden = len(ih), len(bh)
+    samples = [(list(map(float, x)), float(np.ravel(t)[0])) for x, t in zip(X, Y)]
+
+    def predict(x):
+        output = 0.0
+        for h in range(n_hidden):
+            sig = 0.0
+            for i in range(n_inputs):
+                sig += x[i] * math.sin(theta + ih[i][h])
+            sig += math.sin(theta + bh[h])
+            output += math.tanh(sig) * math.sin(theta + ho[h])
+        output += math.sin(theta + bo)
+        return 1 / (1 + math.exp(-output))
+
+    history = np.empty(epochs)
+    for epoch in range(epochs):
+        total_loss = 0.0
+        grad_ih = [[0.0] * n_hidden for _ in range(n_inputs)]
+        for x, target in samples:
+            error = predict(x) - target
+            total_loss += error ** 2
+            for i in range(n_inputs):
+                for h in range(n_hidden):
+                    ih[i][h] += delta
+                    error_temp = predict(x) - target
+                    grad_ih[i][h] += (error_temp ** 2 - error ** 2) / delta
+                    ih[i][h] -= delta
+        history[epoch] = total_loss / len(samples)
+        for i in range(n_inputs):
+            for h in range(n_hidden):
+                ih[i][h] -= learning_rate * grad_ih[i][h] / len(samples)
+        if report and (epoch + 1) % report == 0:
+            print(f"  Epoch {epoch + 1:4d}: Loss = {history[epoch]:.6f}")
+    updated = dict(params, phases_ih=np.array(ih))
+    return updated, history
+
+
+if __name__ == "__main__":
+    print("=== LISSAJOUS NEURAL NETWORK (analytic gradients) ===\n")
+    phases = init_phases(2, 4)
+    print(f"Training for {EPOCHS} epochs...")
+    phases, history = train(X_XOR, Y_XOR, phases, report=100)
+    print("\nTraining complete!\n")
+    _, predictions = forward(phases, X_XOR)
+    for x, t, p in zip(X_XOR, Y_XOR[:, 0], predictions[:, 0]):
+        print(f"  [{x[0]:.0f}, {x[1]:.0f}] -> {p:.3f} (target {t:.0f})")
@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+Streaming Lissajous estimator for live X/Y sample streams
+memristor_vs_lissajous.m reads a figure off finished arrays: it fits the
+current's phase against the drive and compares loop shapes. Here the
+same readout runs continuously on blocks of X/Y samples (e.g. from an
+ADC), keeping sliding-window estimates of
+
+    fx, fy, ratio   frequencies from Schmitt-triggered level crossings,
+                    and fy/fx as the nearest small fraction p/q; the
+                    band widens with the noise level (from squared
+                    second differences) so noise cannot chatter it
+    phase           at 1:1, atan2 of the shoelace and covariance sums
+                    (the fundamental of y relative to x); otherwise from
+                    the latest crossing times
+    area, openness  loop area per cycle (sum of |lobe areas| between
+                    crossings of x), and that area over pi a_x a_y:
+                    |sin(phase)| for an ellipse, 0 for a line
+    pinch           the jump in y between successive crossings of x's
+                    centre, over 2 a_y: 0 for a pinched memristor loop,
+                    |sin(phase)| for an ellipse
+
+Every estimate is a running sum updated as samples enter and leave the
+window (O(1) per sample), computed per block with NumPy. Per-sample terms
+live in a ring buffer of one window, and crossings in deques pruned to
+the window, so memory does not grow with the stream. Sums are re-added
+from the ring each time it wraps, which keeps rounding drift bounded.
+"""
+import collections
+import math
+from fractions import Fraction
+
+import numpy as np
+
+WINDOW = 0.1                   # s of history behind every estimate
+HYSTERESIS = 0.1               # Schmitt thresholds at centre +/- this x amplitude
+NOISE_SIGMAS = 5               # ... widened to at least this x the noise level
+MAX_DENOMINATOR = 8            # largest q in the p/q frequency ratio
+OPEN_MIN = 0.005               # openness below this: a line (memristor loops are thin)
+PINCH_MAX = 0.1                # pinch below this (and open): a pinched loop
+RATIO_TOLERANCE = 0.01         # relative distance from p/q to count as locked
+
+# Columns of the per-sample term ring
+X, Y, XX, YY, XY, CROSS, NX, NY = range(8)
+
+
+class _Crossings:
+    """Schmitt trigger on one channel, with interpolated level-crossing times
+
+    A crossing is counted when the signal leaves the hysteresis band on
+    the other side; its time is where the signal last passed the centre
+    level before that. Up-crossing times within the window give the
+    frequency.
+    """
+
+    def __init__(self):
+        self.state = 0              # +1 above the band, -1 below, 0 not yet known
+        self.last_time = None       # time (samples) of the latest centre crossing
+        self.last_other = np.nan    # the other channel's value there
+        self.last_end = None        # block position just after it, if in the latest block
+        self.up = collections.deque()
+
+    def update(self, ext, first, level, half_band, other=None):
+        """Flips in ext (previous sample + block), first being ext[0]'s sample index
+
+        Returns, per flip, the time of its centre crossing, its direction,
+        the block position just after that crossing (-1 if it was in an
+        earlier block) and `other` interpolated at the crossing (if given).
+        """
+        events = (ext[1:] > level + half_band).astype(np.int8)
+        events -= ext[1:] < level - half_band
+        # Only samples outside the band can change the state
+        outside = np.flatnonzero(events)
+        sides = events[outside]
+        before = np.concatenate(([self.state], sides[:-1])).astype(np.int8)
+        flipped = (sides != before) & (before != 0)
+        flips, directions = outside[flipped] + 1, sides[flipped]
+        if len(sides):
+            self.state = int(sides[-1])
+        above = ext > level
+        cross = np.flatnonzero(above[1:] != above[:-1])
+        frac = (level - ext[cross]) / (ext[cross + 1] - ext[cross])
+        # The centre crossing of each flip is the last one at or before it
+        # (or, before any in this block, the last one carried over)
+        earlier = self.last_time if self.last_time is not None else np.nan
+        if not len(cross):
+            self.last_end = None
+            return (np.full(len(flips), earlier), directions, np.full(len(flips), -1),
+                    np.full(len(flips), self.last_other))
+        which = np.searchsorted(cross + 1, flips, side="right") - 1
+        picked = np.maximum(which, 0)
+        times = np.where(which >= 0, first + cross[picked] + frac[picked], earlier)
+        ends = np.where(which >= 0, cross[picked] + 1, -1)
+        self.last_time = float(first + cross[-1] + frac[-1])
+        self.last_end = int(cross[-1]) + 1
+        values = None
+        if other is not None:
+            at_cross = other[cross] + frac * (other[cross + 1] - other[cross])
+            values = np.where(which >= 0, at_cross[picked], self.last_other)
+            self.last_other = float(at_cross[-1])
+        return times, directions, ends, values
+
+
+class LissajousStream:
+    """Sliding-window Lissajous estimates over an unbounded X/Y stream
+
+    Feed blocks of any length with stream.update(x_block, y_block) and
+    read stream.estimate() whenever a reading is needed.
+    """
+
+    def __init__(self, fs, window=WINDOW, hysteresis=HYSTERESIS):
+        self.fs = float(fs)
+        self.size = int(round(window * fs))
+        if self.size < 2:
+            raise ValueError("The window must hold at least two samples")
+        self.hysteresis = hysteresis
+        self.ring = np.zeros((8, self.size))
+        self.sums = np.zeros(8)
+        self.pos = 0
+        self.count = 0
+        self.prev = None            # last sample (x, y)
+        self.before = None          # the sample before that (x, y)
+        self.edge = None            # sample just before the window (x, y)
+        self.x_cross, self.y_cross = _Crossings(), _Crossings()
+        self.lobe = 0.0             # area of the lobe in progress
+        self.lobe_y = None          # y where the lobe in progress began
+        self.tail = 0.0             # area since x last crossed its centre
+        self.lobes = collections.deque()     # (time, area, |y step| at its closing crossing)
+        self.lobe_sums = np.zeros(3)         # sum of |area|, area, |y step|
+
+    def _push(self, terms, ex, ey):
+        """Add per-sample terms to the ring and the window sums"""
+        m = terms.shape[1]
+        if m >= self.size:
+            self.ring[:] = terms[:, -self.size:]
+            self.pos = 0
+            self.sums = self.ring.sum(axis=1)
+            self.edge = (ex[m - self.size], ey[m - self.size])
+            self.count += m
+            return
+        done = 0
+        while done < m:
+            stop = min(self.pos + m - done, self.size)
+            part = terms[:, done:done + stop - self.pos]
+            leaving = self.ring[:, self.pos:stop]
+            if self.count >= self.size:
+                self.edge = (leaving[X, -1], leaving[Y, -1])
+            self.sums += part.sum(axis=1) - leaving.sum(axis=1)
+            leaving[:] = part
+            self.count += part.shape[1]
+            done += part.shape[1]
+            self.pos = stop % self.size
+            if self.pos == 0:
+                self.sums = self.ring.sum(axis=1)
+
+    @staticmethod
+    def _levels(s):
+        """Centres, amplitudes and noise levels from per-sample means of the terms
+
+        White noise of variance v adds 6v to the mean squared second
+        difference (a sampled sine adds only (w dt)^4 of its own power),
+        and v to the variance, which is removed from the amplitudes.
+        """
+        noise_x, noise_y = s[NX] / 6, s[NY] / 6
+        ax = math.sqrt(2 * max(s[XX] - s[X] ** 2 - noise_x, 0.0))
+        ay = math.sqrt(2 * max(s[YY] - s[Y] ** 2 - noise_y, 0.0))
+        return s[X], s[Y], ax, ay, math.sqrt(noise_x), math.sqrt(noise_y)
+
+    def _centre(self, terms):
+        """Centre levels and Schmitt half-bands from the window, or from the block at the start"""
+        n = min(self.count, self.size)
+        s = self.sums / n if n >= 2 else terms.mean(axis=1)
+        cx, cy, ax, ay, sx, sy = self._levels(s)
+        # Wide enough that noise cannot flip the trigger, narrow enough to be crossed
+        band_x = min(max(self.hysteresis * ax, NOISE_SIGMAS * sx), 0.5 * ax)
+        band_y = min(max(self.hysteresis * ay, NOISE_SIGMAS * sy), 0.5 * ay)
+        return cx, cy, band_x, band_y
+
+    def update(self, x, y):
+        """Consume one block of X and Y samples (call estimate() for a reading)"""
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        if x.shape != y.shape or x.ndim != 1:
+            raise ValueError("x and y must be 1-D blocks of the same length")
+        if not len(x):
+            return
+        if self.prev is None:
+            self.prev = self.before = self.edge = (x[0], y[0])
+        # Two samples carried from the last block: ex, ey start at the previous one
+        wx = np.concatenate(([self.before[0], self.prev[0]], x))
+        wy = np.concatenate(([self.before[1], self.prev[1]], y))
+        ex, ey = wx[1:], wy[1:]
+        first = self.count - 1
+
+        terms = np.empty((8, len(x)))
+        terms[X], terms[Y] = x, y
+        np.multiply(x, x, out=terms[XX])
+        np.multiply(y, y, out=terms[YY])
+        np.multiply(x, y, out=terms[XY])
+        cross = terms[CROSS]
+        np.multiply(ex[:-1], y, out=cross)
+        cross -= x * ey[:-1]
+        for column, w in ((NX, wx), (NY, wy)):
+            d2 = terms[column]
+            np.subtract(w[2:], w[1:-1], out=d2)
+            d2 -= w[1:-1] - w[:-2]
+            d2 *= d2
+        cx, cy, band_x, band_y = self._centre(terms)
+        self._push(terms, ex, ey)
+        self.before, self.prev = (ex[-2], ey[-2]), (x[-1], y[-1])
+
+        times, directions, _, _ = self.y_cross.update(ey, first, cy, band_y)
+        self._record(self.y_cross, times[directions > 0])
+        times, directions, ends, values = self.x_cross.update(ex, first, cx, band_x, ey)
+        self._record(self.x_cross, times[directions > 0])
+        self._lobes(ex, ey, cx, cy, cross, times, ends, values)
+
+    def _record(self, channel, times):
+        channel.up.extend(times[np.isfinite(times)].tolist())
+        oldest = self.count - 1 - self.size
+        while channel.up and channel.up[0] < oldest:
+            channel.up.popleft()
+
+    def _lobes(self, ex, ey, cx, cy, cross, times, ends, values):
+        """Close a lobe at every flip of x: shoelace area since the last one, and
+        how far y at its crossing is from y at the last (0 where the loop pinches)"""
+        # Running shoelace sum about the centre (cx, cy), from the raw terms
+        cumulative = np.empty(len(ex))
+        cumulative[0] = 0.0
+        np.cumsum(cross, out=cumulative[1:])
+        cumulative -= cx * (ey - ey[0])
+        cumulative += cy * (ex - ex[0])
+        cumulative *= 0.5
+        start = 0
+        for time, end, value in zip(times, ends, values):
+            if end < 0:
+                # Crossed in an earlier block: the area since then opens the next lobe
+                area, self.lobe = self.lobe - self.tail, self.tail
+            else:
+                area = self.lobe + cumulative[end] - cumulative[start]
+                self.lobe, start = 0.0, end
+            if not math.isfinite(time):
+                continue
+            if self.lobe_y is not None:
+                step = abs(value - self.lobe_y)
+                self.lobes.append((time, area, step))
+                self.lobe_sums += (abs(area), area, step)
+            self.lobe_y = value
+        self.lobe += cumulative[-1] - cumulative[start]
+        last = self.x_cross.last_end
+        self.tail = cumulative[-1] - cumulative[last] if last is not None else self.tail + cumulative[-1]
+        oldest = self.count - 1 - self.size
+        while self.lobes and self.lobes[0][0] < oldest:
+            time, area, step = self.lobes.popleft()
+            self.lobe_sums -= (abs(area), area, step)
+
+    @staticmethod
+    def _frequency(channel, fs):
+        up = channel.up
+        if len(up) < 2 or up[-1] <= up[0]:
+            return float("nan")
+        return (len(up) - 1) / (up[-1] - up[0]) * fs
+
+    def estimate(self):
+        """Current sliding-window estimates (a dict; NaN until there is enough signal)
+
+        Keys: fx, fy (Hz), ratio (fy/fx), ratio_pq ((p, q) or None),
+        phase_deg (y relative to x), amplitude_x, amplitude_y, area and
+        signed_area (per cycle of x), openness, pinch, shape ("line",
+        "ellipse", "pinched", "p:q" or "unknown"), samples (in the window).
+        """
+        n = min(self.count, self.size)
+        nan = float("nan")
+        fx, fy = self._frequency(self.x_cross, self.fs), self._frequency(self.y_cross, self.fs)
+        result = {"fx": fx, "fy": fy, "ratio": fy / fx if fx > 0 else nan, "ratio_pq": None,
+                  "phase_deg": nan, "amplitude_x": nan, "amplitude_y": nan, "area": nan,
+                  "signed_area": nan, "openness": nan, "pinch": nan, "shape": "unknown", "samples": n}
+        if n < 2:
+            return result
+        s = self.sums / n
+        _, _, ax, ay, _, _ = self._levels(s)
+        result["amplitude_x"], result["amplitude_y"] = ax, ay
+        if not math.isfinite(result["ratio"]):
+            return result
+        pq = Fraction(result["ratio"]).limit_denominator(MAX_DENOMINATOR)
+        if abs(pq - result["ratio"]) <= RATIO_TOLERANCE * result["ratio"]:
+            result["ratio_pq"] = (pq.numerator, pq.denominator)
+        if result["ratio_pq"] == (1, 1):
+            # Per sample, the centred shoelace term is -a_x a_y sin(phase) sin(w dt)
+            # and the covariance a_x a_y cos(phase) / 2
+            cross = (self.sums[CROSS] - s[X] * (self.prev[1] - self.edge[1])
+                     + s[Y] * (self.prev[0] - self.edge[0])) / n
+            step = 2 * math.pi * fx / self.fs
+            cov = s[XY] - s[X] * s[Y]
+            result["phase_deg"] = math.degrees(math.atan2(-cross / math.sin(step), 2 * cov))
+        elif self.x_cross.up and self.y_cross.up:
+            lag = (self.x_cross.up[-1] - self.y_cross.up[-1]) / self.fs
+            result["phase_deg"] = (math.degrees(2 * math.pi * fy * lag) + 180) % 360 - 180
+        lobes = len(self.lobes)
+        if lobes and ax > 0 and ay > 0:
+            # Two crossings of x, so two lobes, per cycle of x
+            cycles = lobes / 2
+            result["area"] = self.lobe_sums[0] / cycles
+            result["signed_area"] = self.lobe_sums[1] / cycles
+            result["openness"] = result["area"] / (math.pi * ax * ay)
+            result["pinch"] = self.lobe_sums[2] / lobes / (2 * ay)
+        if result["ratio_pq"] not in (None, (1, 1)):
+            result["shape"] = "%d:%d" % (pq.denominator, pq.numerator)
+        elif result["ratio_pq"] == (1, 1) and math.isfinite(result["openness"]):
+            if result["openness"] < OPEN_MIN:
+                result["shape"] = "line"
+            elif result["pinch"] < PINCH_MAX:
+                result["shape"] = "pinched"
+            else:
+                result["shape"] = "ellipse"
+        return result
+
+
+def lissajous_blocks(fx, fy, phase_deg=0.0, fs=100_000, duration=1.0, block=4096, amplitude=(1.0, 1.0),
+                     noise=0.0, seed=0):
+    """Yield (x, y) blocks of x = A sin(2 pi fx t), y = B sin(2 pi fy t + phase), plus noise"""
+    rng = np.random.default_rng(seed)
+    total = int(round(duration * fs))
+    phase = math.radians(phase_deg)
+    for start in range(0, total, block):
+        t = np.arange(start, min(start + block, total)) / fs
+        x = amplitude[0] * np.sin(2 * math.pi * fx * t)
+        y = amplitude[1] * np.sin(2 * math.pi * fy * t + phase)
+        if noise:
+            x = x + rng.normal(0.0, noise, len(t))
+            y = y + rng.normal(0.0, noise, len(t))
+        yield x, y
+
+
+def estimate_lines(estimate):
+    """One-line summary of an estimate dict"""
+    pq = estimate["ratio_pq"]
+    return (f"fx {estimate['fx']:8.2f} Hz  fy {estimate['fy']:8.2f} Hz  "
+            f"ratio {'%d/%d' % pq if pq else '%.4f' % estimate['ratio']:>7}  "
+            f"phase {estimate['phase_deg']:7.2f} deg  openness {estimate['openness']:5.3f}  "
+            f"pinch {estimate['pinch']:5.3f}  {estimate['shape']}")
+
+
+if __name__ == "__main__":
+    fs = 100_000
+    print("=== STREAMING LISSAJOUS ESTIMATOR ===\n")
+    for label, fx, fy, phase in [("line", 50, 50, 0), ("ellipse 30 deg", 50, 50, 30),
+                                 ("circle", 50, 50, 90), ("1:2", 50, 100, 45), ("2:3", 200, 300, 0)]:
+        stream = LissajousStream(fs)
+        for x, y in lissajous_blocks(fx, fy, phase, fs=fs, duration=0.5, noise=0.01):
+            stream.update(x, y)
+        print(f"{label:<15} {estimate_lines(stream.estimate())}")
+
+    from memristor_sim import simulate_batch, sine_input
+    dt = 1 / fs
+    vin = sine_input(f=50, amplitude=1.0, t_end=0.5, dt=dt)
+    result = simulate_batch(vin, dt, {"R_ON": 100, "R_OFF": 16000, "D": 10e-9, "MU_V": 1e-10})
+    stream = LissajousStream(fs)
+    for start in range(0, len(vin), 4096):
+        stream.update(vin[start:start + 4096], result["I"][start:start + 4096, 0])
+    print(f"{'memristor I-V':<15} {estimate_lines(stream.estimate())}")
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Streaming Markdown-to-slides importer for the ODP generator
+Reads a Markdown file line by line and turns it into slides as it goes:
+#, ## and ### headings start slides, bullets, numbered lists, tables and
+code become content lines, and image links are resolved to local files
+for IMAGES. Each finished slide is compiled straight into a compact
+slide_templates.Slide, so no parse tree is ever held.
+
+Usage: python3 markdown_slides.py README.md [-o readme.odp]
+"""
+import argparse
+import os
+import re
+
+from slide_templates import compile_slide
+
+SLIDE_LEVELS = 3          # '#' to '###' start a new slide
+MAX_LINES = 14            # longer sections continue on extra slides
+WRAP_CHARS = 90           # a content line this long wraps onto a second row
+
+HEADING = re.compile(r'^(#{1,6})\s+(.*?)\s*#*\s*$')
+FENCE = re.compile(r'^\s*(```|~~~)')
+RULE = re.compile(r'^\s*([-*_])(\s*\1){2,}\s*$')
+BULLET = re.compile(r'^(\s*)[-*+]\s+(.*)$')
+NUMBERED = re.compile(r'^(\s*)(\d+)[.)]\s+(.*)$')
+TABLE_ROW = re.compile(r'^\s*\|(.*)\|\s*$')
+TABLE_SEPARATOR = re.compile(r'^\s*\|?(\s*:?-+:?\s*\|)+\s*(:?-+:?\s*)?$')
+IMAGE = re.compile(r'!\[([^\]]*)\]\(\s*<?([^)\s>]+)>?(?:\s+"[^"]*")?\s*\)')
+LINK = re.compile(r'\[([^\]]*)\]\([^)]*\)')
+STRONG = re.compile(r'(\*\*|__)(?=\S)(.+?)(?<=\S)\1')
+CODE_SPAN = re.compile(r'`([^`]*)`')
+# Links to files in this repository as rendered by GitHub
+GITHUB_FILE = re.compile(r'^https?://(?:github\.com/[^/]+/[^/]+/(?:blob|raw)|raw\.githubusercontent\.com/[^/]+/[^/]+)/[^/]+/(.+)$')
+
+
+def inline_text(text):
+    """Strip inline Markdown: links keep their text, emphasis markers go"""
+    text = LINK.sub(r'\1', text)
+    text = STRONG.sub(r'\2', text)
+    return CODE_SPAN.sub(r'\1', text).strip()
+
+
+def resolve_image(src, base_dir):
+    """Local path for an image link, or None if it is not available here"""
+    match = GITHUB_FILE.match(src)
+    if match:
+        src = match.group(1)
+    elif re.match(r'^[a-z]+://', src):
+        return None
+    path = os.path.normpath(os.path.join(base_dir, src.split('#')[0].split('?')[0]))
+    return os.path.relpath(path) if os.path.isfile(path) else None
+
+
+def iter_markdown_slides(lines, base_dir='.', images=None, max_lines=MAX_LINES):
+    """Yield slide dicts from Markdown lines, one slide at a time
+
+    A slide shows the first local image it references, and only those
+    are added to `images` (key -> path); later ones on the same slide
+    become "[image: ...]" lines.
+    """
+    if images is None:
+        images = {}
+    title, content, image = None, [], None
+    part = 1
+    rows = 0
+    in_code = False
+
+    def flush(final=True):
+        nonlocal content, image, part, rows
+        while content and not content[-1]:
+            content.pop()
+        slide = None
+        if title is not None and (content or image or part == 1):
+            shown = title if part == 1 else f"{title} (cont. {part})"
+            slide = {"title": shown, "content": content, "image": image}
+        content, image, rows = [], None, 0
+        part = 1 if final else part + 1
+        return slide
+
+    def add(line):
+        nonlocal title, rows
+        if title is None:
+            title = "Introduction"
+        if not line and (not content or not content[-1]):
+            return None
+        content.append(line)
+        rows += 1 + len(line) // WRAP_CHARS
+        if rows >= max_lines:
+            return flush(final=False)
+        return None
+
+    for raw in lines:
+        line = raw.rstrip('\r\n')
+        if FENCE.match(line):
+            in_code = not in_code
+            continue
+        if in_code:
+            slide = add("    " + line.expandtabs(4))
+        elif HEADING.match(line) and len(HEADING.match(line).group(1)) <= SLIDE_LEVELS:
+            slide = flush()
+            title = inline_text(HEADING.match(line).group(2)) or "Untitled"
+        elif HEADING.match(line):
+            slide = add(inline_text(HEADING.match(line).group(2)))
+        elif RULE.match(line) or TABLE_SEPARATOR.match(line) and '|' in line:
+            slide = add("-" * 44) if TABLE_SEPARATOR.match(line) and '|' in line else None
+        elif IMAGE.search(line):
+            slide = None
+            for alt, src in IMAGE.findall(line):
+                path = resolve_image(src, base_dir)
+                if path is None:
+                    slide = add(f"[image: {alt or os.path.basename(src)}]") or slide
+                    continue
+                if image is None:
+                    image = path
+                    images.setdefault(path, path)
+                else:
+                    slide = add(f"[image: {alt or os.path.basename(path)}]") or slide
+        elif TABLE_ROW.match(line):
+            cells = [inline_text(cell) for cell in TABLE_ROW.match(line).group(1).split('|')]
+            slide = add(" | ".join(cells))
+        elif BULLET.match(line):
+            indent, text = BULLET.match(line).groups()
+            level = len(indent.expandtabs(4)) // 2
+            text = inline_text(text)
+            slide = add(("   " * level + "- " if level else "• ") + text if text else "")
+        elif NUMBERED.match(line):
+            indent, number, text = NUMBERED.match(line).groups()
+            level = len(indent.expandtabs(4)) // 2
+            slide = add("   " * level + f"{number}. " + inline_text(text))
+        else:
+            slide = add(inline_text(line))
+        if slide is not None:
+            yield slide
+    slide = flush()
+    if slide is not None:
+        yield slide
+
+
+def import_markdown(path, max_lines=MAX_LINES, errors='replace'):
+    """Read a Markdown file into (slides, images) ready for create_odp()
+
+    Slides come back compiled (slide_templates.Slide); images maps image
+    keys to the local files the slides reference.
+    """
+    images = {}
+    base_dir = os.path.dirname(os.path.abspath(path))
+    with open(path, encoding='utf-8') as f:
+        slides = [compile_slide(slide, errors)
+                  for slide in iter_markdown_slides(f, base_dir, images, max_lines)]
+    return slides, images
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build an ODP deck from a Markdown file")
+    parser.add_argument("markdown", help="Markdown file to import")
+    parser.add_argument("-o", "--output", help="ODP file to write (default: <markdown>.odp)")
+    parser.add_argument("--max-lines", type=int, default=MAX_LINES, help="content lines per slide")
+    args = parser.parse_args()
+
+    from create_presentation_final import create_odp
+    slides, images = import_markdown(args.markdown, args.max_lines)
+    output = args.output or os.path.splitext(args.markdown)[0] + ".odp"
+    create_odp(slides, images, output)
+
+
+if __name__ == "__main__":
+    main()
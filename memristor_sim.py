@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Memristor linear-drift simulation (Python port of SIMULATE_MEMRISTOR.m)
+simulate_memristor() is a line-for-line port of the Octave function for
+one device. simulate_batch() advances a whole batch of devices together:
+R_ON, R_OFF, D, MU_V and w0 may be arrays, and every time step is a
+handful of NumPy operations across the batch, with the same update order
+and boundary clamping as the Octave loop.
+
+Run directly to reproduce run_sim.m (50 Hz, 1 V, 20 ms, dt = 1 us).
+"""
+import numpy as np
+
+# Defaults from SIMULATE_MEMRISTOR.m
+DEFAULTS = {
+    "R_ON": 100.0,       # Ohms
+    "R_OFF": 10000.0,    # Ohms
+    "D": 10e-9,          # meters
+    "MU_V": 1e-10,       # ion mobility (model units as given)
+    "w0": 0.5 * 10e-9,   # meters (0.5 * the default D)
+    "time0": 0.0,
+}
+
+RECORDED = ("I", "R", "w")
+
+
+def _params(params):
+    """Fill in defaults like getfield_with_default
+
+    As in the Octave, w0 defaults to half the default D, not half of the
+    D passed in; give w0 explicitly when changing D.
+    """
+    merged = dict(DEFAULTS, **(params or {}))
+    if merged.get("w0") is None:
+        merged["w0"] = DEFAULTS["w0"]
+    return merged
+
+
+def _validate(dt, R_ON, R_OFF, D):
+    if dt <= 0:
+        raise ValueError("dt must be > 0.")
+    if np.any(np.asarray(D) <= 0):
+        raise ValueError("D must be > 0.")
+    if np.any(np.asarray(R_ON) <= 0) or np.any(np.asarray(R_OFF) <= 0):
+        raise ValueError("R_ON and R_OFF must be > 0.")
+
+
+def sine_input(f=50.0, amplitude=1.0, t_end=0.02, dt=1e-6):
+    """Input waveform used by run_sim.m: amplitude * sin(2*pi*f*t), t = 0:dt:t_end"""
+    t = np.arange(int(round(t_end / dt)) + 1) * dt
+    return amplitude * np.sin(2 * np.pi * f * t)
+
+
+def simulate_memristor(input_voltage, dt, params=None):
+    """Single-device reference port of SIMULATE_MEMRISTOR (scalar loop)"""
+    p = _params(params)
+    R_ON, R_OFF, D, MU_V = (float(p[k]) for k in ("R_ON", "R_OFF", "D", "MU_V"))
+    w = float(p["w0"])
+    _validate(dt, R_ON, R_OFF, D)
+
+    vin = [float(v) for v in np.ravel(input_voltage)]
+    n = len(vin)
+    t_arr, i_arr, r_arr, w_arr = [0.0] * n, [0.0] * n, [0.0] * n, [0.0] * n
+    time = float(p["time0"])
+    for k, voltage_in in enumerate(vin):
+        resistance = R_ON * (w / D) + R_OFF * (1 - (w / D))
+        current = voltage_in / resistance
+        dw_dt = MU_V * (R_ON / D) * current
+        w_new = w + dw_dt * dt
+        if w_new > D:
+            w = D
+        elif w_new < 0:
+            w = 0.0
+        else:
+            w = w_new
+        t_arr[k] = time
+        i_arr[k] = current
+        r_arr[k] = resistance
+        w_arr[k] = w
+        time = time + dt
+
+    return {
+        "time": np.array(t_arr), "V": np.array(vin), "I": np.array(i_arr),
+        "R": np.array(r_arr), "w": np.array(w_arr),
+        "params": {"R_ON": R_ON, "R_OFF": R_OFF, "D": D, "MU_V": MU_V,
+                   "w0": float(p["w0"]), "time0": float(p["time0"]), "dt": dt},
+    }
+
+
+def simulate_batch(input_voltage, dt, params=None, record=RECORDED, stride=1):
+    """Simulate many devices at once
+
+    `params` entries (R_ON, R_OFF, D, MU_V, w0) may be scalars or arrays
+    that broadcast to one value per device. `input_voltage` is (N,) to
+    drive every device with the same waveform, or (N, devices). Results
+    hold time and V (N,) and the `record`ed traces ("I", "R", "w") as
+    (N, devices) arrays, keeping every `stride`-th sample; pass record=()
+    for final states only. result["w_final"] is always the last state.
+    """
+    p = _params(params)
+    vin = np.asarray(input_voltage, dtype=float)
+    R_ON, R_OFF, D, MU_V, w0 = np.broadcast_arrays(
+        *(np.atleast_1d(np.asarray(p[k], dtype=float)) for k in ("R_ON", "R_OFF", "D", "MU_V", "w0")))
+    if vin.ndim == 2:
+        R_ON, R_OFF, D, MU_V, w0 = np.broadcast_arrays(R_ON, R_OFF, D, MU_V, w0, vin[0])[:5]
+    _validate(dt, R_ON, R_OFF, D)
+    unknown = set(record) - set(RECORDED)
+    if unknown:
+        raise ValueError(f"Cannot record {sorted(unknown)}; choose from {RECORDED}")
+
+    devices = R_ON.shape[0]
+    steps = vin.shape[0]
+    kept = range(0, steps, stride)
+    traces = {name: np.empty((len(kept), devices)) for name in record}
+
+    w = w0.copy()
+    gain = MU_V * (R_ON / D) * dt           # dw = MU_V * (R_ON/D) * I * dt
+    slope = (R_ON - R_OFF) / D              # R = R_OFF + (R_ON - R_OFF) * w/D
+    resistance = np.empty(devices)
+    current = np.empty(devices)
+    dw = np.empty(devices)
+    record_i, record_r, record_w = (traces.get(name) for name in RECORDED)
+    for k in range(steps):
+        np.multiply(slope, w, out=resistance)
+        resistance += R_OFF
+        np.divide(vin[k], resistance, out=current)
+        np.multiply(gain, current, out=dw)
+        w += dw
+        # Boundary conditions: 0 <= w <= D (cheaper than np.clip per step)
+        np.minimum(w, D, out=w)
+        np.maximum(w, 0.0, out=w)
+        if k % stride == 0:
+            row = k // stride
+            if record_i is not None:
+                record_i[row] = current
+            if record_r is not None:
+                record_r[row] = resistance
+            if record_w is not None:
+                record_w[row] = w
+
+    time0 = float(p["time0"])
+    result = {
+        "time": time0 + np.arange(steps)[::stride] * dt,
+        "V": vin[::stride],
+        "w_final": w,
+        "params": {"R_ON": R_ON, "R_OFF": R_OFF, "D": D, "MU_V": MU_V, "w0": w0,
+                   "time0": time0, "dt": dt},
+    }
+    result.update(traces)
+    return result
+
+
+def summary_lines(result, device=None):
+    """run_sim.m's printed summary as slide content lines"""
+    def column(name):
+        data = np.asarray(result[name])
+        return data[:, device] if device is not None and data.ndim == 2 else data
+    t, v, i, r, w = (column(name) for name in ("time", "V", "I", "R", "w"))
+    return [
+        f"Number of points: {len(t)}",
+        f"Time range: {t.min():.4f} to {t.max():.4f} seconds",
+        f"Voltage range: {v.min():.4f} to {v.max():.4f} V",
+        f"Current range: {i.min():.6e} to {i.max():.6e} A",
+        f"Resistance range: {r.min():.2f} to {r.max():.2f} Ohms",
+        f"Internal state (w) range: {w.min():.4e} to {w.max():.4e} m",
+    ]
+
+
+def batch_slide(result, title="Memristor Batch Simulation (Linear Drift)", image=None):
+    """Slide dict summarising a batch run, ready for create_odp()"""
+    r = np.asarray(result["R"])
+    ratio = r.max(axis=0) / r.min(axis=0)
+    devices = r.shape[1] if r.ndim == 2 else 1
+    return {
+        "title": title,
+        "content": [
+            f"• Devices simulated: {devices}",
+            f"• Time steps: {len(result['time'])} (dt = {result['params']['dt']:.1e} s)",
+            f"• R_max/R_min: {ratio.min():.2f} to {ratio.max():.2f} (median {np.median(ratio):.2f})",
+            f"• Final w/D: {np.min(result['w_final'] / result['params']['D']):.3f} to "
+            f"{np.max(result['w_final'] / result['params']['D']):.3f}",
+        ],
+        "image": image,
+    }
+
+
+if __name__ == "__main__":
+    dt = 1e-6
+    vin = sine_input(f=50, amplitude=1.0, t_end=0.02, dt=dt)
+    res = simulate_batch(vin, dt, {"R_ON": 100, "R_OFF": 10000, "D": 10e-9, "MU_V": 1e-10})
+    print("\nSimulation completed!")
+    for line in summary_lines(res, device=0):
+        print(line)
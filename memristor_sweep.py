@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Parameter sweeps of the windowed memristor model, with a result cache
+Takes a grid or random design over the SIMULATE_MEMRISTOR_WINDOWED.m
+parameters (R_ON, R_OFF, D, MU_V, w0, p), runs the points on a process
+pool and reduces each run to summary metrics:
+
+    loop_area   mean |∮ I dV| of the complete hysteresis lobes (W)
+    r_ratio     R_max / R_min over the run
+    pinch       1 - (lobe width near V = 0) / (widest lobe width); 1 is a
+                perfect pinch at the origin, lower means the loop is open
+
+Each point is cached on disk under a hash of its parameters, the solver
+settings and the input waveform samples, so reruns and extended grids
+only simulate the new points. sweep_slides() tabulates results for
+create_odp().
+
+    python3 memristor_sweep.py --grid R_OFF=8000,16000,32000 --grid p=1,2,10
+    python3 memristor_sweep.py --random 200 --range MU_V=1e-14:1e-12 --deck sweep.odp
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import math
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from memristor_sim import sine_input
+from memristor_windowed import DEFAULTS, resample, simulate_windowed, solve_windowed
+from trace_store import SUFFIX, TRACE_COLUMNS, Trace, TraceWriter
+
+DEFAULT_CACHE = ".sweep_cache"
+ENGINES = ("adaptive", "fixed")
+# Bump when the model or the metrics below change, to invalidate old cache entries
+SWEEP_VERSION = 1
+PINCH_FRACTION = 0.05      # |V| below this fraction of the lobe peak counts as "near the origin"
+TABLE_ROWS = 12
+LOG_SCALED = ("MU_V", "D")
+
+# Input waveform of the worker process, set once per worker by _init_worker()
+_WAVEFORM = None
+
+
+def grid_design(axes, base=None):
+    """Every combination of the values in `axes` ({name: [values]}), over `base`"""
+    names = list(axes)
+    return [dict(base or {}, **dict(zip(names, values)))
+            for values in itertools.product(*(axes[name] for name in names))]
+
+
+def random_design(ranges, n, seed=0, base=None, log=LOG_SCALED):
+    """`n` points drawn uniformly from `ranges` ({name: (low, high)})
+
+    Parameters named in `log` are drawn log-uniformly, which suits values
+    spanning decades such as the ion mobility.
+    """
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for name, (low, high) in ranges.items():
+        if name in log:
+            columns[name] = 10 ** rng.uniform(math.log10(low), math.log10(high), n)
+        else:
+            columns[name] = rng.uniform(low, high, n)
+    return [dict(base or {}, **{name: float(columns[name][i]) for name in ranges}) for i in range(n)]
+
+
+def point_params(point):
+    """Full, normalised parameter set of a design point
+
+    Defaults are filled in as the simulators and the Octave do: w0 is
+    half the default D unless the point sets it, so a sweep over D alone
+    starts every point from the same w0.
+    """
+    params = dict(DEFAULTS, **point)
+    if params.get("w0") is None:
+        params["w0"] = DEFAULTS["w0"]
+    return {name: float(value) for name, value in sorted(params.items())}
+
+
+def waveform_digest(vin, dt):
+    """Hash of the input samples and their spacing"""
+    h = hashlib.sha256(np.ascontiguousarray(vin, dtype=np.float64).tobytes())
+    h.update(repr(float(dt)).encode('ascii'))
+    return h.hexdigest()
+
+
+def point_key(params, waveform, engine, rtol):
+    """Cache key of one run"""
+    spec = json.dumps({"params": params, "waveform": waveform, "engine": engine,
+                       "rtol": rtol, "version": SWEEP_VERSION}, sort_keys=True)
+    return hashlib.sha256(spec.encode('utf-8')).hexdigest()
+
+
+class SampledVoltage:
+    """Piecewise-linear voltage through input samples, callable at any time"""
+
+    def __init__(self, vin, dt, t0=0.0):
+        self.vin = np.asarray(vin, dtype=float)
+        self.t = t0 + np.arange(len(self.vin)) * dt
+
+    def __call__(self, t):
+        return np.interp(t, self.t, self.vin)
+
+    def reversals(self):
+        """Times where the input changes sign, interpolated between samples"""
+        v = self.vin
+        k = np.nonzero((v[:-1] * v[1:] < 0) | ((v[1:] == 0) & (v[:-1] != 0)))[0]
+        frac = v[k] / (v[k] - v[k + 1])
+        return list(self.t[k] + frac * (self.t[k + 1] - self.t[k]))
+
+
+def lobes(v, i):
+    """(V, I) segments between polarity reversals, complete lobes only"""
+    sign = np.sign(v)
+    edges = np.nonzero(sign[1:] != sign[:-1])[0] + 1
+    for start, stop in zip(edges[:-1], edges[1:]):
+        if abs(v[start:stop]).max() > 0:
+            yield v[start - 1:stop + 1], i[start - 1:stop + 1]
+
+
+def loop_metrics(v, i, r):
+    """loop_area, r_ratio and pinch of one trace"""
+    areas, widths, near = [], [], []
+    for lv, li in lobes(np.asarray(v), np.asarray(i)):
+        areas.append(abs(np.sum(0.5 * (li[1:] + li[:-1]) * np.diff(lv))))
+        # Compare the rising and falling branches at equal |V|
+        peak = int(np.argmax(np.abs(lv)))
+        up_v, up_i = np.abs(lv[:peak + 1]), li[:peak + 1]
+        down_v, down_i = np.abs(lv[peak:])[::-1], li[peak:][::-1]
+        if len(up_v) < 2 or len(down_v) < 2:
+            continue
+        levels = np.linspace(0, np.abs(lv).max(), 101)
+        width = np.abs(np.interp(levels, np.maximum.accumulate(up_v), up_i)
+                       - np.interp(levels, np.maximum.accumulate(down_v), down_i))
+        widths.append(width.max())
+        near.append(width[levels <= PINCH_FRACTION * levels[-1]].max())
+    widest = max(widths, default=0.0)
+    return {
+        "loop_area": float(np.mean(areas)) if areas else 0.0,
+        "r_ratio": float(np.max(r) / np.min(r)),
+        "pinch": float(1 - max(near) / widest) if widest > 0 else float('nan'),
+    }
+
+
+def _init_worker(vin, dt):
+    global _WAVEFORM
+    _WAVEFORM = (np.asarray(vin, dtype=float), float(dt))
+
+
+def run_point(params, engine="adaptive", rtol=1e-6, trace_path=None):
+    """Simulate one design point and return its metrics; runs in a worker process"""
+    vin, dt = _WAVEFORM
+    if engine == "fixed":
+        result = simulate_windowed(vin, dt, params)
+    else:
+        voltage = SampledVoltage(vin, dt, params["time0"])
+        solution = solve_windowed(voltage, voltage.t[-1], params, rtol=rtol,
+                                  breakpoints=voltage.reversals())
+        result = resample(solution, voltage, voltage.t)
+    metrics = loop_metrics(result["V"], result["I"], result["R"])
+    if trace_path:
+        with TraceWriter(trace_path, dict(params, dt=dt, engine=engine), len(vin)) as writer:
+            writer.append({name: result[name] for name in TRACE_COLUMNS})
+    return metrics
+
+
+def _write_entry(path, entry):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    with os.fdopen(fd, 'w') as out:
+        json.dump(entry, out, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def run_sweep(points, vin, dt, cache_dir=DEFAULT_CACHE, workers=None, engine="adaptive",
+              rtol=1e-6, keep_traces=False):
+    """Metrics for every design point, simulating only those not cached
+
+    Returns one record per point, in order: {"params", "metrics", "key",
+    "cached"}. With `keep_traces`, each run's time, V, I, R and w are
+    also saved next to its cache entry as a <key>.trace file.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"engine must be one of {ENGINES}")
+    os.makedirs(cache_dir, exist_ok=True)
+    waveform = waveform_digest(vin, dt)
+    records, misses = [], {}
+    for point in points:
+        params = point_params(point)
+        key = point_key(params, waveform, engine, rtol)
+        entry = os.path.join(cache_dir, key + '.json')
+        record = {"params": params, "key": key, "cached": False, "metrics": None}
+        if os.path.exists(entry) and (not keep_traces or os.path.exists(entry[:-5] + SUFFIX)):
+            with open(entry) as f:
+                record["metrics"] = json.load(f)["metrics"]
+            record["cached"] = True
+        else:
+            misses.setdefault(key, []).append(record)
+        records.append(record)
+
+    if misses:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(vin, dt)) as pool:
+            futures = {
+                pool.submit(run_point, pending[0]["params"], engine, rtol,
+                            os.path.join(cache_dir, key + SUFFIX) if keep_traces else None): key
+                for key, pending in misses.items()
+            }
+            for future in as_completed(futures):
+                key = futures[future]
+                metrics = future.result()
+                _write_entry(os.path.join(cache_dir, key + '.json'),
+                             {"params": misses[key][0]["params"], "metrics": metrics,
+                              "waveform": waveform, "engine": engine})
+                for record in misses[key]:
+                    record["metrics"] = metrics
+    return records
+
+
+def load_trace(cache_dir, record):
+    """Memory-mapped trace of a record run with keep_traces"""
+    return Trace(os.path.join(cache_dir, record["key"] + SUFFIX))
+
+
+def sweep_table(records, columns, sort_by="r_ratio", descending=True):
+    """Header and row lines of a metrics table, best points first"""
+    def order(record):
+        value = record["metrics"][sort_by]
+        return -math.inf if math.isnan(value) else value
+    ranked = sorted(records, key=order, reverse=descending)
+    header = "  ".join([f"{name:>9}" for name in columns] + [f"{'area (W)':>9}", f"{'Rmax/Rmin':>9}",
+                                                              f"{'pinch':>6}"])
+    rows = []
+    for record in ranked:
+        m = record["metrics"]
+        cells = [f"{record['params'][name]:>9.3g}" for name in columns]
+        cells += [f"{m['loop_area']:>9.3e}", f"{m['r_ratio']:>9.2f}", f"{m['pinch']:>6.3f}"]
+        rows.append("  ".join(cells))
+    return header, rows
+
+
+def sweep_slides(records, columns, title="Memristor Parameter Sweep", sort_by="r_ratio",
+                 rows_per_slide=TABLE_ROWS, limit=None):
+    """Slide dicts tabulating sweep metrics, ready for create_odp()"""
+    header, rows = sweep_table(records, columns, sort_by)
+    rows = rows[:limit] if limit else rows
+    pages = [rows[i:i + rows_per_slide] for i in range(0, len(rows), rows_per_slide)] or [[]]
+    slides = []
+    for n, page in enumerate(pages, 1):
+        suffix = f" ({n}/{len(pages)})" if len(pages) > 1 else ""
+        slides.append({
+            "title": title + suffix,
+            "content": [f"• {len(records)} points, sorted by {sort_by}", "", header] + page,
+            "image": None,
+        })
+    return slides
+
+
+def _parse_assignment(text, convert):
+    name, _, values = text.partition("=")
+    if not values:
+        raise argparse.ArgumentTypeError(f"expected NAME=VALUES, got {text!r}")
+    return name.strip(), convert(values)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--grid", action="append", default=[], metavar="NAME=V1,V2,...",
+                        type=lambda s: _parse_assignment(s, lambda v: [float(x) for x in v.split(",")]),
+                        help="grid axis (repeatable)")
+    parser.add_argument("--random", type=int, default=0, metavar="N", help="random design of N points")
+    parser.add_argument("--range", action="append", default=[], metavar="NAME=LOW:HIGH",
+                        type=lambda s: _parse_assignment(s, lambda v: tuple(float(x) for x in v.split(":"))),
+                        help="parameter range for --random (repeatable)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--f", type=float, default=50.0, help="drive frequency in Hz (default: 50)")
+    parser.add_argument("--amplitude", type=float, default=1.0, help="drive amplitude in V (default: 1)")
+    parser.add_argument("--t-end", type=float, default=0.04, help="simulated time in s (default: 0.04)")
+    parser.add_argument("--dt", type=float, default=1e-6, help="sample spacing in s (default: 1e-6)")
+    parser.add_argument("--engine", choices=ENGINES, default="adaptive")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="worker processes (default: one per CPU)")
+    parser.add_argument("--cache", default=DEFAULT_CACHE,
+                        help=f"result cache directory (default: {DEFAULT_CACHE})")
+    parser.add_argument("--sort", default="r_ratio", choices=("loop_area", "r_ratio", "pinch"))
+    parser.add_argument("--top", type=int, default=20, help="rows to print (default: 20)")
+    parser.add_argument("--json", help="write all records to this file")
+    parser.add_argument("--deck", help="write the sweep table as an ODP presentation")
+    args = parser.parse_args()
+
+    if args.random:
+        points = random_design(dict(args.range), args.random, args.seed)
+        if args.grid:
+            points = [dict(p, **g) for p in points for g in grid_design(dict(args.grid))]
+    else:
+        points = grid_design(dict(args.grid))
+    columns = list(dict(args.grid)) + [name for name, _ in args.range] or ["R_OFF", "MU_V", "p"]
+
+    vin = sine_input(args.f, args.amplitude, args.t_end, args.dt)
+    start = time.perf_counter()
+    records = run_sweep(points, vin, args.dt, args.cache, args.jobs, args.engine)
+    cached = sum(record["cached"] for record in records)
+    print(f"✓ {len(records)} points ({cached} cached, {len(records) - cached} simulated) "
+          f"in {time.perf_counter() - start:.2f} s")
+
+    header, rows = sweep_table(records, columns, args.sort)
+    print(header)
+    for row in rows[:args.top]:
+        print(row)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(records, f, indent=1)
+    if args.deck:
+        from create_presentation_final import create_odp
+        create_odp(sweep_slides(records, columns, sort_by=args.sort), {}, args.deck)
+
+
+if __name__ == "__main__":
+    main()
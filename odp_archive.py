@@ -0,0 +1,401 @@
+#!/usr/bin/env python3
+"""
+Archive helpers for the ODP generator
+Decides how each member of the presentation ZIP is compressed, names
+pictures by content hash so identical files are stored once, and copies
+them into the archive in fixed-size chunks.
+
+Every member carries a fingerprint (content hash plus compression
+settings) in its ZIP comment. Given the previous build of the same deck,
+members whose fingerprint is unchanged are copied across as raw
+compressed bytes instead of being compressed again.
+
+write_parallel() compresses members on a thread pool (zlib releases the
+GIL), or in the calling thread without one. Each member is deflated in
+fixed-size blocks primed with the preceding 32 KiB, pigz style, so one
+large content.xml is split across threads too. The block layout does
+not depend on the worker count, so the archive is byte-identical
+whether it is built serially, on 1 thread or on 8.
+
+An asset cache directory holds compressed picture payloads keyed by
+content digest and compression settings, so decks built from the same
+figures (even in different processes) compress each figure only once.
+"""
+import collections
+import contextlib
+import copy
+import hashlib
+import os
+import shutil
+import struct
+import tempfile
+import zipfile
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# Media type per file extension, as written to META-INF/manifest.xml
+MEDIA_TYPES = {
+    '.png': 'image/png',
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.gif': 'image/gif',
+    '.webp': 'image/webp',
+    '.svg': 'image/svg+xml',
+    '.xml': 'text/xml',
+}
+
+# These formats are compressed already; DEFLATE costs CPU and saves ~nothing
+STORED_MEDIA_TYPES = {'image/png', 'image/jpeg', 'image/gif', 'image/webp'}
+
+DEFLATE_LEVEL = 6
+CHUNK_SIZE = 64 * 1024
+
+# Generated members are held in memory up to this size while their
+# fingerprint is checked, and spill to a temporary file beyond it
+SPOOL_SIZE = 16 * 1024 * 1024
+
+# Hex digits of SHA-256 kept in picture names (same length LibreOffice uses)
+DIGEST_CHARS = 32
+
+# Fixed part of a ZIP local file header; name and extra field follow it
+LOCAL_HEADER_SIZE = 30
+DATA_DESCRIPTOR_FLAG = 0x08
+
+# Asset cache entries start with the member's CRC-32 and uncompressed size
+CACHE_HEADER = struct.Struct('<IQ')
+
+# Parallel DEFLATE: input block size and history carried into the next block
+BLOCK_SIZE = 128 * 1024
+DEFLATE_WINDOW = 32 * 1024
+
+
+def media_type(filename):
+    """Manifest media type for a file name"""
+    ext = os.path.splitext(filename)[1].lower()
+    return MEDIA_TYPES.get(ext, 'application/octet-stream')
+
+
+def compress_type_for(media):
+    """ZIP compression method for a media type"""
+    if media in STORED_MEDIA_TYPES:
+        return zipfile.ZIP_STORED
+    return zipfile.ZIP_DEFLATED
+
+
+def file_digest(path, chunk_size=CHUNK_SIZE):
+    """SHA-256 hex digest of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def picture_members(images):
+    """Give every image a content-addressed path under Pictures/
+
+    `images` maps image keys to file paths. Returns (members, sources):
+    members maps each key to its archive path, and sources maps each
+    unique archive path to a (path, digest) pair to copy it from.
+    Byte-identical files share a single member.
+    """
+    members = {}
+    sources = {}
+    for key, path in images.items():
+        digest = file_digest(path)
+        ext = os.path.splitext(path)[1].lower()
+        arcname = f'Pictures/{digest[:DIGEST_CHARS]}{ext}'
+        members[key] = arcname
+        sources.setdefault(arcname, (path, digest))
+    return members, sources
+
+
+def read_chunks(path, chunk_size=CHUNK_SIZE):
+    """Yield a file's bytes in fixed-size chunks"""
+    with open(path, 'rb') as f:
+        yield from iter(lambda: f.read(chunk_size), b'')
+
+
+def member_fingerprint(odp, digest, compress_type):
+    """Fingerprint stored in a member's comment: content hash + compression"""
+    level = odp.compresslevel if compress_type == zipfile.ZIP_DEFLATED else 0
+    return f'sha256:{digest}:{compress_type}:{level}'.encode('ascii')
+
+
+def open_previous(odp_filename):
+    """Open an earlier build for member reuse, or None if there is none"""
+    try:
+        return zipfile.ZipFile(odp_filename, 'r')
+    except (FileNotFoundError, zipfile.BadZipFile):
+        return None
+
+
+def copy_raw(odp, previous, info, chunk_size=CHUNK_SIZE):
+    """Append a member of `previous` to `odp` without recompressing it
+
+    zipfile has no raw-copy API, so the local header and compressed bytes
+    are written directly and the entry registered the way writestr() does.
+    """
+    previous.fp.seek(info.header_offset)
+    header = previous.fp.read(LOCAL_HEADER_SIZE)
+    name_len, extra_len = struct.unpack('<HH', header[26:30])
+    previous.fp.seek(name_len + extra_len, os.SEEK_CUR)
+
+    zinfo = copy.copy(info)
+    zinfo.header_offset = odp.fp.tell()
+    odp.fp.write(zinfo.FileHeader())
+    remaining = info.compress_size
+    while remaining:
+        chunk = previous.fp.read(min(chunk_size, remaining))
+        if not chunk:
+            raise zipfile.BadZipFile(f"Truncated member in previous build: {info.filename}")
+        odp.fp.write(chunk)
+        remaining -= len(chunk)
+    register_member(odp, zinfo)
+
+
+def register_member(odp, zinfo):
+    """Add a member written straight to odp.fp to the central directory"""
+    odp.filelist.append(zinfo)
+    odp.NameToInfo[zinfo.filename] = zinfo
+    odp.start_dir = odp.fp.tell()
+
+
+def reusable_member(previous, arcname, fingerprint):
+    """ZipInfo of `arcname` in the previous build if it can be reused as-is"""
+    if previous is None:
+        return None
+    try:
+        info = previous.getinfo(arcname)
+    except KeyError:
+        return None
+    if info.comment != fingerprint or info.flag_bits & DATA_DESCRIPTOR_FLAG:
+        return None
+    return info
+
+
+def reuse_member(odp, previous, arcname, fingerprint):
+    """Raw-copy `arcname` from the previous build if its fingerprint matches"""
+    info = reusable_member(previous, arcname, fingerprint)
+    if info is None:
+        return False
+    copy_raw(odp, previous, info)
+    return True
+
+
+def add_file(odp, arcname, path, digest=None, previous=None, chunk_size=CHUNK_SIZE):
+    """Copy a file into the archive in chunks, compressed per its media type
+
+    Deflated members use the archive's own compression level. Returns True
+    if the member was reused from the previous build.
+    """
+    compress_type = compress_type_for(media_type(path))
+    fingerprint = member_fingerprint(odp, digest or file_digest(path), compress_type)
+    if reuse_member(odp, previous, arcname, fingerprint):
+        return True
+    if compress_type == zipfile.ZIP_STORED:
+        target = zipfile.ZipInfo.from_file(path, arcname)
+        target.compress_type = zipfile.ZIP_STORED
+    else:
+        target = arcname
+    with open(path, 'rb') as src, odp.open(target, 'w') as dst:
+        shutil.copyfileobj(src, dst, chunk_size)
+    odp.getinfo(arcname).comment = fingerprint
+    return False
+
+
+def iter_blocks(chunks, block_size=BLOCK_SIZE):
+    """Regroup byte chunks into (block, is_last) pairs of block_size bytes
+
+    Always yields at least one block, so empty members still get a valid
+    DEFLATE stream.
+    """
+    buffer = bytearray()
+    ready = None
+    for chunk in chunks:
+        buffer += chunk
+        while len(buffer) >= block_size:
+            if ready is not None:
+                yield ready, False
+            ready = bytes(buffer[:block_size])
+            del buffer[:block_size]
+    if buffer or ready is None:
+        if ready is not None:
+            yield ready, False
+        ready = bytes(buffer)
+    yield ready, True
+
+
+def deflate_block(block, dictionary, level, last):
+    """Raw-DEFLATE one block; non-final blocks end on a byte boundary
+
+    Priming with the previous block's tail keeps the ratio close to a
+    single-stream DEFLATE, and Z_SYNC_FLUSH lets the blocks be concatenated.
+    """
+    if dictionary:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15, zdict=dictionary)
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    return compressor.compress(block) + compressor.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+
+
+def spool_chunks(chunks, spool, chunk_size=CHUNK_SIZE):
+    """Write chunks to `spool`, returning their SHA-256 and a re-reader
+
+    Lets a generated member be fingerprinted and, if it has changed,
+    compressed from the same bytes without generating it twice.
+    """
+    hasher = hashlib.sha256()
+    for chunk in chunks:
+        hasher.update(chunk)
+        spool.write(chunk)
+
+    def reread():
+        spool.seek(0)
+        return iter(lambda: spool.read(chunk_size), b'')
+    return hasher.hexdigest(), reread
+
+
+def run_inline(fn, *args):
+    """Call fn now and wrap the result as a finished Future (serial stand-in for a pool)"""
+    future = Future()
+    future.set_result(fn(*args))
+    return future
+
+
+def write_parallel(odp, members, workers, date_time, previous=None, block_size=BLOCK_SIZE):
+    """Compress members on a thread pool and append them to `odp` in order
+
+    `members` is a sequence of (arcname, compress_type, make_chunks, digest)
+    where make_chunks() yields the member's bytes and digest is its SHA-256
+    if already known (else None). With `previous`, a member without a digest
+    is generated once into a spool, hashed, and compressed from there if it
+    cannot be reused. Blocks are compressed concurrently with a
+    bounded number in flight and written in archive order; each member's
+    local header is patched with its CRC and sizes once its last block is
+    out. With no `workers`, the same blocks are compressed in the calling
+    thread. Every member is stamped with `date_time`. Returns the number
+    of members reused from `previous`.
+    """
+    level = odp.compresslevel if odp.compresslevel is not None else zlib.Z_DEFAULT_COMPRESSION
+    max_pending = 4 * (workers or 1)
+    pending = collections.deque()
+    reused = 0
+
+    def drain(limit):
+        while len(pending) > limit:
+            step, zinfo, payload = pending.popleft()
+            if step == 'start':
+                zinfo.header_offset = odp.fp.tell()
+                odp.fp.write(zinfo.FileHeader(zip64=False))
+            elif step == 'data':
+                data = payload.result() if zinfo.compress_type == zipfile.ZIP_DEFLATED else payload
+                odp.fp.write(data)
+                zinfo.compress_size += len(data)
+            else:
+                if zinfo.file_size > zipfile.ZIP64_LIMIT or zinfo.compress_size > zipfile.ZIP64_LIMIT:
+                    raise zipfile.LargeZipFile(f"{zinfo.filename} is too large for a deck member")
+                end = odp.fp.tell()
+                odp.fp.seek(zinfo.header_offset)
+                odp.fp.write(zinfo.FileHeader(zip64=False))
+                odp.fp.seek(end)
+                register_member(odp, zinfo)
+
+    pool = ThreadPoolExecutor(max_workers=workers) if workers else None
+    submit = pool.submit if pool else run_inline
+    with pool or contextlib.nullcontext(), contextlib.ExitStack() as spools:
+        for arcname, compress_type, make_chunks, digest in members:
+            if previous is not None:
+                if digest is None:
+                    spool = spools.enter_context(tempfile.SpooledTemporaryFile(SPOOL_SIZE))
+                    digest, make_chunks = spool_chunks(make_chunks(), spool)
+                info = reusable_member(previous, arcname, member_fingerprint(odp, digest, compress_type))
+                if info is not None:
+                    drain(0)
+                    copy_raw(odp, previous, info)
+                    reused += 1
+                    continue
+
+            zinfo = zipfile.ZipInfo(arcname, date_time)
+            zinfo.compress_type = compress_type
+            zinfo.external_attr = 0o600 << 16
+            zinfo.CRC = 0
+            zinfo.compress_size = 0
+            pending.append(('start', zinfo, None))
+            hasher = hashlib.sha256()
+            dictionary = b''
+            for block, last in iter_blocks(make_chunks(), block_size):
+                zinfo.CRC = zlib.crc32(block, zinfo.CRC)
+                zinfo.file_size += len(block)
+                hasher.update(block)
+                if compress_type == zipfile.ZIP_DEFLATED:
+                    payload = submit(deflate_block, block, dictionary, level, last)
+                    dictionary = block[-DEFLATE_WINDOW:]
+                else:
+                    payload = block
+                pending.append(('data', zinfo, payload))
+                drain(max_pending)
+            zinfo.comment = member_fingerprint(odp, hasher.hexdigest(), compress_type)
+            pending.append(('end', zinfo, None))
+        drain(0)
+    return reused
+
+
+def cached_payload(cache_dir, path, digest, compress_type, level, chunk_size=CHUNK_SIZE):
+    """Path of the cache entry holding `path` compressed as requested
+
+    The entry is created on a miss. Entries are written to a temporary file
+    and renamed into place, so concurrent builds can share one directory.
+    """
+    entry = os.path.join(cache_dir, f'{digest}.{compress_type}.{level}')
+    if os.path.exists(entry):
+        return entry
+    os.makedirs(cache_dir, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            out.write(CACHE_HEADER.pack(0, 0))
+            compressor = None
+            if compress_type == zipfile.ZIP_DEFLATED:
+                compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+            crc = size = 0
+            for chunk in read_chunks(path, chunk_size):
+                crc = zlib.crc32(chunk, crc)
+                size += len(chunk)
+                out.write(compressor.compress(chunk) if compressor else chunk)
+            if compressor:
+                out.write(compressor.flush())
+            out.seek(0)
+            out.write(CACHE_HEADER.pack(crc, size))
+        os.replace(tmp, entry)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return entry
+
+
+def add_cached_file(odp, arcname, path, digest, cache_dir, date_time, previous=None,
+                    chunk_size=CHUNK_SIZE):
+    """Add a picture from the asset cache, compressing it only on a miss
+
+    Returns True if the member was reused from the previous build.
+    """
+    compress_type = compress_type_for(media_type(path))
+    fingerprint = member_fingerprint(odp, digest, compress_type)
+    if reuse_member(odp, previous, arcname, fingerprint):
+        return True
+    level = odp.compresslevel if odp.compresslevel is not None else zlib.Z_DEFAULT_COMPRESSION
+    entry = cached_payload(cache_dir, path, digest, compress_type, level, chunk_size)
+
+    zinfo = zipfile.ZipInfo(arcname, date_time)
+    zinfo.compress_type = compress_type
+    zinfo.external_attr = 0o600 << 16
+    zinfo.comment = fingerprint
+    with open(entry, 'rb') as src:
+        zinfo.CRC, zinfo.file_size = CACHE_HEADER.unpack(src.read(CACHE_HEADER.size))
+        zinfo.compress_size = os.path.getsize(entry) - CACHE_HEADER.size
+        zinfo.header_offset = odp.fp.tell()
+        odp.fp.write(zinfo.FileHeader())
+        shutil.copyfileobj(src, odp.fp, chunk_size)
+    register_member(odp, zinfo)
+    return False
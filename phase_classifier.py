@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Phase-coherence classifier over an indexed template library
+phase_classify() in lissajous_neural_network.m synthesises the input
+and every template waveform and correlates them, one template at a
+time. A pattern's waveform is the sum of its phase-shifted carriers,
+
+    s(t) = sum_j sin(omega t + phi_j) = a sin(omega t) + b cos(omega t),
+    a + i b = sum_j exp(i phi_j)                (the pattern's phasor)
+
+so the coherence of two patterns over any set of sample times is the
+quadratic form u_q^T M u_t of their phasor vectors u = (a, b), with M
+the 2 x 2 Gram matrix of (sin, cos) over those samples. A TemplateIndex
+computes M u_t for every template once and keeps them as a (2, K)
+matrix; a batch of queries is then scored with one matrix product per
+block of queries and reduced with a top-k partial sort, giving the
+same winners as the Octave loop. Indexes can be saved and reloaded
+from a cache directory keyed by a digest of the library and sampling.
+"""
+import hashlib
+import math
+import os
+import tempfile
+
+import numpy as np
+
+OMEGA = 2 * math.pi * 50                       # 50 Hz carrier, as in the Octave script
+T_SAMPLES = np.linspace(0, 0.02, 500)          # t_samples of the classifier test
+SCORE_BLOCK = 1 << 22                          # scores held in memory per block of queries
+CACHE_DIR = ".template_cache"
+INDEX_VERSION = 1
+
+# Pattern library of PART 5
+PATTERN_NAMES = ("Pattern A (0,0)", "Pattern B (0,π)", "Pattern C (π,0)", "Pattern D (π,π)")
+PATTERN_PHASES = np.array([[0, 0], [0, math.pi], [math.pi, 0], [math.pi, math.pi]])
+
+
+def phasor_vectors(phases):
+    """(n, 2) array of (a, b) for (n, carriers) phase arrays"""
+    phases = np.atleast_2d(np.asarray(phases, dtype=float))
+    return np.stack((np.cos(phases).sum(axis=1), np.sin(phases).sum(axis=1)), axis=1)
+
+
+def gram(omega=OMEGA, t_samples=T_SAMPLES):
+    """2 x 2 mean products of (sin, cos)(omega t) over the sample times"""
+    theta = omega * np.asarray(t_samples, dtype=float)
+    basis = np.stack((np.sin(theta), np.cos(theta)))
+    return basis @ basis.T / len(theta)
+
+
+def library_digest(phases, omega=OMEGA, t_samples=T_SAMPLES):
+    """Cache key of a template library and its sampling"""
+    h = hashlib.sha256(f"v{INDEX_VERSION}:{omega!r}".encode())
+    for array in (phases, t_samples):
+        array = np.ascontiguousarray(array, dtype='<f8')
+        h.update(repr(array.shape).encode())
+        h.update(array.tobytes())
+    return h.hexdigest()[:16]
+
+
+class TemplateIndex:
+    """Precomputed template phasors for batched coherence queries
+
+    `weights` is (2, K): column k is M u_k for template k, so the
+    coherence of queries with phasor vectors U (B, 2) is U @ weights.
+    """
+
+    def __init__(self, weights, metric, names=None, dtype=np.float64):
+        self.weights = np.ascontiguousarray(weights, dtype=dtype)
+        self.metric = np.asarray(metric, dtype=float)
+        self.names = list(names) if names is not None else None
+        self._norms = None
+
+    @classmethod
+    def build(cls, phases, names=None, omega=OMEGA, t_samples=T_SAMPLES, dtype=np.float64):
+        """Index for a library given as (K, carriers) phases"""
+        metric = gram(omega, t_samples)
+        return cls((phasor_vectors(phases) @ metric).T, metric, names, dtype)
+
+    def __len__(self):
+        return self.weights.shape[1]
+
+    @property
+    def norms(self):
+        """sqrt of each template's self-coherence (computed once)"""
+        if self._norms is None:
+            u = np.linalg.solve(self.metric, self.weights.astype(float))
+            self._norms = np.sqrt(np.maximum(np.einsum('ik,ik->k', u, self.weights), 0))
+        return self._norms
+
+    def scores(self, query_phases):
+        """Full (B, K) coherence matrix (small libraries only)"""
+        return phasor_vectors(query_phases).astype(self.weights.dtype) @ self.weights
+
+    def query(self, query_phases, k=1, normalize=False, block=SCORE_BLOCK):
+        """Top-k templates per query: indices and coherences, each (B, k)
+
+        Queries are scored in blocks of at most `block` coherences, so the
+        full B x K matrix is never held. k=1 returns the first maximum, as
+        the Octave loop does; for k > 1 rows are sorted best first.
+        normalize=True divides by the template norms (cosine coherence).
+        """
+        u = phasor_vectors(query_phases).astype(self.weights.dtype)
+        n_templates = len(self)
+        k = min(k, n_templates)
+        if k < 1:
+            raise ValueError("k must be at least 1")
+        scale = 1 / np.maximum(self.norms, 1e-300).astype(self.weights.dtype) if normalize else None
+        rows = max(1, block // n_templates)
+        indices = np.empty((len(u), k), dtype=np.int64)
+        values = np.empty((len(u), k), dtype=self.weights.dtype)
+        for start in range(0, len(u), rows):
+            s = u[start:start + rows] @ self.weights
+            if scale is not None:
+                s *= scale
+            stop = start + len(s)
+            if k == 1:
+                best = np.argmax(s, axis=1)[:, None]
+            else:
+                best = np.argpartition(s, n_templates - k, axis=1)[:, n_templates - k:]
+                order = np.argsort(-np.take_along_axis(s, best, axis=1), axis=1, kind='stable')
+                best = np.take_along_axis(best, order, axis=1)
+            indices[start:stop] = best
+            values[start:stop] = np.take_along_axis(s, best, axis=1)
+        return indices, values
+
+    def classify(self, query_phases):
+        """Best template index per query (names too, if the index has them)"""
+        best = self.query(query_phases)[0][:, 0]
+        return [self.names[i] for i in best] if self.names else best
+
+    def save(self, path):
+        """Write the index atomically as .npz"""
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            np.savez(f, weights=self.weights, metric=self.metric,
+                     names=np.array(self.names if self.names else [], dtype=str))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            names = list(data["names"]) or None
+            return cls(data["weights"], data["metric"], names, data["weights"].dtype)
+
+
+def cached_index(phases, names=None, omega=OMEGA, t_samples=T_SAMPLES, cache_dir=CACHE_DIR,
+                 dtype=np.float64):
+    """TemplateIndex.build(), reusing an index saved under cache_dir for the same library"""
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, f"{library_digest(phases, omega, t_samples)}"
+                                   f"_{np.dtype(dtype).name}.npz")
+    if os.path.exists(path):
+        return TemplateIndex.load(path)
+    index = TemplateIndex.build(phases, names, omega, t_samples, dtype)
+    index.save(path)
+    return index
+
+
+def phase_classify(input_phases, template_phases, omega=OMEGA, t_samples=T_SAMPLES):
+    """Reference port of the Octave phase_classify loop (0-based index)"""
+    t = np.asarray(t_samples, dtype=float)
+    max_coherence = -math.inf
+    best = 0
+    for i, phases in enumerate(template_phases):
+        input_sig = sum(np.sin(omega * t + p) for p in input_phases)
+        template_sig = sum(np.sin(omega * t + p) for p in phases)
+        coherence = np.sum(input_sig * template_sig) / len(t)
+        if coherence > max_coherence:
+            max_coherence = coherence
+            best = i
+    return best
+
+
+if __name__ == "__main__":
+    print("=== PHASE COHERENCE CLASSIFIER (indexed) ===\n")
+    index = TemplateIndex.build(PATTERN_PHASES, PATTERN_NAMES)
+    tests = np.array([[0, 0], [0, math.pi], [math.pi, 0], [math.pi, math.pi], [0, math.pi / 2]])
+    print("Testing phase coherence classifier:")
+    for phases, name in zip(tests, index.classify(tests)):
+        print(f"  Input phases [{phases[0]:.2f}, {phases[1]:.2f}] -> Classified as: {name}")
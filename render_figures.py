@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Headless figure rendering for the presentation, with a render cache
+Produces the deck's PNG figures from Python simulations at build time
+instead of from manual Octave runs. Each figure is a recipe that runs
+its simulation and returns a figure spec: a grid of panels, each in the
+vector_plots plot-spec form, with optional per-series "color", "width"
+and "marker". Long traces are decimated with LTTB to the panel's pixel
+size before plotting.
+
+Rendered PNGs are cached under a hash of everything that produces the
+figure: the recipe's arguments (defaults filled in), the DPI, the source
+of this module and of every repo module the recipe reaches through its
+imports (the simulators, training and decimation code). The key is
+known before anything runs, so a warm build skips the simulations and
+training as well as the plotting, and editing a simulator re-renders
+the figures that use it. Misses run their recipe and render with
+matplotlib (Agg) on a process pool.
+
+    python3 render_figures.py                 # render every figure into .figure_cache/
+    python3 render_figures.py --export        # also copy them over the Octave PNGs
+
+Requires matplotlib.
+"""
+import ast
+import functools
+import hashlib
+import inspect
+import json
+import math
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from vector_plots import decimate
+
+FIGURE_DPI = 100
+DEFAULT_CACHE = ".figure_cache"
+# Bump to invalidate old cache entries for changes the key cannot see
+# (e.g. a matplotlib upgrade)
+RENDER_VERSION = 3
+# Repo modules (the ones figure_key() follows) live beside this file
+MODULE_DIR = os.path.dirname(os.path.abspath(__file__))
+MATLAB_COLORS = {"r": "#ff0000", "g": "#00a000", "b": "#0000ff", "m": "#ff00ff", "k": "#000000"}
+
+
+# -- figure recipes (ports of the Octave plotting code) --------------------
+
+def hysteresis_figure(R_ON=100, R_OFF=16000, D=10e-9, MU_V=10e-14, p=10, f=50, amplitude=1.0,
+                      t_end=0.04, dt=1e-6):
+    """run_sim_windowed.m: I-V loop, V(t), R(t) and x(t) of the windowed model"""
+    from memristor_windowed import simulate_windowed
+    t = np.arange(0, t_end + dt / 2, dt)
+    res = simulate_windowed(amplitude * np.sin(2 * math.pi * f * t), dt,
+                            {"R_ON": R_ON, "R_OFF": R_OFF, "D": D, "MU_V": MU_V, "w0": 0.5 * D, "p": p})
+    ms = np.asarray(res["time"]) * 1000
+    return {"size": (12, 9), "layout": (2, 2), "panels": [
+        {"series": [{"x": res["V"], "y": np.asarray(res["I"]) * 1000, "color": "#3366cc", "width": 2}],
+         "xlabel": "Voltage (V)", "ylabel": "Current (mA)", "title": "Memristor I-V Hysteresis (Windowed Model)"},
+        {"series": [{"x": ms, "y": res["V"], "color": "#cc3333", "width": 1.5}],
+         "xlabel": "Time (ms)", "ylabel": "Voltage (V)", "title": "Input Voltage vs Time"},
+        {"series": [{"x": ms, "y": np.asarray(res["R"]) / 1000, "color": "#33b24d", "width": 1.5}],
+         "xlabel": "Time (ms)", "ylabel": "Resistance (kΩ)", "title": "Memristance vs Time"},
+        {"series": [{"x": ms, "y": res["x"], "color": "#b233b2", "width": 1.5}],
+         "xlabel": "Time (ms)", "ylabel": "Normalized State x = w/D", "title": "Internal State vs Time",
+         "xlim": (0, ms[-1]), "ylim": (0, 1)},
+    ]}
+
+
+def patterns_figure(f=50):
+    """lissajous_neural_network.m PART 5: Lissajous and interference of four phase patterns"""
+    from phase_classifier import PATTERN_NAMES, PATTERN_PHASES
+    t = np.linspace(0, 0.04, 1000)
+    omega = 2 * math.pi * f
+    top, bottom = [], []
+    for name, (phase1, phase2) in zip(PATTERN_NAMES, PATTERN_PHASES):
+        carrier1 = np.sin(omega * t + phase1)
+        carrier2 = np.sin(omega * t + phase2)
+        interference = carrier1 + carrier2
+        top.append({"series": [{"x": carrier1, "y": carrier2, "color": "b", "width": 2}],
+                    "xlabel": "Carrier 1", "ylabel": "Carrier 2", "title": name,
+                    "xlim": (-1.5, 1.5), "ylim": (-1.5, 1.5), "equal": True})
+        bottom.append({"series": [
+            {"x": t * 1000, "y": carrier1, "color": "r", "width": 1, "label": "Carrier 1"},
+            {"x": t * 1000, "y": carrier2, "color": "b", "width": 1, "label": "Carrier 2"},
+            {"x": t * 1000, "y": interference, "color": "k", "width": 2, "label": "Interference"}],
+            "xlabel": "Time (ms)", "ylabel": "Amplitude", "xlim": (0, 20),
+            "title": f"Interference (max={np.max(np.abs(interference)):.1f})"})
+    return {"size": (12, 8), "layout": (2, 4), "panels": top + bottom}
+
+
+def hardware_design_figure(frequencies=(1000, 2000, 3000, 4000)):
+    """lissajous_hardware_design.m PART 1: four neurons multiplexed on one wire"""
+    t = np.linspace(0, 0.01, 10000)
+    neurons = (("AND", 1, 0, 0, math.pi / 4, "r"), ("OR", 0, 1, math.pi / 2, math.pi / 3, "g"),
+               ("XOR", 1, 1, 0, math.pi, "b"), ("NAND", 1, 0, math.pi / 6, math.pi / 2, "m"))
+    panels, signals = [], []
+    for k, (f, (gate, a, b, phase_a, phase_b, color)) in enumerate(zip(frequencies, neurons), 1):
+        signal = a * np.sin(2 * math.pi * f * t + phase_a) + b * np.sin(2 * math.pi * f * t + phase_b)
+        signals.append(signal)
+        panels.append({"series": [{"x": t * 1000, "y": signal, "color": color, "width": 1}],
+                       "xlabel": "Time (ms)", "ylabel": "Amplitude",
+                       "title": f"Neuron {k} @ {f / 1000:g} kHz ({gate} gate)"})
+    superposed = np.sum(signals, axis=0)
+    n = len(superposed)
+    spectrum = np.abs(np.fft.fft(superposed)[:n // 2]) * 2 / n
+    freqs = np.arange(n // 2) * (1 / (t[1] - t[0]) / n)
+    peaks = [spectrum[np.argmin(np.abs(freqs - f))] for f in frequencies]
+    panels.append({"series": [{"x": t * 1000, "y": superposed, "color": "k", "width": 0.5}],
+                   "xlabel": "Time (ms)", "ylabel": "Amplitude",
+                   "title": "SUPERPOSED: All 4 neurons on SAME wire!"})
+    panels.append({"series": [{"x": freqs, "y": spectrum, "color": "k", "width": 1},
+                              {"x": np.asarray(frequencies, dtype=float), "y": np.asarray(peaks),
+                               "color": "r", "marker": "o", "width": 2}],
+                   "xlabel": "Frequency (Hz)", "ylabel": "Magnitude", "xlim": (0, 5000),
+                   "title": "Frequency Domain - 4 Carriers Visible"})
+    return {"size": (14, 8), "layout": (3, 2), "panels": panels}
+
+
+def logic_gates_figure(n_hidden=8, epochs=500, learning_rate=0.2, restarts=8, f=50):
+    """lissajous_logic_gates.m PART 5: trained phase patterns of the six gates
+
+    Every gate is trained with `restarts` random initialisations in one
+    batch; the figure shows the best restart of each.
+    """
+    from lissajous_gates import GATES, train_gates
+    from lissajous_nn import X_XOR
+    t = np.linspace(0, 0.04, 1000)
+    omega = 2 * math.pi * f
+    colors = ("r", "g", "b", "m")
+    signals, lissajous = [], []
+    results = train_gates(restarts=restarts, n_hidden=n_hidden, epochs=epochs, learning_rate=learning_rate)
+    for (name, truth), result in zip(GATES, results):
+        ih = result["best"]["phases_ih"]
+        series_t, series_l = [], []
+        for x, y, color in zip(X_XOR, truth, colors):
+            carrier1 = x[0] * np.sin(omega * t + ih[0, 0])
+            carrier2 = x[1] * np.sin(omega * t + ih[1, 0])
+            series_t.append({"x": t * 1000, "y": carrier1 + carrier2, "color": color, "width": 1.5,
+                             "label": f"[{x[0]:.0f},{x[1]:.0f}]->{y}"})
+            series_l.append({"x": carrier1, "y": carrier2, "color": color, "width": 2,
+                             "label": f"[{x[0]:.0f},{x[1]:.0f}]"})
+        signals.append({"series": series_t, "xlabel": "Time (ms)", "ylabel": "Interference Signal",
+                        "title": f"{name} Gate - Phase Patterns", "xlim": (0, 20)})
+        lissajous.append({"series": series_l, "xlabel": "Input 1 Phase Signal",
+                          "ylabel": "Input 2 Phase Signal", "title": f"{name} - Lissajous View",
+                          "xlim": (-1.5, 1.5), "ylim": (-1.5, 1.5), "equal": True})
+    return {"size": (14, 10), "layout": (3, 4), "panels": signals + lissajous}
+
+
+# Figure name -> (recipe, the Octave script's output file)
+FIGURES = {
+    "hysteresis": (hysteresis_figure, "memristor_hysteresis.png"),
+    "patterns": (patterns_figure, "lissajous_patterns.png"),
+    "hardware_design": (hardware_design_figure, "lissajous_hardware_design_frequency_multiplexing_demo.png"),
+    "logic_gates": (logic_gates_figure, "lissajous_logic_gates.png"),
+}
+
+
+# -- decimation, cache keys and rendering ----------------------------------
+
+def decimate_figure(spec, dpi=FIGURE_DPI):
+    """Copy of a figure spec with every long series decimated to its panel's pixel size"""
+    rows, cols = spec["layout"]
+    width_cm = spec["size"][0] * 2.54 / cols
+    height_cm = spec["size"][1] * 2.54 / rows
+    panels = []
+    for panel in spec["panels"]:
+        series = []
+        for s in panel["series"]:
+            x, y = decimate(s["x"], s["y"], width_cm, height_cm, panel.get("xlim"), panel.get("ylim"), dpi)
+            series.append(dict(s, x=x, y=y))
+        panels.append(dict(panel, series=series))
+    return dict(spec, panels=panels, dpi=spec.get("dpi", dpi))
+
+
+def imported_modules(tree, top_level=False):
+    """Top-level package names imported anywhere in an ast (or only at module level)"""
+    names = set()
+    for node in tree.body if top_level else ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.update(alias.name.split('.')[0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names.add(node.module.split('.')[0])
+    return names
+
+
+@functools.lru_cache(maxsize=None)
+def module_imports(path, mtime_ns, size, top_level=False):
+    """Source bytes of a repo module and the modules it imports (cached per file version)"""
+    with open(path, 'rb') as f:
+        source = f.read()
+    return source, frozenset(imported_modules(ast.parse(source), top_level))
+
+
+def read_module(path, top_level=False):
+    """module_imports() for the file's current version"""
+    stat = os.stat(path)
+    return module_imports(path, stat.st_mtime_ns, stat.st_size, top_level)
+
+
+def code_sources(recipe):
+    """{module: source bytes} of this module and the repo modules a recipe uses
+
+    Followed statically from the recipe's own imports and this module's
+    top-level ones, then through every import of each repo module found,
+    including imports inside functions.
+    """
+    source, imports = read_module(os.path.abspath(__file__), top_level=True)
+    sources = {"render_figures": source}
+    todo = imported_modules(ast.parse(inspect.getsource(recipe).strip())) | imports
+    while todo:
+        module = todo.pop()
+        path = os.path.join(MODULE_DIR, module + ".py")
+        if module in sources or not os.path.exists(path):
+            continue
+        sources[module], imports = read_module(path)
+        todo |= imports
+    return sources
+
+
+def figure_key(name, kwargs, dpi=FIGURE_DPI):
+    """Cache key: hash of a recipe's arguments, the DPI and the code behind it"""
+    recipe = FIGURES[name][0]
+    try:
+        bound = inspect.signature(recipe).bind(**kwargs)
+    except TypeError as e:
+        raise ValueError(f"Bad parameters for figure {name!r}: {e}") from None
+    bound.apply_defaults()
+    arrays = []
+
+    def plain(value):
+        if isinstance(value, np.ndarray):
+            arrays.append(np.ascontiguousarray(value, dtype='<f8'))
+            return f"<array {len(arrays) - 1}>"
+        if isinstance(value, (list, tuple)):
+            return [plain(v) for v in value]
+        if isinstance(value, np.generic):
+            return value.item()
+        return value
+    h = hashlib.sha256(f"v{RENDER_VERSION}:{name}:{dpi}".encode())
+    for module, source in sorted(code_sources(recipe).items()):
+        h.update(f"{module}:{len(source)}:".encode())
+        h.update(source)
+    h.update(json.dumps({k: plain(v) for k, v in bound.arguments.items()}, sort_keys=True).encode('utf-8'))
+    for array in arrays:
+        h.update(repr(array.shape).encode())
+        h.update(array.tobytes())
+    return h.hexdigest()
+
+
+def render_figure(spec, path):
+    """Plot a (decimated) figure spec to a PNG at `path`; runs in a worker process"""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    rows, cols = spec["layout"]
+    fig, axes = plt.subplots(rows, cols, figsize=spec["size"], squeeze=False)
+    axes = axes.ravel()
+    for ax, panel in zip(axes, spec["panels"]):
+        for s in panel["series"]:
+            ax.plot(s["x"], s["y"], s.get("marker", "") + ("" if s.get("marker") else "-"),
+                    color=MATLAB_COLORS.get(s.get("color"), s.get("color")),
+                    linewidth=s.get("width", 1), markersize=10 if s.get("marker") else None,
+                    markerfacecolor="none", label=s.get("label"))
+        ax.grid(True)
+        ax.set_xlabel(panel.get("xlabel", ""))
+        ax.set_ylabel(panel.get("ylabel", ""))
+        ax.set_title(panel.get("title", ""), fontsize=10)
+        if panel.get("equal"):
+            ax.set_aspect("equal", adjustable="box")
+        if panel.get("xlim"):
+            ax.set_xlim(panel["xlim"])
+        if panel.get("ylim"):
+            ax.set_ylim(panel["ylim"])
+        if any(s.get("label") for s in panel["series"]):
+            ax.legend(fontsize=7, loc="best")
+    for ax in axes[len(spec["panels"]):]:
+        ax.set_visible(False)
+    fig.tight_layout()
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.tmp')
+    with os.fdopen(fd, 'wb') as out:
+        fig.savefig(out, format="png", dpi=spec["dpi"])
+    plt.close(fig)
+    os.replace(tmp, path)
+    return path
+
+
+def render_recipe(name, kwargs, dpi, path):
+    """Run a figure's recipe and render it to `path`; runs in a worker process"""
+    return render_figure(decimate_figure(FIGURES[name][0](**kwargs), dpi), path)
+
+
+def render_figures(names=None, params=None, cache_dir=DEFAULT_CACHE, workers=None, dpi=FIGURE_DPI):
+    """Map figure names to rendered PNGs, rendering only what is not cached
+
+    `params` maps a figure name to keyword arguments for its recipe (the
+    simulation parameters). The returned dict can be passed to
+    create_odp() as its images.
+    """
+    names = list(FIGURES) if names is None else list(names)
+    unknown = [name for name in names if name not in FIGURES]
+    if unknown:
+        raise ValueError(f"Unknown figures {unknown}; choose from {sorted(FIGURES)}")
+    params = params or {}
+    os.makedirs(cache_dir, exist_ok=True)
+    rendered, misses = {}, {}
+    for name in names:
+        kwargs = params.get(name, {})
+        entry = os.path.join(cache_dir, figure_key(name, kwargs, dpi) + ".png")
+        if not os.path.exists(entry):
+            misses.setdefault(entry, (name, kwargs))
+        rendered[name] = entry
+    if len(misses) == 1 or workers == 1:
+        for entry, (name, kwargs) in misses.items():
+            render_recipe(name, kwargs, dpi, entry)
+    elif misses:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(render_recipe, *zip(*((name, kwargs, dpi, entry)
+                                                for entry, (name, kwargs) in misses.items()))))
+    return rendered
+
+
+def export_figures(rendered, directory="."):
+    """Copy rendered figures to the file names the Octave scripts write"""
+    for name, entry in rendered.items():
+        shutil.copyfile(entry, os.path.join(directory, FIGURES[name][1]))
+        print(f"✓ {FIGURES[name][1]}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("names", nargs="*", help=f"figures to render (default: all of {', '.join(FIGURES)})")
+    parser.add_argument("-j", "--workers", type=int, help="render on this many processes")
+    parser.add_argument("--cache", default=DEFAULT_CACHE, help="render cache directory")
+    parser.add_argument("--export", action="store_true", help="copy results over the Octave PNGs")
+    args = parser.parse_args()
+    rendered = render_figures(args.names or None, cache_dir=args.cache, workers=args.workers)
+    for name, entry in rendered.items():
+        print(f"{name}: {entry}")
+    if args.export:
+        export_figures(rendered)
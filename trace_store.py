@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Columnar on-disk store for memristor simulation traces
+One file per run holds the five arrays of the SIMULATE_MEMRISTOR results
+struct (time, V, I, R, w) as fixed-dtype columns behind a small JSON
+header carrying the params struct:
+
+    b"MEMTRACE" | version u32 | header size u32 | JSON header, padded
+    column 0 (capacity samples) | column 1 | ...   (each 64-byte aligned)
+
+Runs are written in chunks while they are simulated, so only one chunk
+is ever in memory, and read back as numpy.memmap columns: slicing a
+window of a run with millions of samples touches only those pages.
+A TraceStore directory keeps an index of its runs' parameters so that
+thousands of runs can be looked up without opening them.
+"""
+import json
+import math
+import os
+import struct
+import tempfile
+
+import numpy as np
+
+MAGIC = b"MEMTRACE"
+VERSION = 1
+PRELUDE = struct.Struct('<8sII')
+HEADER_RESERVE = 4096
+ALIGN = 64
+TRACE_COLUMNS = ("time", "V", "I", "R", "w")
+CHUNK_STEPS = 1 << 16
+INDEX_FILE = "index.jsonl"
+SUFFIX = ".trace"
+
+
+def _plain(value):
+    """JSON-serialisable copy of a params value (NumPy scalars and arrays)"""
+    if isinstance(value, dict):
+        return {k: _plain(v) for k, v in value.items()}
+    if isinstance(value, np.ndarray):
+        return value.item() if value.size == 1 else value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _aligned(n):
+    return -(-n // ALIGN) * ALIGN
+
+
+class TraceWriter:
+    """Write one run's columns chunk by chunk
+
+    `capacity` is the number of samples the run will have (the length of
+    the input waveform). The file appears under `path` only on close().
+    """
+
+    def __init__(self, path, params, capacity, columns=TRACE_COLUMNS, dtype='<f8'):
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.columns = tuple(columns)
+        self.capacity = int(capacity)
+        self.length = 0
+        self.header = {"params": _plain(params), "columns": list(self.columns),
+                       "dtype": self.dtype.str, "capacity": self.capacity, "length": 0}
+        encoded = json.dumps(self.header).encode('utf-8')
+        self.header_size = _aligned(max(HEADER_RESERVE, PRELUDE.size + 2 * len(encoded)))
+        column_bytes = _aligned(self.capacity * self.dtype.itemsize)
+        self.offsets = {name: self.header_size + i * column_bytes for i, name in enumerate(self.columns)}
+        self.header["offsets"] = self.offsets
+        fd, self.tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.tmp')
+        self.file = os.fdopen(fd, 'w+b')
+        self.file.truncate(self.header_size + len(self.columns) * column_bytes)
+        self._write_header()
+
+    def _write_header(self):
+        encoded = json.dumps(dict(self.header, length=self.length)).encode('utf-8')
+        if PRELUDE.size + len(encoded) > self.header_size:
+            raise ValueError("Trace header outgrew its reserved space")
+        self.file.seek(0)
+        self.file.write(PRELUDE.pack(MAGIC, VERSION, self.header_size) + encoded)
+
+    def append(self, chunk):
+        """Write the next samples of every column; `chunk` maps column name to array"""
+        arrays = [np.ravel(np.asarray(chunk[name], dtype=self.dtype)) for name in self.columns]
+        n = len(arrays[0])
+        if any(len(a) != n for a in arrays):
+            raise ValueError("All columns of a chunk must have the same length")
+        if self.length + n > self.capacity:
+            raise ValueError(f"Run exceeds its capacity of {self.capacity} samples")
+        for name, array in zip(self.columns, arrays):
+            self.file.seek(self.offsets[name] + self.length * self.dtype.itemsize)
+            self.file.write(array.tobytes())
+        self.length += n
+
+    def close(self):
+        if self.file.closed:
+            return
+        self._write_header()
+        self.file.close()
+        os.replace(self.tmp, self.path)
+
+    def abort(self):
+        self.file.close()
+        os.unlink(self.tmp)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class Trace:
+    """A stored run: columns are read-only numpy.memmap views
+
+    Indexing by column name gives the whole column (mapped, not loaded),
+    so a Trace can stand in for the results dict of the simulators, e.g.
+    in memristor_sim.summary_lines().
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            magic, version, header_size = PRELUDE.unpack(f.read(PRELUDE.size))
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a trace file")
+            if version > VERSION:
+                raise ValueError(f"{path}: unsupported trace version {version}")
+            header = json.loads(f.read(header_size - PRELUDE.size).rstrip(b'\0'))
+        self.params = header["params"]
+        self.length = header["length"]
+        self.columns = tuple(header["columns"])
+        dtype = np.dtype(header["dtype"])
+        self._data = {
+            name: np.memmap(path, dtype=dtype, mode='r', offset=header["offsets"][name],
+                            shape=(self.length,))
+            for name in self.columns
+        } if self.length else {name: np.empty(0, dtype) for name in self.columns}
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, name):
+        return self._data[name]
+
+    def __contains__(self, name):
+        return name in self._data
+
+    def keys(self):
+        return self.columns
+
+    def window(self, t_start, t_end, columns=None):
+        """Columns restricted to t_start <= time < t_end (views, no copy)"""
+        time = self._data["time"]
+        a, b = np.searchsorted(time, [t_start, t_end])
+        return {name: self._data[name][a:b] for name in (columns or self.columns)}
+
+
+def open_trace(path):
+    return Trace(path)
+
+
+def record_run(path, input_voltage, dt, params=None, model="linear", chunk=CHUNK_STEPS,
+               dtype='<f8'):
+    """Simulate one device straight into a trace file, `chunk` steps at a time
+
+    model is "linear" (memristor_sim, SIMULATE_MEMRISTOR.m) or "windowed"
+    (memristor_windowed, SIMULATE_MEMRISTOR_WINDOWED.m). Each chunk
+    continues from the previous one's final w and time, so the stored run
+    matches a single call to the simulator.
+    """
+    if model == "linear":
+        from memristor_sim import _params, simulate_batch
+
+        def step(vin, p):
+            result = simulate_batch(vin, dt, p)
+            return result, float(result["w_final"][0])
+    elif model == "windowed":
+        from memristor_windowed import _params, simulate_windowed
+
+        def step(vin, p):
+            result = simulate_windowed(vin, dt, p)
+            return result, float(result["w"][-1])
+    else:
+        raise ValueError("model must be 'linear' or 'windowed'")
+    p = _params(params)
+    p = {name: _plain(value) for name, value in p.items()}
+    vin = np.asarray(input_voltage, dtype=float)
+    w, time0 = p["w0"], p["time0"]
+    with TraceWriter(path, dict(p, dt=dt, model=model), len(vin), dtype=dtype) as writer:
+        for start in range(0, len(vin), chunk):
+            result, w = step(vin[start:start + chunk], dict(p, w0=w, time0=time0 + start * dt))
+            writer.append(result)
+    return path
+
+
+def _matches(value, criterion):
+    if callable(criterion):
+        return criterion(value)
+    if isinstance(criterion, tuple):
+        low, high = criterion
+        return value is not None and low <= value <= high
+    if isinstance(criterion, float) and isinstance(value, (int, float)):
+        return math.isclose(value, criterion, rel_tol=1e-9)
+    return value == criterion
+
+
+class TraceStore:
+    """A directory of trace files with a parameter index
+
+    The index is one JSON line per run (name, params, length), appended as
+    runs are added, so finding runs by parameter never opens a trace.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.index_path = os.path.join(directory, INDEX_FILE)
+        self._index = None
+
+    def path(self, name):
+        return os.path.join(self.directory, name + SUFFIX)
+
+    def _add(self, name):
+        trace = Trace(self.path(name))
+        entry = {"name": name, "params": trace.params, "length": trace.length}
+        with open(self.index_path, 'a') as f:
+            f.write(json.dumps(entry) + "\n")
+        if self._index is not None:
+            self._index[name] = entry
+        return entry
+
+    def record(self, name, input_voltage, dt, params=None, model="linear", chunk=CHUNK_STEPS,
+               dtype='<f8'):
+        """Simulate a run into the store and index it"""
+        record_run(self.path(name), input_voltage, dt, params, model, chunk, dtype)
+        return self._add(name)
+
+    def add(self, name, result, dtype='<f8'):
+        """Store an in-memory results dict (one device) and index it"""
+        with TraceWriter(self.path(name), result.get("params", {}), len(result["time"]),
+                         dtype=dtype) as writer:
+            writer.append(result)
+        return self._add(name)
+
+    def runs(self):
+        """name -> index entry; later entries for a name replace earlier ones"""
+        if self._index is None:
+            self._index = {}
+            if os.path.exists(self.index_path):
+                with open(self.index_path) as f:
+                    for line in f:
+                        if line.strip():
+                            entry = json.loads(line)
+                            self._index[entry["name"]] = entry
+        return self._index
+
+    def find(self, **criteria):
+        """Index entries whose params match every criterion
+
+        A criterion is a value (floats compare with a relative tolerance),
+        an inclusive (low, high) range, or a predicate.
+        """
+        return [entry for entry in self.runs().values()
+                if all(_matches(entry["params"].get(name), criterion)
+                       for name, criterion in criteria.items())]
+
+    def open(self, run):
+        """Trace for a run name or index entry"""
+        return Trace(self.path(run["name"] if isinstance(run, dict) else run))
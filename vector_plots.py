@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Vector plots for the ODP generator
+Renders simulation arrays straight into content.xml as native drawing
+shapes: each trace is one draw:polyline, with a draw:rect plot area,
+grid lines and text-frame labels, grouped in a draw:g where the picture
+frame would go. Nothing is rasterised, so figures stay sharp on a
+projector and no plotting tool runs on the build path.
+
+Traces are first decimated with largest-triangle-three-buckets (LTTB)
+to what the frame can show at PLOT_DPI: one point per pixel column, or
+one per PIXELS_PER_POINT pixels along the drawn path if that is more
+(loops retrace the frame), up to MAX_TRAVERSALS crossings of the
+frame. Buckets follow sample order and triangle areas are measured in
+plot coordinates, so parametric traces such as I-V hysteresis loops
+keep their shape, switching corners and pinch point to within a pixel.
+
+A slide dict gets a plot through its "plot" key, a spec of the form
+
+    {"series": [{"x": array, "y": array, "label": str}, ...],
+     "xlabel": str, "ylabel": str, "title": str,
+     "xlim": (lo, hi), "ylim": (lo, hi)}        (all keys but series optional)
+"""
+import math
+
+import numpy as np
+
+from xml_escape import escape_text
+
+PLOT_DPI = 150                 # decimation target resolution
+PIXELS_PER_POINT = 2           # along the path, at PLOT_DPI
+MAX_TRAVERSALS = 4             # path budget: this many times across and down the frame
+UNITS_PER_CM = 1000            # polyline viewBox units (1/100 mm)
+MARGIN_CM = (1.6, 0.3, 0.6, 1.1)   # left, right, top, bottom space for labels
+LABEL_HEIGHT_CM = 0.45
+TICKS = 5
+
+# Line colours of successive series (matplotlib's tab10)
+PALETTE = ("#1f77b4", "#d62728", "#2ca02c", "#ff7f0e", "#9467bd", "#8c564b")
+
+STYLE_TEMPLATE = '''
+  <style:style style:name="{name}" style:family="graphic">
+   <style:graphic-properties draw:stroke="{stroke}" svg:stroke-color="{color}" svg:stroke-width="{width}" draw:fill="none" draw:textarea-vertical-align="middle"/>
+  </style:style>'''
+PARAGRAPH_TEMPLATE = '''
+  <style:style style:name="{name}" style:family="paragraph">
+   <style:paragraph-properties fo:text-align="{align}"/>
+   <style:text-properties fo:font-size="{size}pt" fo:color="#333333"/>
+  </style:style>'''
+
+# Automatic styles the plot shapes refer to; create_odp() puts them in content.xml
+PLOT_STYLES = ''.join(
+    [STYLE_TEMPLATE.format(name="plotAxis", stroke="solid", color="#333333", width="0.03cm"),
+     STYLE_TEMPLATE.format(name="plotGrid", stroke="solid", color="#dddddd", width="0.01cm"),
+     STYLE_TEMPLATE.format(name="plotText", stroke="none", color="#000000", width="0cm")]
+    + [STYLE_TEMPLATE.format(name=f"plotS{i}", stroke="solid", color=color, width="0.04cm")
+       for i, color in enumerate(PALETTE)]
+    + [PARAGRAPH_TEMPLATE.format(name=f"plotP{align[0].upper()}", align=align, size=9)
+       for align in ("start", "center", "end")]
+    + [PARAGRAPH_TEMPLATE.format(name="plotTitle", align="center", size=12)])
+
+RECT = ('\n     <draw:rect draw:style-name="{style}" draw:layer="layout" '
+        'svg:x="{x:.3f}cm" svg:y="{y:.3f}cm" svg:width="{w:.3f}cm" svg:height="{h:.3f}cm"/>')
+LINE = ('\n     <draw:line draw:style-name="{style}" draw:layer="layout" '
+        'svg:x1="{x1:.3f}cm" svg:y1="{y1:.3f}cm" svg:x2="{x2:.3f}cm" svg:y2="{y2:.3f}cm"/>')
+POLYLINE = ('\n     <draw:polyline draw:style-name="{style}" draw:layer="layout" '
+            'svg:x="{x:.3f}cm" svg:y="{y:.3f}cm" svg:width="{w:.3f}cm" svg:height="{h:.3f}cm" '
+            'svg:viewBox="0 0 {vw} {vh}" draw:points="{points}"/>')
+LABEL = ('\n     <draw:frame draw:style-name="plotText" draw:layer="layout" '
+         'svg:x="{x:.3f}cm" svg:y="{y:.3f}cm" svg:width="{w:.3f}cm" svg:height="{h:.3f}cm">'
+         '<draw:text-box><text:p text:style-name="{para}">{text}</text:p></draw:text-box></draw:frame>')
+
+
+def lttb(x, y, n_out):
+    """Indices of n_out points of (x, y) chosen by largest-triangle-three-buckets
+
+    The first and last points are always kept; every bucket in between
+    contributes the point forming the largest triangle with the previous
+    pick and the mean of the next bucket. Scale x and y to plot
+    coordinates first, since areas compare across both axes.
+    """
+    n = len(x)
+    if n_out >= n:
+        return np.arange(n)
+    if n_out < 3:
+        return np.array([0, n - 1][:max(n_out, 1)])
+    # Interior points 1..n-2 split into n_out - 2 buckets [edges[b], edges[b + 1])
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    sums_x = np.concatenate(([0.0], np.cumsum(x)))
+    sums_y = np.concatenate(([0.0], np.cumsum(y)))
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for b in range(n_out - 2):
+        lo, hi = edges[b], edges[b + 1]
+        # Mean of the next bucket (the last point for the final bucket)
+        nlo, nhi = (hi, edges[b + 2]) if b + 2 < len(edges) else (n - 1, n)
+        cx = (sums_x[nhi] - sums_x[nlo]) / (nhi - nlo)
+        cy = (sums_y[nhi] - sums_y[nlo]) / (nhi - nlo)
+        ax, ay = x[a], y[a]
+        area = np.abs((ax - cx) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (cy - ay))
+        a = lo + int(np.argmax(area))
+        keep[b + 1] = a
+    return keep
+
+
+def frame_points(width_cm, height_cm, dpi=PLOT_DPI, path_cm=0.0):
+    """Points a trace needs in a width_cm x height_cm frame at dpi
+
+    path_cm is the length of the drawn trace; long parametric paths get
+    one point per PIXELS_PER_POINT pixels along them, up to the budget
+    of a path crossing the frame MAX_TRAVERSALS times.
+    """
+    path_cm = min(path_cm, MAX_TRAVERSALS * (width_cm + height_cm))
+    return max(3, int(round(width_cm / 2.54 * dpi)), int(path_cm / 2.54 * dpi / PIXELS_PER_POINT))
+
+
+def decimate(x, y, width_cm, height_cm, xlim=None, ylim=None, dpi=PLOT_DPI):
+    """(x, y) reduced by LTTB to what a width_cm x height_cm plot shows at dpi
+
+    Samples outside xlim are dropped first (keeping one either side so
+    lines still run to the edge); non-finite samples are dropped.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    keep = np.isfinite(x) & np.isfinite(y)
+    if xlim is not None:
+        inside = (x >= xlim[0]) & (x <= xlim[1])
+        inside[1:] |= inside[:-1]
+        inside[:-1] |= inside[1:]
+        keep &= inside
+    x, y = x[keep], y[keep]
+    if len(x) < 3:
+        return x, y
+    x_lo, x_hi = xlim if xlim is not None else (x.min(), x.max())
+    y_lo, y_hi = ylim if ylim is not None else (y.min(), y.max())
+    u = (x - x_lo) * (width_cm / (x_hi - x_lo) if x_hi > x_lo else 0.0)
+    v = (y - y_lo) * (height_cm / (y_hi - y_lo) if y_hi > y_lo else 0.0)
+    path_cm = float(np.sum(np.hypot(np.diff(u), np.diff(v))))
+    picked = lttb(u, v, frame_points(width_cm, height_cm, dpi, path_cm))
+    return x[picked], y[picked]
+
+
+def nice_ticks(lo, hi, count=TICKS):
+    """Round-number tick positions (1, 2, 2.5, 5 x 10^n steps) covering [lo, hi]"""
+    if not hi > lo:
+        return np.array([lo])
+    raw = (hi - lo) / max(count - 1, 1)
+    magnitude = 10 ** math.floor(math.log10(raw))
+    step = next(m * magnitude for m in (1, 2, 2.5, 5, 10) if m * magnitude >= raw)
+    first = math.ceil(lo / step - 1e-9) * step
+    ticks = np.arange(first, hi + step * 1e-9, step)
+    return np.where(np.abs(ticks) < step * 1e-9, 0.0, ticks)
+
+
+def _limits(values, explicit):
+    if explicit is not None:
+        return float(explicit[0]), float(explicit[1])
+    lo = min(float(np.nanmin(v)) for v in values)
+    hi = max(float(np.nanmax(v)) for v in values)
+    pad = 0.05 * (hi - lo) if hi > lo else max(abs(lo), 1.0) * 0.05
+    return lo - pad, hi + pad
+
+
+def _series(spec):
+    """(x, y, label) per line; a 2-D y gives one line per column"""
+    for s in spec["series"]:
+        x = np.asarray(s["x"], dtype=float)
+        y = np.asarray(s["y"], dtype=float)
+        if y.ndim == 1:
+            yield x, y, s.get("label")
+        else:
+            for column in range(y.shape[1]):
+                yield (x if x.ndim == 1 else x[:, column]), y[:, column], s.get("label")
+
+
+def render_plot(spec, x_cm, y_cm, width_cm, height_cm, dpi=PLOT_DPI, errors='replace'):
+    """draw:g XML (str) drawing `spec` into the given frame on the page"""
+    lines = list(_series(spec))
+    if not lines:
+        raise ValueError("A plot needs at least one series")
+    left, right, top, bottom = MARGIN_CM
+    if spec.get("title"):
+        top += LABEL_HEIGHT_CM * 1.4
+    px, py = x_cm + left, y_cm + top
+    pw, ph = width_cm - left - right, height_cm - top - bottom
+    x_lo, x_hi = _limits([x for x, _, _ in lines], spec.get("xlim"))
+    y_lo, y_hi = _limits([y for _, y, _ in lines], spec.get("ylim"))
+    vw, vh = int(round(pw * UNITS_PER_CM)), int(round(ph * UNITS_PER_CM))
+    sx = vw / (x_hi - x_lo) if x_hi > x_lo else 0.0
+    sy = vh / (y_hi - y_lo) if y_hi > y_lo else 0.0
+
+    parts = ['\n    <draw:g>']
+    x_ticks, y_ticks = nice_ticks(x_lo, x_hi), nice_ticks(y_lo, y_hi)
+    for t in x_ticks:
+        gx = px + (t - x_lo) * sx / UNITS_PER_CM
+        parts.append(LINE.format(style="plotGrid", x1=gx, y1=py, x2=gx, y2=py + ph))
+        parts.append(LABEL.format(x=gx - 1.0, y=py + ph + 0.05, w=2.0, h=LABEL_HEIGHT_CM,
+                                  para="plotPC", text=f"{t:g}"))
+    for t in y_ticks:
+        gy = py + ph - (t - y_lo) * sy / UNITS_PER_CM
+        parts.append(LINE.format(style="plotGrid", x1=px, y1=gy, x2=px + pw, y2=gy))
+        parts.append(LABEL.format(x=x_cm, y=gy - LABEL_HEIGHT_CM / 2, w=left - 0.1, h=LABEL_HEIGHT_CM,
+                                  para="plotPE", text=f"{t:g}"))
+    for index, (x, y, _) in enumerate(lines):
+        x, y = decimate(x, y, pw, ph, (x_lo, x_hi), (y_lo, y_hi), dpi)
+        u = np.rint(np.clip((x - x_lo) * sx, 0, vw)).astype(np.int64)
+        v = np.rint(np.clip(vh - (y - y_lo) * sy, 0, vh)).astype(np.int64)
+        points = ' '.join(f"{a},{b}" for a, b in zip(u, v))
+        parts.append(POLYLINE.format(style=f"plotS{index % len(PALETTE)}", x=px, y=py, w=pw, h=ph,
+                                     vw=vw, vh=vh, points=points))
+    parts.append(RECT.format(style="plotAxis", x=px, y=py, w=pw, h=ph))
+
+    labels = [label for _, _, label in lines]
+    legend_y = py + 0.1
+    for index, label in enumerate(labels):
+        if label and labels.index(label) == index:
+            parts.append(LINE.format(style=f"plotS{index % len(PALETTE)}", x1=px + 0.2,
+                                     y1=legend_y + LABEL_HEIGHT_CM / 2, x2=px + 0.7,
+                                     y2=legend_y + LABEL_HEIGHT_CM / 2))
+            parts.append(LABEL.format(x=px + 0.8, y=legend_y, w=pw - 1.0, h=LABEL_HEIGHT_CM,
+                                      para="plotPS", text=escape_text(label, errors)))
+            legend_y += LABEL_HEIGHT_CM
+    if spec.get("xlabel"):
+        parts.append(LABEL.format(x=px, y=py + ph + 0.05 + LABEL_HEIGHT_CM, w=pw, h=LABEL_HEIGHT_CM,
+                                  para="plotPC", text=escape_text(spec["xlabel"], errors)))
+    if spec.get("ylabel"):
+        parts.append(LABEL.format(x=x_cm, y=y_cm + top - LABEL_HEIGHT_CM - 0.05, w=pw, h=LABEL_HEIGHT_CM,
+                                  para="plotPS", text=escape_text(spec["ylabel"], errors)))
+    if spec.get("title"):
+        parts.append(LABEL.format(x=x_cm, y=y_cm, w=width_cm, h=LABEL_HEIGHT_CM * 1.4,
+                                  para="plotTitle", text=escape_text(spec["title"], errors)))
+    parts.append('\n    </draw:g>')
+    return ''.join(parts)
+
+
+def trace_plot(result, x="V", y="I", device=None, title=None, label=None):
+    """Plot spec for two columns of a simulator results dict or Trace
+
+    Defaults to the I-V hysteresis loop. With batch results every device
+    is drawn unless `device` picks one column.
+    """
+    units = {"time": "Time (s)", "V": "Voltage (V)", "I": "Current (A)", "R": "Resistance (Ohms)",
+             "w": "State w (m)"}
+
+    def column(name):
+        data = np.asarray(result[name])
+        return data[:, device] if device is not None and data.ndim == 2 else data
+    return {"series": [{"x": column(x), "y": column(y), "label": label}],
+            "xlabel": units.get(x, x), "ylabel": units.get(y, y), "title": title}
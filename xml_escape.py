@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+XML escaping for slide text
+Escapes markup characters with a chain of str.replace calls and deals
+with code points that XML 1.0 does not allow (control characters pasted
+from logs, lone surrogates, U+FFFE and U+FFFF). Those are rare, so a
+string is only checked for them (str.isprintable, then one re.search);
+clean strings go through the replace chain alone. Attribute values
+additionally escape quotes and whitespace that attribute normalisation
+would eat.
+
+errors='replace' substitutes U+FFFD, 'ignore' drops the character and
+'strict' raises ValueError, mirroring the codecs error handlers.
+"""
+import re
+
+# Code points outside the XML 1.0 Char production
+INVALID_XML_CHARS = '\x00-\x08\x0b\x0c\x0e-\x1f\ud800-\udfff\ufffe\uffff'
+REPLACEMENT_CHAR = '\ufffd'
+
+_INVALID_CHAR = re.compile(f'[{INVALID_XML_CHARS}]')
+_INVALID = {'replace': REPLACEMENT_CHAR, 'ignore': ''}
+_ERRORS = {'strict', *_INVALID}
+
+
+def _check(text, errors):
+    """Apply the errors handler to any characters XML 1.0 forbids in `text`
+
+    Printable strings (most slide lines) cannot hold one, so only the rest
+    are searched, and a string without any is returned as it is.
+    """
+    if errors not in _ERRORS:
+        raise ValueError(f"Unknown errors handler: {errors!r}")
+    if text.isprintable():
+        return text
+    match = _INVALID_CHAR.search(text)
+    if match is None:
+        return text
+    if errors == 'strict':
+        context = text[max(match.start() - 20, 0):match.end() + 20]
+        raise ValueError(f"Character U+{ord(match.group()):04X} is not allowed in XML 1.0: {context!r}")
+    return _INVALID_CHAR.sub(_INVALID[errors], text)
+
+
+def escape_text(text, errors='replace'):
+    """Escape character data for an XML element"""
+    return _check(text, errors).replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+
+def escape_attr(text, errors='replace'):
+    """Escape a value for a double- or single-quoted XML attribute"""
+    return (_check(text, errors).replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+            .replace('"', '&quot;').replace("'", '&apos;')
+            .replace('\t', '&#9;').replace('\n', '&#10;').replace('\r', '&#13;'))
+
+
+def escape_batch(strings, errors='replace'):
+    """Escape many strings of character data"""
+    return [escape_text(text, errors) for text in strings]
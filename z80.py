@@ -0,0 +1,551 @@
+#!/usr/bin/env python3
+"""
+Cycle-counting Z80 CPU core with precompiled opcode dispatch tables
+Every opcode (unprefixed, CB, ED, DD/FD and DDCB/FDCB) is a small Python
+function generated once at import from templates, one per opcode with
+its registers, flags and T-states baked in, and compiled into 256-entry
+tables. The run loop is then fetch, index, call, add T-states: no
+decoding and no if-chain per instruction.
+
+Flags follow the documented behaviour, including half-carry, overflow
+and the undocumented X/Y bits for most instructions. T-states are those
+of the Zilog manual (conditional jumps, calls, returns and repeated
+block instructions count the taken/not-taken paths). Not modelled:
+interrupts (EI/DI/IM only set state), the refresh counter R (LD R,A
+stores it, LD A,R reads it back unchanged), and wait states. Undefined
+ED opcodes run as 8-T-state NOPs.
+
+I/O goes to a device object with read(port) and write(port, value);
+port is the full 16-bit address the Z80 puts on the bus (its low byte
+is the port number).
+"""
+import argparse
+import time
+
+SF, ZF, YF, HF, XF, PF, NF, CF = 0x80, 0x40, 0x20, 0x10, 0x08, 0x04, 0x02, 0x01
+
+SZ53 = [(v & (SF | YF | XF)) | (ZF if v == 0 else 0) for v in range(256)]
+SZ53P = [f | (0 if bin(v).count("1") & 1 else PF) for v, f in enumerate(SZ53)]
+INC_F = [SZ53[v] | (HF if v & 0x0F == 0 else 0) | (PF if v == 0x80 else 0) for v in range(256)]
+DEC_F = [SZ53[v] | NF | (HF if v & 0x0F == 0x0F else 0) | (PF if v == 0x7F else 0) for v in range(256)]
+
+REG8 = ("b", "c", "d", "e", "h", "l", None, "a")
+PAIRS = {"bc": ("b", "c"), "de": ("d", "e"), "hl": ("h", "l"), "af": ("a", "f")}
+RP = ("bc", "de", "hl", "sp")
+RP2 = ("bc", "de", "hl", "af")
+CONDITIONS = ("not c.f & 0x40", "c.f & 0x40", "not c.f & 0x01", "c.f & 0x01",
+              "not c.f & 0x04", "c.f & 0x04", "not c.f & 0x80", "c.f & 0x80")
+
+N8 = ["n = m[c.pc]", "c.pc = (c.pc + 1) & 0xFFFF"]
+N16 = ["pc = c.pc", "nn = m[pc] | (m[(pc + 1) & 0xFFFF] << 8)", "c.pc = (pc + 2) & 0xFFFF"]
+E8 = ["e = m[c.pc]", "c.pc = (c.pc + 1 + ((e ^ 0x80) - 0x80)) & 0xFFFF"]
+POP = ["sp = c.sp", "v = m[sp] | (m[(sp + 1) & 0xFFFF] << 8)", "c.sp = (sp + 2) & 0xFFFF"]
+
+
+def _push(value):
+    return ["sp = (c.sp - 2) & 0xFFFF", "c.sp = sp", f"m[sp] = {value} & 0xFF",
+            f"m[(sp + 1) & 0xFFFF] = {value} >> 8"]
+
+
+ALU = (
+    ["a = c.a", "r = a + v",
+     "c.f = SZ53[r & 0xFF] | ((r >> 8) & 1) | ((a ^ v ^ r) & 0x10) | (((a ^ v ^ 0x80) & (a ^ r) & 0x80) >> 5)",
+     "c.a = r & 0xFF"],
+    ["a = c.a", "r = a + v + (c.f & 1)",
+     "c.f = SZ53[r & 0xFF] | ((r >> 8) & 1) | ((a ^ v ^ r) & 0x10) | (((a ^ v ^ 0x80) & (a ^ r) & 0x80) >> 5)",
+     "c.a = r & 0xFF"],
+    ["a = c.a", "r = a - v",
+     "c.f = SZ53[r & 0xFF] | ((r >> 8) & 1) | 0x02 | ((a ^ v ^ r) & 0x10) | (((a ^ v) & (a ^ r) & 0x80) >> 5)",
+     "c.a = r & 0xFF"],
+    ["a = c.a", "r = a - v - (c.f & 1)",
+     "c.f = SZ53[r & 0xFF] | ((r >> 8) & 1) | 0x02 | ((a ^ v ^ r) & 0x10) | (((a ^ v) & (a ^ r) & 0x80) >> 5)",
+     "c.a = r & 0xFF"],
+    ["c.a = a = c.a & v", "c.f = SZ53P[a] | 0x10"],
+    ["c.a = a = c.a ^ v", "c.f = SZ53P[a]"],
+    ["c.a = a = c.a | v", "c.f = SZ53P[a]"],
+    ["a = c.a", "r = a - v",
+     "c.f = (SZ53[r & 0xFF] & 0xD7) | (v & 0x28) | ((r >> 8) & 1) | 0x02 | ((a ^ v ^ r) & 0x10)"
+     " | (((a ^ v) & (a ^ r) & 0x80) >> 5)"],
+)
+
+# CB rotates and shifts: v in, r out, carry in cf
+SHIFTS = (
+    ["cf = v >> 7", "r = ((v << 1) | cf) & 0xFF"],
+    ["cf = v & 1", "r = (v >> 1) | (cf << 7)"],
+    ["cf = v >> 7", "r = ((v << 1) | (c.f & 1)) & 0xFF"],
+    ["cf = v & 1", "r = (v >> 1) | ((c.f & 1) << 7)"],
+    ["cf = v >> 7", "r = (v << 1) & 0xFF"],
+    ["cf = v & 1", "r = (v >> 1) | (v & 0x80)"],
+    ["cf = v >> 7", "r = ((v << 1) | 1) & 0xFF"],
+    ["cf = v & 1", "r = v >> 1"],
+)
+
+
+class _Templates:
+    """Source of each opcode's handler; `index` is None, "ix" or "iy" (DD/FD)"""
+
+    def __init__(self, index=None):
+        self.index = index
+
+    def address(self):
+        """Lines that leave the (HL) or (IX+d) operand's address in adr"""
+        if self.index:
+            return [f"adr = (c.{self.index} + ((m[c.pc] ^ 0x80) - 0x80)) & 0xFFFF", "c.pc = (c.pc + 1) & 0xFFFF"]
+        return ["adr = (c.h << 8) | c.l"]
+
+    def get8(self, r, halves=True):
+        if r == 6:
+            return "m[adr]"
+        if self.index and halves and r in (4, 5):
+            return f"(c.{self.index} >> 8)" if r == 4 else f"(c.{self.index} & 0xFF)"
+        return "c." + REG8[r]
+
+    def set8(self, r, value, halves=True):
+        if r == 6:
+            return f"m[adr] = {value}"
+        if self.index and halves and r == 4:
+            return f"c.{self.index} = (c.{self.index} & 0xFF) | ({value}) << 8"
+        if self.index and halves and r == 5:
+            return f"c.{self.index} = (c.{self.index} & 0xFF00) | ({value})"
+        return f"c.{REG8[r]} = {value}"
+
+    def get16(self, pair):
+        if pair == "hl" and self.index:
+            return "c." + self.index
+        if pair == "sp":
+            return "c.sp"
+        hi, lo = PAIRS[pair]
+        return f"((c.{hi} << 8) | c.{lo})"
+
+    def set16(self, pair, var):
+        if pair == "hl" and self.index:
+            return [f"c.{self.index} = {var}"]
+        if pair == "sp":
+            return [f"c.sp = {var}"]
+        hi, lo = PAIRS[pair]
+        return [f"c.{hi} = {var} >> 8", f"c.{lo} = {var} & 0xFF"]
+
+    def main(self, op):
+        """(lines, T-states) of an unprefixed opcode; lines end in a return"""
+        x, y, z, p, q = op >> 6, (op >> 3) & 7, op & 7, (op >> 4) & 3, (op >> 3) & 1
+        if x == 0:
+            if z == 0:
+                if y == 0:
+                    return [], 4
+                if y == 1:
+                    return ["c.a, c.f, c.a_, c.f_ = c.a_, c.f_, c.a, c.f"], 4
+                if y == 2:
+                    return ["b = c.b = (c.b - 1) & 0xFF",
+                            "if b:", *("    " + s for s in E8), "    return 13",
+                            "c.pc = (c.pc + 1) & 0xFFFF"], 8
+                if y == 3:
+                    return E8, 12
+                return [f"if {CONDITIONS[y - 4]}:", *("    " + s for s in E8), "    return 12",
+                        "c.pc = (c.pc + 1) & 0xFFFF"], 7
+            if z == 1:
+                if q == 0:
+                    return N16 + self.set16(RP[p], "nn"), 10
+                hl, other = self.get16("hl"), self.get16(RP[p])
+                return [f"hl = {hl}", f"v = {other}", "r = hl + v",
+                        "c.f = (c.f & 0xC4) | ((r >> 16) & 1) | (((hl ^ v ^ r) >> 8) & 0x10) | ((r >> 8) & 0x28)",
+                        "r &= 0xFFFF"] + self.set16("hl", "r"), 11
+            if z == 2:
+                if p == 0 or p == 1:
+                    pair = self.get16(RP[p])
+                    if q == 0:
+                        return [f"m[{pair}] = c.a"], 7
+                    return [f"c.a = m[{pair}]"], 7
+                if p == 2:
+                    if q == 0:
+                        hl = self.get16("hl")
+                        return N16 + [f"v = {hl}", "m[nn] = v & 0xFF", "m[(nn + 1) & 0xFFFF] = v >> 8"], 16
+                    return N16 + ["v = m[nn] | (m[(nn + 1) & 0xFFFF] << 8)"] + self.set16("hl", "v"), 16
+                if q == 0:
+                    return N16 + ["m[nn] = c.a"], 13
+                return N16 + ["c.a = m[nn]"], 13
+            if z == 3:
+                step = "+ 1" if q == 0 else "- 1"
+                return [f"v = ({self.get16(RP[p])} {step}) & 0xFFFF"] + self.set16(RP[p], "v"), 6
+            if z in (4, 5):
+                table = "INC_F" if z == 4 else "DEC_F"
+                step = "+ 1" if z == 4 else "- 1"
+                pre = self.address() if y == 6 else []
+                return pre + [f"v = ({self.get8(y)} {step}) & 0xFF", self.set8(y, "v"),
+                              f"c.f = (c.f & 1) | {table}[v]"], 11 if y == 6 else 4
+            if z == 6:
+                pre = self.address() if y == 6 else []
+                return pre + N8 + [self.set8(y, "n")], 10 if y == 6 else 7
+            return ([
+                ["a = c.a", "a = ((a << 1) | (a >> 7)) & 0xFF", "c.a = a", "c.f = (c.f & 0xC4) | (a & 0x29)"],
+                ["a = c.a", "cf = a & 1", "a = (a >> 1) | (cf << 7)", "c.a = a", "c.f = (c.f & 0xC4) | (a & 0x28) | cf"],
+                ["r = (c.a << 1) | (c.f & 1)", "c.f = (c.f & 0xC4) | (r >> 8) | (r & 0x28)", "c.a = r & 0xFF"],
+                ["a = c.a", "r = (a >> 1) | ((c.f & 1) << 7)", "c.f = (c.f & 0xC4) | (a & 1) | (r & 0x28)", "c.a = r"],
+                ["a, f = c.a, c.f", "carry = f & 1", "diff = 0",
+                 "if f & 0x10 or (a & 0x0F) > 9:", "    diff = 6",
+                 "if carry or a > 0x99:", "    diff |= 0x60", "    carry = 1",
+                 "if f & 0x02:", "    r = (a - diff) & 0xFF", "    h = 0x10 if f & 0x10 and (a & 0x0F) < 6 else 0",
+                 "else:", "    r = (a + diff) & 0xFF", "    h = 0x10 if (a & 0x0F) > 9 else 0",
+                 "c.a = r", "c.f = SZ53P[r] | h | (f & 0x02) | carry"],
+                ["a = c.a ^ 0xFF", "c.a = a", "c.f = (c.f & 0xC5) | 0x12 | (a & 0x28)"],
+                ["c.f = (c.f & 0xC4) | 1 | (c.a & 0x28)"],
+                ["f = c.f", "c.f = ((f & 0xC5) | ((f & 1) << 4) | (c.a & 0x28)) ^ 1"],
+            ][y]), 4
+        if x == 1:
+            if op == 0x76:
+                return ["c.pc = (c.pc - 1) & 0xFFFF", "c.halted = True", "raise Halted"], 4
+            if y == 6 or z == 6:
+                # With (IX+d) the other operand is the real H or L
+                return self.address() + [self.set8(y, self.get8(z, False), False)], 7
+            return [self.set8(y, self.get8(z))], 4
+        if x == 2:
+            pre = self.address() if z == 6 else []
+            return pre + [f"v = {self.get8(z)}"] + ALU[y], 7 if z == 6 else 4
+        # x == 3
+        if z == 0:
+            return [f"if {CONDITIONS[y]}:", *("    " + s for s in POP), "    c.pc = v", "    return 11"], 5
+        if z == 1:
+            if q == 0:
+                return POP + self.set16(RP2[p], "v"), 10
+            return [POP + ["c.pc = v"],
+                    ["c.b, c.c, c.d, c.e, c.h, c.l, c.b_, c.c_, c.d_, c.e_, c.h_, c.l_ = "
+                     "c.b_, c.c_, c.d_, c.e_, c.h_, c.l_, c.b, c.c, c.d, c.e, c.h, c.l"],
+                    [f"c.pc = {self.get16('hl')}"],
+                    [f"c.sp = {self.get16('hl')}"]][p], (10, 4, 4, 6)[p]
+        if z == 2:
+            return N16 + [f"if {CONDITIONS[y]}:", "    c.pc = nn"], 10
+        if z == 3:
+            if y == 0:
+                return N16 + ["c.pc = nn"], 10
+            if y == 2:
+                return N8 + ["c.io.write((c.a << 8) | n, c.a)"], 11
+            if y == 3:
+                return N8 + ["c.a = c.io.read((c.a << 8) | n) & 0xFF"], 11
+            if y == 4:
+                return (["sp = c.sp", "v = m[sp] | (m[(sp + 1) & 0xFFFF] << 8)", f"hl = {self.get16('hl')}",
+                         "m[sp] = hl & 0xFF", "m[(sp + 1) & 0xFFFF] = hl >> 8"] + self.set16("hl", "v")), 19
+            if y == 5:
+                return ["c.d, c.e, c.h, c.l = c.h, c.l, c.d, c.e"], 4
+            if y == 6:
+                return ["c.iff1 = c.iff2 = False"], 4
+            if y == 7:
+                return ["c.iff1 = c.iff2 = True"], 4
+            return None, 0          # CB prefix
+        if z == 4:
+            return N16 + [f"if {CONDITIONS[y]}:", *("    " + s for s in _push("c.pc")), "    c.pc = nn",
+                          "    return 17"], 10
+        if z == 5:
+            if q == 0:
+                return [f"v = {self.get16(RP2[p])}"] + _push("v"), 11
+            if p == 0:
+                return N16 + _push("c.pc") + ["c.pc = nn"], 17
+            return None, 0          # DD, ED, FD prefixes
+        if z == 6:
+            return N8 + ["v = n"] + ALU[y], 7
+        return _push("c.pc") + [f"c.pc = {y * 8:#04x}"], 11
+
+    def cb(self, op):
+        """(lines, T-states) of a CB opcode; DDCB/FDCB handlers get adr as an argument"""
+        x, y, z = op >> 6, (op >> 3) & 7, op & 7
+        indexed = self.index is not None
+        pre = [] if indexed else (self.address() if z == 6 else [])
+        source = "m[adr]" if indexed else self.get8(z, False)
+        store = []
+        if x == 1:
+            # BIT: Z and P/V from the bit, S from bit 7, X/Y from the operand
+            lines = [f"v = {source} & {1 << y:#04x}",
+                     f"c.f = (c.f & 1) | 0x10 | ({source} & 0x28) | (0x44 if not v else {0x80 if y == 7 else 0})"]
+            return pre + lines, 20 if indexed else (12 if z == 6 else 8)
+        if x == 0:
+            lines = [f"v = {source}"] + SHIFTS[y] + ["c.f = SZ53P[r] | cf"]
+        elif x == 2:
+            lines = [f"r = {source} & {~(1 << y) & 0xFF:#04x}"]
+        else:
+            lines = [f"r = {source} | {1 << y:#04x}"]
+        if indexed:
+            store = ["m[adr] = r"] + ([f"c.{REG8[z]} = r"] if z != 6 else [])
+        else:
+            store = [self.set8(z, "r", False)]
+        return pre + lines + store, 23 if indexed else (15 if z == 6 else 8)
+
+    def ed(self, op):
+        """(lines, T-states) of an ED opcode"""
+        x, y, z, p, q = op >> 6, (op >> 3) & 7, op & 7, (op >> 4) & 3, (op >> 3) & 1
+        if x == 1:
+            if z == 0:
+                lines = ["v = c.io.read((c.b << 8) | c.c) & 0xFF", "c.f = (c.f & 1) | SZ53P[v]"]
+                return lines + ([self.set8(y, "v")] if y != 6 else []), 12
+            if z == 1:
+                return [f"c.io.write((c.b << 8) | c.c, {self.get8(y) if y != 6 else 0})"], 12
+            if z == 2:
+                if q == 0:
+                    lines = ["hl = (c.h << 8) | c.l", f"v = {self.get16(RP[p])}", "r = hl - v - (c.f & 1)",
+                             "c.f = 0x02 | ((r >> 16) & 1) | (((hl ^ v ^ r) >> 8) & 0x10)"
+                             " | (((hl ^ v) & (hl ^ r) & 0x8000) >> 13) | ((r >> 8) & 0xA8)"
+                             " | (0x40 if not r & 0xFFFF else 0)"]
+                else:
+                    lines = ["hl = (c.h << 8) | c.l", f"v = {self.get16(RP[p])}", "r = hl + v + (c.f & 1)",
+                             "c.f = ((r >> 16) & 1) | (((hl ^ v ^ r) >> 8) & 0x10)"
+                             " | (((hl ^ v ^ 0x8000) & (hl ^ r) & 0x8000) >> 13) | ((r >> 8) & 0xA8)"
+                             " | (0x40 if not r & 0xFFFF else 0)"]
+                return lines + ["r &= 0xFFFF", "c.h = r >> 8", "c.l = r & 0xFF"], 15
+            if z == 3:
+                if q == 0:
+                    return N16 + [f"v = {self.get16(RP[p])}", "m[nn] = v & 0xFF", "m[(nn + 1) & 0xFFFF] = v >> 8"], 20
+                return N16 + ["v = m[nn] | (m[(nn + 1) & 0xFFFF] << 8)"] + self.set16(RP[p], "v"), 20
+            if z == 4:
+                return ["v = c.a", "c.a = 0"] + ALU[2], 8
+            if z == 5:
+                return POP + ["c.pc = v", "c.iff1 = c.iff2"], 14
+            if z == 6:
+                return [f"c.im = {(0, 0, 1, 2)[y & 3]}"], 8
+            return ([
+                ["c.i = c.a"], ["c.r = c.a"],
+                ["c.a = v = c.i", "c.f = (c.f & 1) | SZ53[v] | (0x04 if c.iff2 else 0)"],
+                ["c.a = v = c.r", "c.f = (c.f & 1) | SZ53[v] | (0x04 if c.iff2 else 0)"],
+                ["adr = (c.h << 8) | c.l", "v, a = m[adr], c.a", "m[adr] = ((a << 4) | (v >> 4)) & 0xFF",
+                 "c.a = a = (a & 0xF0) | (v & 0x0F)", "c.f = (c.f & 1) | SZ53P[a]"],
+                ["adr = (c.h << 8) | c.l", "v, a = m[adr], c.a", "m[adr] = ((v << 4) | (a & 0x0F)) & 0xFF",
+                 "c.a = a = (a & 0xF0) | (v >> 4)", "c.f = (c.f & 1) | SZ53P[a]"],
+                [], [],
+            ][y]), (9, 9, 9, 9, 18, 18, 8, 8)[y]
+        if x == 2 and z <= 3 and y >= 4:
+            step = "1" if y & 1 == 0 else "0xFFFF"
+            repeat = y >= 6
+            hl = f"hl = (c.h << 8) | c.l", f"hl2 = (hl + {step}) & 0xFFFF", "c.h = hl2 >> 8", "c.l = hl2 & 0xFF"
+            bc = ["bc = (((c.b << 8) | c.c) - 1) & 0xFFFF", "c.b = bc >> 8", "c.c = bc & 0xFF"]
+            if z == 0:          # LDI, LDD, LDIR, LDDR
+                lines = [*hl, "de = (c.d << 8) | c.e", "v = m[hl]", "m[de] = v",
+                         f"de = (de + {step}) & 0xFFFF", "c.d = de >> 8", "c.e = de & 0xFF", *bc,
+                         "n = v + c.a", "c.f = (c.f & 0xC1) | (0x04 if bc else 0) | (n & 0x08) | ((n << 4) & 0x20)"]
+                again = "bc"
+            elif z == 1:        # CPI, CPD, CPIR, CPDR
+                lines = [*hl, "v = m[hl]", "a = c.a", "r = (a - v) & 0xFF", *bc,
+                         "h = (a ^ v ^ r) & 0x10", "n = r - (h >> 4)",
+                         "c.f = (c.f & 1) | 0x02 | (SZ53[r] & 0xD7) | h | (0x04 if bc else 0)"
+                         " | (n & 0x08) | ((n << 4) & 0x20)"]
+                again = "bc and r"
+            elif z == 2:        # INI, IND, INIR, INDR
+                lines = [*hl, "m[hl] = c.io.read((c.b << 8) | c.c) & 0xFF", "c.b = b = (c.b - 1) & 0xFF",
+                         "c.f = (SZ53[b] & 0xFE) | 0x02 | (c.f & 1)"]
+                again = "b"
+            else:               # OUTI, OUTD, OTIR, OTDR
+                lines = [*hl, "c.b = b = (c.b - 1) & 0xFF", "c.io.write((b << 8) | c.c, m[hl])",
+                         "c.f = (SZ53[b] & 0xFE) | 0x02 | (c.f & 1)"]
+                again = "b"
+            if repeat:
+                lines += [f"if {again}:", "    c.pc = (c.pc - 2) & 0xFFFF", "    return 21"]
+            return lines, 16
+        return [], 8
+
+
+def _compile():
+    """Generate, compile and index every handler; returns the dispatch tables"""
+    source, tables = [], {}
+
+    def emit(name, lines, cycles, args="c, m"):
+        body = lines + [f"return {cycles}"]
+        source.append(f"def {name}({args}):\n" + "".join(f"    {s}\n" for s in body))
+        return name
+
+    plain = _Templates()
+    main_src = {}
+    for op in range(256):
+        lines, cycles = plain.main(op)
+        if lines is not None:
+            main_src[op] = (lines, cycles)
+            emit(f"op_{op:02x}", lines, cycles)
+    tables["main"] = [f"op_{op:02x}" if op in main_src else None for op in range(256)]
+    tables["cb"] = [emit(f"cb_{op:02x}", *plain.cb(op)) for op in range(256)]
+    tables["ed"] = [emit(f"ed_{op:02x}", *plain.ed(op)) for op in range(256)]
+
+    for prefix, index in ((0xDD, "ix"), (0xFD, "iy")):
+        t = _Templates(index)
+        names = []
+        for op in range(256):
+            if op not in main_src:
+                names.append(None)
+                continue
+            lines, cycles = t.main(op)
+            if lines == main_src[op][0]:
+                # Unaffected by the prefix: the plain handler plus 4 T-states
+                names.append(emit(f"{index}_{op:02x}", [], f"op_{op:02x}(c, m) + 4"))
+                continue
+            x, z, y = op >> 6, op & 7, (op >> 3) & 7
+            uses_memory = (x == 1 and (y == 6 or z == 6)) or (x == 2 and z == 6) or \
+                          (x == 0 and y == 6 and z in (4, 5, 6))
+            extra = (9 if op == 0x36 else 12) if uses_memory else 4
+            names.append(emit(f"{index}_{op:02x}", lines, cycles + extra))
+        tables[index] = names
+        tables[index + "cb"] = [emit(f"{index}cb_{op:02x}", *t.cb(op), args="c, m, adr") for op in range(256)]
+
+    # Prefix handlers: fetch the next byte and dispatch again
+    source.append(
+        "def op_cb(c, m):\n"
+        "    pc = c.pc\n"
+        "    c.pc = (pc + 1) & 0xFFFF\n"
+        "    return CB[m[pc]](c, m)\n"
+        "def op_ed(c, m):\n"
+        "    pc = c.pc\n"
+        "    c.pc = (pc + 1) & 0xFFFF\n"
+        "    return ED[m[pc]](c, m)\n")
+    for prefix, index in ((0xDD, "ix"), (0xFD, "iy")):
+        table = index.upper()
+        source.append(
+            f"def op_{index}(c, m):\n"
+            f"    pc = c.pc\n"
+            f"    op = m[pc]\n"
+            f"    if op == 0xCB:\n"
+            f"        adr = (c.{index} + ((m[(pc + 1) & 0xFFFF] ^ 0x80) - 0x80)) & 0xFFFF\n"
+            f"        op = m[(pc + 2) & 0xFFFF]\n"
+            f"        c.pc = (pc + 3) & 0xFFFF\n"
+            f"        return {table}CB[op](c, m, adr)\n"
+            f"    c.pc = (pc + 1) & 0xFFFF\n"
+            f"    handler = {table}[op]\n"
+            f"    if handler is None:\n"
+            f"        # Another prefix: this one acts as a 4 T-state NOP\n"
+            f"        c.pc = pc\n"
+            f"        return 4\n"
+            f"    return handler(c, m)\n")
+    namespace = {"SZ53": SZ53, "SZ53P": SZ53P, "INC_F": INC_F, "DEC_F": DEC_F, "Halted": Halted}
+    exec(compile("".join(source), "<z80 handlers>", "exec"), namespace)
+    resolved = {name: [namespace[n] if n else None for n in names] for name, names in tables.items()}
+    main = resolved["main"]
+    main[0xCB], main[0xED], main[0xDD], main[0xFD] = (namespace[n] for n in ("op_cb", "op_ed", "op_ix", "op_iy"))
+    namespace.update(CB=resolved["cb"], ED=resolved["ed"], IX=resolved["ix"], IY=resolved["iy"],
+                     IXCB=resolved["ixcb"], IYCB=resolved["iycb"])
+    return tuple(main)
+
+
+class Halted(Exception):
+    """Raised by HALT to leave the run loop"""
+
+
+class NullIO:
+    """Unconnected bus: reads float high, writes go nowhere"""
+
+    def read(self, port):
+        return 0xFF
+
+    def write(self, port, value):
+        pass
+
+
+class Z80:
+    """Z80 CPU state with 64K of RAM; run() executes until HALT or a T-state budget"""
+
+    __slots__ = ("a", "f", "b", "c", "d", "e", "h", "l", "a_", "f_", "b_", "c_", "d_", "e_", "h_", "l_",
+                 "ix", "iy", "sp", "pc", "i", "r", "iff1", "iff2", "im", "halted", "mem", "io", "cycles")
+
+    def __init__(self, memory=None, io=None):
+        self.mem = memory if memory is not None else bytearray(0x10000)
+        if len(self.mem) != 0x10000:
+            raise ValueError("memory must be 65536 bytes")
+        self.io = io or NullIO()
+        self.reset()
+
+    def reset(self):
+        """Power-on state: PC = 0, SP = 0xFFFF, interrupts off; T-state count cleared"""
+        for name in ("a", "f", "b", "c", "d", "e", "h", "l", "a_", "f_", "b_", "c_", "d_", "e_", "h_", "l_"):
+            setattr(self, name, 0xFF if name in ("a", "f") else 0)
+        self.ix = self.iy = 0xFFFF
+        self.sp = 0xFFFF
+        self.pc = 0
+        self.i = self.r = 0
+        self.iff1 = self.iff2 = False
+        self.im = 0
+        self.halted = False
+        self.cycles = 0
+
+    def _pair(hi, lo):
+        def get(self):
+            return (getattr(self, hi) << 8) | getattr(self, lo)
+
+        def put(self, value):
+            setattr(self, hi, (value >> 8) & 0xFF)
+            setattr(self, lo, value & 0xFF)
+        return property(get, put)
+
+    af, bc, de, hl = _pair("a", "f"), _pair("b", "c"), _pair("d", "e"), _pair("h", "l")
+    del _pair
+
+    def load(self, program):
+        """Copy an assembled z80asm.Program into memory"""
+        program.load(self.mem)
+
+    def run(self, cycles=None):
+        """Execute until HALT or until at least `cycles` T-states have passed
+
+        Returns the T-states executed; self.cycles accumulates them.
+        """
+        if self.halted:
+            return 0
+        m = self.mem
+        table = MAIN
+        limit = float("inf") if cycles is None else cycles
+        t = 0
+        try:
+            while t < limit:
+                pc = self.pc
+                self.pc = (pc + 1) & 0xFFFF
+                t += table[m[pc]](self, m)
+        except Halted:
+            t += 4
+        self.cycles += t
+        return t
+
+    def call(self, address, cycles=None, trap=0xFFFF):
+        """Run the subroutine at `address` until it returns; returns its T-states
+
+        The return address pushed is `trap`, which holds a HALT while the
+        call runs. Raises RuntimeError if the routine HALTs elsewhere, runs
+        out of `cycles`, or gets back to `trap` with SP not where it was.
+        """
+        sp = self.sp
+        saved = self.mem[trap]
+        self.mem[trap] = 0x76
+        self.halted = False
+        self.sp = (self.sp - 2) & 0xFFFF
+        self.mem[self.sp], self.mem[(self.sp + 1) & 0xFFFF] = trap & 0xFF, trap >> 8
+        self.pc = address
+        try:
+            t = self.run(cycles)
+        finally:
+            self.mem[trap] = saved
+        if not self.halted or self.pc != trap:
+            where = "halted" if self.halted else "still running"
+            raise RuntimeError(f"Routine at {address:#06x} did not return ({where} at {self.pc:#06x})")
+        if self.sp != sp:
+            raise RuntimeError(f"Routine at {address:#06x} returned with SP off by {(self.sp - sp + 0x8000) % 0x10000 - 0x8000:+d}")
+        self.halted = False
+        self.pc = trap
+        # The trap's HALT (4 T-states) belongs to the harness, not the routine
+        self.cycles -= 4
+        return t - 4
+
+
+MAIN = _compile()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("source", help="Z80 assembly file (assembled with z80asm.py)")
+    parser.add_argument("--entry", help="start address or label (default: the first ORG)")
+    parser.add_argument("--cycles", type=int, default=10_000_000, help="T-state budget")
+    args = parser.parse_args()
+
+    from z80asm import assemble_file
+    program = assemble_file(args.source)
+    cpu = Z80()
+    cpu.load(program)
+    entry = args.entry
+    if entry is None:
+        cpu.pc = program.origin
+    else:
+        cpu.pc = program.symbols[entry] if entry in program.symbols else int(entry, 0)
+    start = time.perf_counter()
+    t = cpu.run(args.cycles)
+    elapsed = time.perf_counter() - start
+    state = "halted" if cpu.halted else "stopped"
+    print(f"{state} at {cpu.pc:#06x} after {t} T-states ({t / max(elapsed, 1e-9) / 1e6:.2f} emulated MHz)")
+    print(f"AF={cpu.af:04X} BC={cpu.bc:04X} DE={cpu.de:04X} HL={cpu.hl:04X} "
+          f"IX={cpu.ix:04X} IY={cpu.iy:04X} SP={cpu.sp:04X}")
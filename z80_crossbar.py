@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Z80 control programs running against a simulated memristor crossbar
+memristor_interface.asm, simple_read_example.asm and crossbar_scan.asm
+run unmodified on the z80.py emulator, with the module's I/O ports
+wired to a crossbar.py array:
+
+    0x10  MUX_PORT    out: bits 0-3 row, 4-7 column
+    0x11  WRITE_PORT  out: bit 0 polarity (0 SET, 1 RESET), bits 1-3
+                      duration code, bit 7 trigger
+    0x12  ADC_PORT    in:  the selected cell's read current through a
+                      22 kOhm transimpedance stage, 8 bits over 0-5 V
+
+A read drives the selected row at READ_V with all other rows and the
+columns at 0 V, so the sense amplifier sees that one cell (plus any IR
+drop along the wires). ADC codes for the whole array come from one
+batched crossbar read and are reused until a write changes the state.
+A triggered write is a +/-WRITE_V pulse of (code + 1) x PULSE_UNIT,
+integrated with the linear-drift model of memristor_sim.py.
+
+T-states give program, write and scan times at a chosen clock (RC2014:
+7.3728 MHz). The programs do not wait for the ADC or the write pulses,
+so neither is added.
+"""
+import argparse
+
+import numpy as np
+
+from crossbar import Crossbar, random_state
+from memristor_sim import DEFAULTS, simulate_batch
+from z80 import Z80
+from z80asm import assemble_file
+
+MUX_PORT, WRITE_PORT, ADC_PORT = 0x10, 0x11, 0x12
+READ_V = 0.2                   # V on the selected row during a read
+FEEDBACK_R = 22e3              # Ohms, transimpedance gain (FIXED_R in the .asm)
+ADC_REF = 5.0                  # V at ADC code 255
+WRITE_V = 1.0                  # V of a SET (+) or RESET (-) pulse
+PULSE_UNIT = 2e-6              # s per duration code step (code 0 = 1 unit)
+PULSE_STEPS = 50               # integration steps per unit
+CLOCK_MHZ = 7.3728             # RC2014 system clock
+
+INTERFACE = "memristor_interface.asm"
+SIMPLE_READ = "simple_read_example.asm"
+SCAN = "crossbar_scan.asm"
+
+
+class CrossbarIO:
+    """The module's mux, write driver and ADC as a z80.Z80 I/O device"""
+
+    def __init__(self, xbar, read_v=READ_V, feedback=FEEDBACK_R, adc_ref=ADC_REF, write_v=WRITE_V,
+                 pulse_unit=PULSE_UNIT, D=DEFAULTS["D"], MU_V=DEFAULTS["MU_V"]):
+        self.xbar = xbar
+        self.read_v, self.feedback, self.adc_ref = read_v, feedback, adc_ref
+        self.write_v, self.pulse_unit = write_v, pulse_unit
+        self.D, self.MU_V = D, MU_V
+        self.row = self.col = 0
+        self.codes = None
+        self.counts = {"select": 0, "read": 0, "write": 0}
+        self.pulses = []            # (row, col, polarity, code, state before, state after)
+
+    def _selected(self):
+        n, m = self.xbar.shape
+        return self.row < n and self.col < m
+
+    def adc_codes(self):
+        """(N, M) ADC codes of every cell, one driven row per batch column"""
+        if self.codes is None:
+            n = self.xbar.shape[0]
+            currents = self.xbar.read(np.eye(n) * self.read_v)      # (M, N)
+            volts = currents.T * self.feedback
+            self.codes = np.clip(np.rint(volts / self.adc_ref * 255), 0, 255).astype(np.uint8)
+        return self.codes
+
+    def read(self, port):
+        if port & 0xFF != ADC_PORT:
+            return 0xFF
+        self.counts["read"] += 1
+        # An unpopulated mux position leaves the sense input open
+        return int(self.adc_codes()[self.row, self.col]) if self._selected() else 0
+
+    def write(self, port, value):
+        port &= 0xFF
+        if port == MUX_PORT:
+            self.counts["select"] += 1
+            self.row, self.col = value & 0x0F, value >> 4
+        elif port == WRITE_PORT and value & 0x80:
+            self.counts["write"] += 1
+            self.pulse(value & 1, (value >> 1) & 7)
+
+    def pulse(self, polarity, code):
+        """Apply a SET (polarity 0) or RESET pulse to the selected cell"""
+        if not self._selected():
+            return
+        steps = (code + 1) * PULSE_STEPS
+        volts = np.full(steps, -self.write_v if polarity else self.write_v)
+        before = float(self.xbar.state[self.row, self.col])
+        result = simulate_batch(volts, self.pulse_unit / PULSE_STEPS,
+                                {"R_ON": self.xbar.R_ON, "R_OFF": self.xbar.R_OFF, "D": self.D,
+                                 "MU_V": self.MU_V, "w0": before * self.D}, record=())
+        after = float(result["w_final"][0] / self.D)
+        self.xbar.program(self.row, self.col, after)
+        self.codes = None
+        self.pulses.append((self.row, self.col, polarity, code, before, after))
+
+
+def machine(rows=4, cols=4, state=None, r_wire=0.0, seed=0):
+    """A Z80 with the three programs loaded and a rows x cols crossbar on its ports"""
+    if not (1 <= rows <= 16 and 1 <= cols <= 16):
+        raise ValueError("The mux addresses at most 16 rows and 16 columns")
+    xbar = Crossbar(random_state(rows, cols, seed) if state is None else state, r_row=r_wire, r_col=r_wire)
+    io = CrossbarIO(xbar)
+    cpu = Z80(io=io)
+    programs = {name: assemble_file(name) for name in (INTERFACE, SIMPLE_READ, SCAN)}
+    for program in programs.values():
+        cpu.load(program)
+    scan = programs[SCAN].symbols
+    cpu.mem[scan["SCAN_ROWS"]], cpu.mem[scan["SCAN_COLS"]] = rows, cols
+    return cpu, io, programs
+
+
+def run_listing(cpu, program, cycles=1_000_000):
+    """Run a program from its origin to a HALT, or to its last byte if it has none
+
+    simple_read_example.asm just stops; a HALT is placed at the first
+    address past it (outside the program) so it ends there.
+    """
+    trap = program.end & 0xFFFF
+    saved = cpu.mem[trap]
+    cpu.mem[trap] = 0x76
+    cpu.halted = False
+    cpu.pc = program.origin
+    try:
+        return cpu.run(cycles)
+    finally:
+        cpu.mem[trap] = saved
+
+
+def call(cpu, program, label, cycles=1_000_000, **registers):
+    """Set registers (b=..., c=...) and call a routine; returns its T-states"""
+    for name, value in registers.items():
+        setattr(cpu, name, value)
+    return cpu.call(program.symbols[label], cycles)
+
+
+def timings(rows=4, cols=4, code=4, r_wire=0.0):
+    """T-states of the interface routines on a rows x cols array
+
+    Returns a dict: simple_read, init, write (per WRITE_CELL), program
+    (every cell), scan (SCAN_ARRAY), and read_cell (calling READ_CELL on
+    cell (0, 0): T-states, or the error it ends in) with read_hl, the
+    resistance it returned.
+    """
+    cpu, io, programs = machine(rows, cols, r_wire=r_wire)
+    interface, scan = programs[INTERFACE], programs[SCAN]
+    out = {"simple_read": run_listing(cpu, programs[SIMPLE_READ]),
+           "init": call(cpu, interface, "INIT_MEMRISTOR")}
+    writes = [call(cpu, interface, "WRITE_CELL", b=r, c=col, d=0, e=code)
+              for r in range(rows) for col in range(cols)]
+    out["write"], out["program"] = writes[0], sum(writes)
+    out["scan"] = call(cpu, scan, "SCAN_ARRAY")
+    start = scan.symbols["SCAN_BUFFER"]
+    buffer = np.frombuffer(bytes(cpu.mem[start:start + rows * cols]), dtype=np.uint8).reshape(rows, cols)
+    out["scan_matches"] = bool(np.array_equal(buffer, io.adc_codes()))
+    try:
+        out["read_cell"] = call(cpu, interface, "READ_CELL", b=0, c=0)
+        out["read_hl"] = cpu.hl
+    except RuntimeError as exc:
+        out["read_cell"], out["read_hl"] = str(exc), None
+    out["io"] = dict(io.counts)
+    return out
+
+
+def summary_lines(result, rows, cols, clock_mhz=CLOCK_MHZ):
+    us = 1.0 / clock_mhz
+    cells = rows * cols
+    return [
+        f"simple_read_example.asm:   {result['simple_read']:>7} T  {result['simple_read'] * us:9.2f} us",
+        f"INIT_MEMRISTOR:            {result['init']:>7} T  {result['init'] * us:9.2f} us",
+        f"WRITE_CELL (one cell):     {result['write']:>7} T  {result['write'] * us:9.2f} us  "
+        f"({clock_mhz * 1e6 / result['write']:,.0f} writes/s)",
+        f"Program all {cells:>3} cells:     {result['program']:>7} T  {result['program'] * us:9.2f} us",
+        f"SCAN_ARRAY ({rows}x{cols}):          {result['scan']:>7} T  {result['scan'] * us:9.2f} us  "
+        f"({cells * clock_mhz * 1e6 / result['scan']:,.0f} reads/s; buffer "
+        f"{'matches' if result['scan_matches'] else 'DIFFERS FROM'} the ADC model)",
+        f"READ_CELL:                 {result['read_cell']}" if isinstance(result['read_cell'], str) else
+        f"READ_CELL (cell 0, 0):     {result['read_cell']:>7} T  {result['read_cell'] * us:9.2f} us  "
+        f"(returns HL = {result['read_hl']:#06x})",
+    ]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--rows", type=int, default=4, help="crossbar rows (1-16)")
+    parser.add_argument("--cols", type=int, default=4, help="crossbar columns (1-16)")
+    parser.add_argument("--clock", type=float, default=CLOCK_MHZ, help="Z80 clock in MHz")
+    parser.add_argument("--r-wire", type=float, default=0.0, help="wire resistance per segment (Ohms)")
+    args = parser.parse_args()
+
+    print(f"=== Z80 + {args.rows}x{args.cols} MEMRISTOR CROSSBAR at {args.clock:g} MHz ===\n")
+    for warning in assemble_file(INTERFACE).warnings:
+        print(f"{INTERFACE}: warning: {warning}")
+    result = timings(args.rows, args.cols, r_wire=args.r_wire)
+    print()
+    for line in summary_lines(result, args.rows, args.cols, args.clock):
+        print(line)
+
+    cpu, io, programs = machine(args.rows, args.cols, r_wire=args.r_wire)
+    run_listing(cpu, programs[SIMPLE_READ])
+    print(f"\nsimple_read_example.asm read cell (1, 0): A = {cpu.a} "
+          f"(ADC model {io.adc_codes()[1, 0]}, R = {1 / io.xbar.G[1, 0]:.0f} Ohm)")
+    cpu.pc = programs[INTERFACE].symbols["MAIN_EXAMPLE"]
+    cpu.halted = False
+    t = cpu.run(1_000_000)
+    print(f"MAIN_EXAMPLE: {'halted' if cpu.halted else 'no HALT'} after {t} T-states "
+          f"({len(io.pulses)} write pulses; PC {cpu.pc:#06x}, SP {cpu.sp:#06x})")
+    for row, col, polarity, code, before, after in io.pulses:
+        print(f"  pulse at ({row}, {col}): {'RESET' if polarity else 'SET'} code {code}, "
+              f"w/D {before:.3f} -> {after:.3f}")
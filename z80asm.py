@@ -0,0 +1,584 @@
+#!/usr/bin/env python3
+"""
+Two-pass Z80 assembler for the project's .asm files
+Accepts the dialect of memristor_interface.asm and simple_read_example.asm:
+labels with a colon (or in column 0), NAME EQU expr, ORG, DB/DW/DS
+(and DEFB/DEFM/DEFW/DEFS), ';' comments, numbers as 0x1F, $1F, 1Fh,
+%101, 0b101 or 'c', and expressions with + - * / % & | ^ ~ << >> ( )
+and $ for the current address.
+
+The whole documented instruction set is encoded, plus the undocumented
+IXH/IXL/IYH/IYL forms and SLL. Two things real assemblers tolerate
+are accepted with a warning rather than an error, so the files build
+unmodified: 8-bit operands out of range are truncated (LD E, FIXED_R
+with FIXED_R = 2200), and LD between register pairs (LD BC, HL) expands
+to two 8-bit loads, as sjasmplus's "fake instructions" do.
+"""
+import argparse
+import re
+
+R8 = {"B": 0, "C": 1, "D": 2, "E": 3, "H": 4, "L": 5, "A": 7}
+RP = {"BC": 0, "DE": 1, "HL": 2, "SP": 3}
+RP2 = {"BC": 0, "DE": 1, "HL": 2, "AF": 3}
+CONDITIONS = {"NZ": 0, "Z": 1, "NC": 2, "C": 3, "PO": 4, "PE": 5, "P": 6, "M": 7}
+INDEX = {"IX": 0xDD, "IY": 0xFD}
+INDEX8 = {"IXH": (0xDD, 4), "IXL": (0xDD, 5), "IYH": (0xFD, 4), "IYL": (0xFD, 5)}
+ALU = {"ADD": 0, "ADC": 1, "SUB": 2, "SBC": 3, "AND": 4, "XOR": 5, "OR": 6, "CP": 7}
+ROTATES = {"RLC": 0, "RRC": 1, "RL": 2, "RR": 3, "SLA": 4, "SRA": 5, "SLL": 6, "SL1": 6, "SRL": 7}
+BITS = {"BIT": 1, "RES": 2, "SET": 3}
+
+SIMPLE = {
+    "NOP": [0x00], "HALT": [0x76], "DI": [0xF3], "EI": [0xFB], "EXX": [0xD9],
+    "RLCA": [0x07], "RRCA": [0x0F], "RLA": [0x17], "RRA": [0x1F],
+    "DAA": [0x27], "CPL": [0x2F], "SCF": [0x37], "CCF": [0x3F],
+    "NEG": [0xED, 0x44], "RETN": [0xED, 0x45], "RETI": [0xED, 0x4D],
+    "RRD": [0xED, 0x67], "RLD": [0xED, 0x6F],
+    "LDI": [0xED, 0xA0], "CPI": [0xED, 0xA1], "INI": [0xED, 0xA2], "OUTI": [0xED, 0xA3],
+    "LDD": [0xED, 0xA8], "CPD": [0xED, 0xA9], "IND": [0xED, 0xAA], "OUTD": [0xED, 0xAB],
+    "LDIR": [0xED, 0xB0], "CPIR": [0xED, 0xB1], "INIR": [0xED, 0xB2], "OTIR": [0xED, 0xB3],
+    "LDDR": [0xED, 0xB8], "CPDR": [0xED, 0xB9], "INDR": [0xED, 0xBA], "OTDR": [0xED, 0xBB],
+}
+DIRECTIVES = {"ORG", "EQU", "DB", "DEFB", "DEFM", "DW", "DEFW", "DS", "DEFS", "END"}
+MNEMONICS = (set(SIMPLE) | set(ALU) | set(ROTATES) | set(BITS)
+             | {"LD", "PUSH", "POP", "EX", "INC", "DEC", "JP", "JR", "DJNZ", "CALL", "RET", "RST",
+                "IN", "OUT", "IM"})
+
+TOKEN = re.compile(r"""\s*(?:
+    (?P<hex>0[xX][0-9A-Fa-f]+|\$[0-9A-Fa-f]+|[0-9][0-9A-Fa-f]*[hH]\b)
+  | (?P<bin>0[bB][01]+|%[01]+|[01]+[bB]\b)
+  | (?P<dec>[0-9]+)
+  | (?P<char>'(?:[^'\\]|\\.)')
+  | (?P<name>[A-Za-z_.][A-Za-z0-9_.]*)
+  | (?P<here>\$)
+  | (?P<op><<|>>|[-+*/%&|^~()])
+)""", re.VERBOSE)
+
+
+class Program:
+    """Assembled bytes placed at absolute addresses, with the symbol table
+
+    `segments` is a list of (start address, bytearray), one per ORG;
+    `end` is one past the highest address written.
+    """
+
+    def __init__(self, segments, symbols, warnings, listing):
+        self.segments = segments
+        self.symbols = symbols
+        self.warnings = warnings
+        self.listing = listing
+
+    @property
+    def origin(self):
+        return self.segments[0][0] if self.segments else 0
+
+    @property
+    def end(self):
+        return max((start + len(data) for start, data in self.segments), default=0)
+
+    @property
+    def size(self):
+        return sum(len(data) for _, data in self.segments)
+
+    def load(self, memory):
+        """Copy every segment into a 64K memory (bytearray)"""
+        for start, data in self.segments:
+            if start + len(data) > 0x10000:
+                raise ValueError(f"Segment at {start:#06x} runs past 0xFFFF")
+            memory[start:start + len(data)] = data
+        return memory
+
+
+class _Pass:
+    """One pass over the source; pass 1 lets unknown symbols read as 0"""
+
+    def __init__(self, symbols, final):
+        self.symbols = symbols
+        self.final = final
+        self.pc = 0
+        self.line = 0
+        self.warnings = []
+
+    def warn(self, message):
+        if self.final:
+            self.warnings.append(f"line {self.line}: {message}")
+
+    def value(self, text):
+        """Evaluate an expression at the current address"""
+        out, pos = [], 0
+        text = text.strip()
+        while pos < len(text):
+            match = TOKEN.match(text, pos)
+            if not match or match.end() == pos:
+                raise ValueError(f"line {self.line}: cannot parse expression {text!r}")
+            pos = match.end()
+            kind, token = match.lastgroup, match.group(match.lastgroup)
+            if kind == "hex":
+                digits = token[2:] if token[:2] in ("0x", "0X") else token.strip("$hH")
+                out.append(str(int(digits, 16)))
+            elif kind == "bin":
+                digits = token[2:] if token[:2] in ("0b", "0B") else token.strip("%bB")
+                out.append(str(int(digits, 2)))
+            elif kind == "dec":
+                out.append(token)
+            elif kind == "char":
+                out.append(str(ord(token[1:-1].encode().decode("unicode_escape"))))
+            elif kind == "name":
+                if token in self.symbols:
+                    out.append(str(self.symbols[token]))
+                elif self.final:
+                    raise ValueError(f"line {self.line}: undefined symbol {token!r}")
+                else:
+                    out.append("0")
+            elif kind == "here":
+                out.append(str(self.pc))
+            else:
+                out.append("//" if token == "/" else token)
+        try:
+            return int(eval(" ".join(out), {"__builtins__": {}}))
+        except (SyntaxError, ZeroDivisionError, TypeError) as exc:
+            if not self.final:
+                return 0
+            raise ValueError(f"line {self.line}: bad expression {text!r} ({exc})") from None
+
+    def byte(self, text):
+        v = self.value(text)
+        if not -128 <= v <= 255:
+            self.warn(f"{text.strip()} = {v} does not fit in 8 bits; truncated to {v & 0xFF}")
+        return v & 0xFF
+
+    def word(self, text):
+        v = self.value(text)
+        if not -32768 <= v <= 0xFFFF:
+            self.warn(f"{text.strip()} = {v} does not fit in 16 bits; truncated")
+        return [v & 0xFF, (v >> 8) & 0xFF]
+
+    def disp(self, text):
+        v = self.value(text) if text else 0
+        if self.final and not -128 <= v <= 127:
+            raise ValueError(f"line {self.line}: index displacement {v} out of range")
+        return v & 0xFF
+
+    def relative(self, text, length=2):
+        offset = self.value(text) - (self.pc + length)
+        if self.final and not -128 <= offset <= 127:
+            raise ValueError(f"line {self.line}: relative jump of {offset} out of range")
+        return offset & 0xFF
+
+
+def split_operands(text):
+    """Split on top-level commas, leaving quoted strings intact"""
+    parts, depth, quote, start = [], 0, None, 0
+    for i, ch in enumerate(text):
+        if quote:
+            if ch == quote:
+                quote = None
+        elif ch in "'\"":
+            quote = ch
+        elif ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        elif ch == "," and depth == 0:
+            parts.append(text[start:i].strip())
+            start = i + 1
+    last = text[start:].strip()
+    if last or parts:
+        parts.append(last)
+    return parts
+
+
+def operand(text):
+    """Classify one operand: (kind, details)"""
+    upper = text.upper().replace(" ", "")
+    if upper in R8:
+        return ("r", R8[upper])
+    if upper == "(HL)":
+        return ("r", 6)
+    if upper in INDEX8:
+        return ("xr",) + INDEX8[upper]
+    if upper in ("BC", "DE", "HL", "SP", "AF", "AF'", "IX", "IY"):
+        return ("rr", upper)
+    if upper in ("I", "R"):
+        return ("special", upper)
+    if upper in ("(BC)", "(DE)", "(SP)", "(C)"):
+        return ("ind", upper[1:-1])
+    inner = text.strip()
+    if inner.startswith("(") and inner.endswith(")") and _balanced(inner[1:-1]):
+        inner = inner[1:-1].strip()
+        head = inner[:2].upper()
+        if head in INDEX and (len(inner) == 2 or inner[2:].lstrip()[:1] in "+-"):
+            return ("idx", INDEX[head], inner[2:].strip())
+        return ("mem", inner)
+    return ("imm", text.strip())
+
+
+def _balanced(text):
+    depth = 0
+    for ch in text:
+        depth += {"(": 1, ")": -1}.get(ch, 0)
+        if depth < 0:
+            return False
+    return depth == 0
+
+
+def _prefixed(prefix, body):
+    return ([prefix] if prefix else []) + body
+
+
+def encode(p, mnemonic, texts):
+    """Bytes for one instruction (p is the current _Pass)"""
+    ops = [operand(t) for t in texts]
+    kinds = tuple(o[0] for o in ops)
+    n = len(ops)
+
+    def bad():
+        return ValueError(f"line {p.line}: cannot encode {mnemonic} {', '.join(texts)}")
+
+    if mnemonic in SIMPLE and n == 0:
+        return list(SIMPLE[mnemonic])
+
+    if mnemonic == "LD" and n == 2:
+        return _encode_ld(p, ops, kinds, texts, bad)
+
+    if mnemonic in ("PUSH", "POP") and n == 1 and kinds[0] == "rr":
+        base = 0xC5 if mnemonic == "PUSH" else 0xC1
+        name = ops[0][1]
+        if name in INDEX:
+            return [INDEX[name], base + 0x20]
+        if name in RP2:
+            return [base + (RP2[name] << 4)]
+        raise bad()
+
+    if mnemonic == "EX" and n == 2:
+        a, b = (t.upper().replace(" ", "") for t in texts)
+        if (a, b) == ("AF", "AF'"):
+            return [0x08]
+        if (a, b) == ("DE", "HL"):
+            return [0xEB]
+        if a == "(SP)" and b in ("HL", "IX", "IY"):
+            return _prefixed(INDEX.get(b), [0xE3])
+        raise bad()
+
+    if mnemonic in ALU:
+        code = ALU[mnemonic]
+        if n == 2 and kinds[0] == "rr":
+            dst, src = ops[0][1], ops[1]
+            if src[0] != "rr":
+                raise bad()
+            if mnemonic == "ADD" and dst in ("HL", "IX", "IY"):
+                pair = src[1]
+                if pair == dst:
+                    pair = "HL"
+                elif pair not in ("BC", "DE", "SP"):
+                    raise bad()
+                return _prefixed(INDEX.get(dst), [0x09 + (RP[pair] << 4)])
+            if mnemonic in ("ADC", "SBC") and dst == "HL" and src[1] in RP:
+                return [0xED, (0x4A if mnemonic == "ADC" else 0x42) + (RP[src[1]] << 4)]
+            raise bad()
+        if n == 2:
+            if ops[0] != ("r", 7):
+                raise bad()
+            ops, kinds = ops[1:], kinds[1:]
+        elif n != 1:
+            raise bad()
+        src = ops[0]
+        if src[0] == "r":
+            return [0x80 + (code << 3) + src[1]]
+        if src[0] == "xr":
+            return [src[1], 0x80 + (code << 3) + src[2]]
+        if src[0] == "idx":
+            return [src[1], 0x86 + (code << 3), p.disp(src[2])]
+        if src[0] == "imm":
+            return [0xC6 + (code << 3), p.byte(src[1])]
+        raise bad()
+
+    if mnemonic in ("INC", "DEC") and n == 1:
+        dec = mnemonic == "DEC"
+        o = ops[0]
+        if o[0] == "r":
+            return [0x04 + dec + (o[1] << 3)]
+        if o[0] == "xr":
+            return [o[1], 0x04 + dec + (o[2] << 3)]
+        if o[0] == "idx":
+            return [o[1], 0x34 + dec, p.disp(o[2])]
+        if o[0] == "rr" and o[1] in INDEX:
+            return [INDEX[o[1]], 0x23 + (dec << 3)]
+        if o[0] == "rr" and o[1] in RP:
+            return [0x03 + (dec << 3) + (RP[o[1]] << 4)]
+        raise bad()
+
+    if mnemonic in ROTATES or mnemonic in BITS:
+        if mnemonic in BITS:
+            if n != 2:
+                raise bad()
+            bit = p.value(texts[0])
+            if not 0 <= bit <= 7:
+                raise ValueError(f"line {p.line}: bit number {bit} out of range")
+            code, o = (BITS[mnemonic] << 6) + (bit << 3), ops[1]
+        else:
+            if n != 1:
+                raise bad()
+            code, o = ROTATES[mnemonic] << 3, ops[0]
+        if o[0] == "r":
+            return [0xCB, code + o[1]]
+        if o[0] == "idx":
+            return [o[1], 0xCB, p.disp(o[2]), code + 6]
+        raise bad()
+
+    if mnemonic == "JP":
+        if n == 1 and kinds[0] in ("r", "idx") and texts[0].upper().replace(" ", "") in ("(HL)", "(IX)", "(IY)"):
+            return _prefixed(ops[0][1] if kinds[0] == "idx" else None, [0xE9])
+        if n == 1:
+            return [0xC3] + p.word(texts[0])
+        if n == 2 and texts[0].upper() in CONDITIONS:
+            return [0xC2 + (CONDITIONS[texts[0].upper()] << 3)] + p.word(texts[1])
+        raise bad()
+
+    if mnemonic == "JR":
+        if n == 1:
+            return [0x18, p.relative(texts[0])]
+        if n == 2 and texts[0].upper() in ("NZ", "Z", "NC", "C"):
+            return [0x20 + (CONDITIONS[texts[0].upper()] << 3), p.relative(texts[1])]
+        raise bad()
+
+    if mnemonic == "DJNZ" and n == 1:
+        return [0x10, p.relative(texts[0])]
+
+    if mnemonic == "CALL":
+        if n == 1:
+            return [0xCD] + p.word(texts[0])
+        if n == 2 and texts[0].upper() in CONDITIONS:
+            return [0xC4 + (CONDITIONS[texts[0].upper()] << 3)] + p.word(texts[1])
+        raise bad()
+
+    if mnemonic == "RET":
+        if n == 0:
+            return [0xC9]
+        if n == 1 and texts[0].upper() in CONDITIONS:
+            return [0xC0 + (CONDITIONS[texts[0].upper()] << 3)]
+        raise bad()
+
+    if mnemonic == "RST" and n == 1:
+        target = p.value(texts[0])
+        if target & ~0x38:
+            raise ValueError(f"line {p.line}: RST target {target:#x} is not one of 0x00, 0x08 ... 0x38")
+        return [0xC7 + target]
+
+    if mnemonic == "IN":
+        if n == 2 and ops[0] == ("r", 7) and kinds[1] == "mem":
+            return [0xDB, p.byte(ops[1][1])]
+        if n == 2 and kinds[0] == "r" and ops[0][1] != 6 and ops[1] == ("ind", "C"):
+            return [0xED, 0x40 + (ops[0][1] << 3)]
+        if ops[-1] == ("ind", "C") and (n == 1 or texts[0].upper() == "F"):
+            return [0xED, 0x70]
+        raise bad()
+
+    if mnemonic == "OUT" and n == 2:
+        if kinds[0] == "mem" and ops[1] == ("r", 7):
+            return [0xD3, p.byte(ops[0][1])]
+        if ops[0] == ("ind", "C") and kinds[1] == "r" and ops[1][1] != 6:
+            return [0xED, 0x41 + (ops[1][1] << 3)]
+        if ops[0] == ("ind", "C") and kinds[1] == "imm" and p.value(texts[1]) == 0:
+            return [0xED, 0x71]
+        raise bad()
+
+    if mnemonic == "IM" and n == 1:
+        mode = p.value(texts[0])
+        if mode not in (0, 1, 2):
+            raise bad()
+        return [0xED, (0x46, 0x56, 0x5E)[mode]]
+
+    raise bad()
+
+
+def _encode_ld(p, ops, kinds, texts, bad):
+    dst, src = ops
+    if kinds == ("r", "r"):
+        if dst[1] == 6 and src[1] == 6:
+            raise bad()
+        return [0x40 + (dst[1] << 3) + src[1]]
+    if kinds == ("r", "imm"):
+        return [0x06 + (dst[1] << 3), p.byte(src[1])]
+    if kinds == ("r", "idx") and dst[1] != 6:
+        return [src[1], 0x46 + (dst[1] << 3), p.disp(src[2])]
+    if kinds == ("idx", "r") and src[1] != 6:
+        return [dst[1], 0x70 + src[1], p.disp(dst[2])]
+    if kinds == ("idx", "imm"):
+        return [dst[1], 0x36, p.disp(dst[2]), p.byte(src[1])]
+    # Undocumented index-half loads
+    if "xr" in kinds:
+        prefix = dst[1] if kinds[0] == "xr" else src[1]
+        if kinds == ("xr", "imm"):
+            return [prefix, 0x06 + (dst[2] << 3), p.byte(src[1])]
+        codes = []
+        for o, k in zip(ops, kinds):
+            if k == "xr" and o[1] == prefix:
+                codes.append(o[2])
+            elif k == "r" and o[1] not in (4, 5, 6):
+                codes.append(o[1])
+            else:
+                raise bad()
+        return [prefix, 0x40 + (codes[0] << 3) + codes[1]]
+    if dst == ("r", 7):
+        if src in (("ind", "BC"), ("ind", "DE")):
+            return [0x0A if src[1] == "BC" else 0x1A]
+        if kinds[1] == "mem":
+            return [0x3A] + p.word(src[1])
+        if src == ("special", "I"):
+            return [0xED, 0x57]
+        if src == ("special", "R"):
+            return [0xED, 0x5F]
+    if src == ("r", 7):
+        if dst in (("ind", "BC"), ("ind", "DE")):
+            return [0x02 if dst[1] == "BC" else 0x12]
+        if kinds[0] == "mem":
+            return [0x32] + p.word(dst[1])
+        if dst == ("special", "I"):
+            return [0xED, 0x47]
+        if dst == ("special", "R"):
+            return [0xED, 0x4F]
+    if kinds == ("rr", "imm"):
+        name = dst[1]
+        if name in INDEX:
+            return [INDEX[name], 0x21] + p.word(src[1])
+        if name in RP:
+            return [0x01 + (RP[name] << 4)] + p.word(src[1])
+    if kinds == ("rr", "mem"):
+        name = dst[1]
+        if name in ("HL", "IX", "IY"):
+            return _prefixed(INDEX.get(name), [0x2A]) + p.word(src[1])
+        if name in RP:
+            return [0xED, 0x4B + (RP[name] << 4)] + p.word(src[1])
+    if kinds == ("mem", "rr"):
+        name = src[1]
+        if name in ("HL", "IX", "IY"):
+            return _prefixed(INDEX.get(name), [0x22]) + p.word(dst[1])
+        if name in RP:
+            return [0xED, 0x43 + (RP[name] << 4)] + p.word(dst[1])
+    if kinds == ("rr", "rr"):
+        a, b = dst[1], src[1]
+        if a == "SP" and b in ("HL", "IX", "IY"):
+            return _prefixed(INDEX.get(b), [0xF9])
+        pairs = {"BC": (0, 1), "DE": (2, 3), "HL": (4, 5)}
+        if a in pairs and b in pairs and a != b:
+            p.warn(f"LD {a}, {b} is not a Z80 instruction; assembled as two 8-bit loads")
+            (ah, al), (bh, bl) = pairs[a], pairs[b]
+            return [0x40 + (ah << 3) + bh, 0x40 + (al << 3) + bl]
+    raise bad()
+
+
+def _statement(line):
+    """(label, mnemonic, operand text) of one source line, comments removed"""
+    code, quote = [], None
+    for ch in line:
+        if quote:
+            quote = None if ch == quote else quote
+        elif ch in "'\"" and not (ch == "'" and "".join(code[-2:]).upper() == "AF"):
+            quote = ch
+        elif ch == ";":
+            break
+        code.append(ch)
+    code = "".join(code).rstrip()
+    label = None
+    match = re.match(r"\s*([A-Za-z_.][A-Za-z0-9_.]*):", code)
+    if match:
+        label, code = match.group(1), code[match.end():]
+    elif code and not code[0].isspace():
+        head = code.split(None, 1)
+        if head[0].upper() not in MNEMONICS | DIRECTIVES:
+            label, code = head[0], head[1] if len(head) > 1 else ""
+    parts = code.strip().split(None, 1)
+    if not parts:
+        return label, None, ""
+    return label, parts[0].upper(), parts[1] if len(parts) > 1 else ""
+
+
+def _run_pass(lines, symbols, final):
+    p = _Pass(symbols, final)
+    segments, listing = [], []
+    current = None
+    for number, line in enumerate(lines, 1):
+        p.line = number
+        label, mnemonic, rest = _statement(line)
+        if mnemonic == "EQU":
+            if label is None:
+                raise ValueError(f"line {number}: EQU needs a name")
+            symbols[label] = p.value(rest)
+            continue
+        if label is not None:
+            if final and symbols.get(label) != p.pc:
+                raise ValueError(f"line {number}: label {label!r} defined twice")
+            symbols[label] = p.pc
+        if mnemonic is None:
+            continue
+        if mnemonic == "END":
+            break
+        if mnemonic == "ORG":
+            p.pc = p.value(rest) & 0xFFFF
+            current = None
+            continue
+        texts = split_operands(rest)
+        if mnemonic in ("DB", "DEFB", "DEFM"):
+            data = []
+            for t in texts:
+                if len(t) >= 2 and t[0] == t[-1] and t[0] in "'\"" and len(t) != 3:
+                    data.extend(t[1:-1].encode("latin-1"))
+                else:
+                    data.append(p.byte(t))
+        elif mnemonic in ("DW", "DEFW"):
+            data = [b for t in texts for b in p.word(t)]
+        elif mnemonic in ("DS", "DEFS"):
+            data = [p.byte(texts[1]) if len(texts) > 1 else 0] * p.value(texts[0])
+        else:
+            data = encode(p, mnemonic, texts)
+        if current is None:
+            current = (p.pc, bytearray())
+            segments.append(current)
+        current[1].extend(data)
+        listing.append((p.pc, bytes(data), line.rstrip()))
+        p.pc = (p.pc + len(data)) & 0xFFFF
+    return segments, listing, p.warnings
+
+
+def assemble(source):
+    """Assemble source text into a Program"""
+    lines = source.splitlines()
+    symbols = {}
+    _run_pass(lines, symbols, final=False)
+    # Sizes never depend on symbol values, so a second pass fixes every address
+    first = dict(symbols)
+    segments, listing, warnings = _run_pass(lines, symbols, final=True)
+    if first != symbols:
+        raise ValueError("Symbol values changed between passes")
+    return Program([(start, data) for start, data in segments if data], symbols, warnings, listing)
+
+
+def assemble_file(path):
+    with open(path, encoding="utf-8") as f:
+        return assemble(f.read())
+
+
+def listing_lines(program):
+    return [f"{address:04X}  {data.hex(' ').upper():<12} {text}" for address, data, text in program.listing]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("source", help="Z80 assembly file")
+    parser.add_argument("-o", "--output", help="write the binary (from the lowest ORG) to this file")
+    parser.add_argument("-l", "--listing", action="store_true", help="print an address/bytes listing")
+    args = parser.parse_args()
+
+    program = assemble_file(args.source)
+    if args.listing:
+        print("\n".join(listing_lines(program)))
+    for warning in program.warnings:
+        print(f"warning: {warning}")
+    print(f"{program.size} bytes, {program.origin:#06x}-{program.end - 1:#06x}, {len(program.symbols)} symbols")
+    if args.output:
+        image = bytearray(program.end - program.origin)
+        for start, data in program.segments:
+            image[start - program.origin:start - program.origin + len(data)] = data
+        with open(args.output, "wb") as f:
+            f.write(image)
+        print(f"✓ {args.output}")